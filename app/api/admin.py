@@ -1,19 +1,48 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Request
-from fastapi.responses import Response, JSONResponse
+from fastapi.responses import Response, JSONResponse, StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from ..models import get_db, Student, Submission, Analysis, Quiz, QuizQuestion, QuizPDF, Assignment
+from typing import List, Optional
+from ..models.database import SessionLocal
+from ..models import get_db, get_async_db, prefetch_code, Student, Submission, Analysis, Quiz, QuizQuestion, QuizPDF, Assignment, Job, LLMBatch
 from datetime import datetime
 import csv
 import io
+import json
+import asyncio
+import os
 from pydantic import BaseModel
-from ..services.quiz_generation_service import QuizGenerationService
+from ..services.quiz_generation_service import QuizGenerationService, QUIZ_BATCHING, QUIZ_GENERATION_CONCURRENCY
+from ..services.code_condenser import condense_code_samples
 from ..services.quiz_service import create_quiz_pdf, store_quiz_pdf_in_db
 from ..services.ai_analysis_service import AIAnalysisService
+from ..services.llm_cache import get_llm_cache
+from ..services.llm_metrics import llm_metrics
+from ..services.llm_rate_limiter import get_rate_limiter
+from ..services.circuit_breaker import llm_circuit_breaker
+from ..services.model_router import router_metrics
+from ..services.github_api import get_github_client
+from ..services.job_queue import job_to_dict, enqueue_job, cancel_job, report_progress
+from ..services.single_flight import get_single_flight, make_flight_key, submission_hash
+from ..services.quiz_precompute import get_precomputed
+from ..services.llm_batch import prepare_batch, batch_to_dict
+from ..services.pdf_storage import lock_pdf_files, pdf_path, pdf_file_response, remove_pdfs
+from .pagination import PageParams, page_params, paginate
 
 class QuizGenerationRequest(BaseModel):
     assignment_name: str
     student_ids: List[str]
+    bypass_cache: bool = False  # Force fresh LLM calls instead of cached responses
+    per_student: bool = False  # Generate a separate question set for each student, concurrently
+    max_concurrency: Optional[int] = None  # Overrides QUIZ_GENERATION_CONCURRENCY for per_student mode
+    batched: Optional[bool] = None  # per_student mode: several students per LLM request (default QUIZ_BATCHING)
+
+class LLMBatchRequest(BaseModel):
+    assignment_name: str
+    student_ids: Optional[List[str]] = None  # Default: every approved student with a submission
+    include_analysis: bool = True  # Also analyze submissions that have no analysis yet
+    backend: Optional[str] = None  # 'openai' or 'local' (default LLM_BATCH_BACKEND)
 
 class AssignmentCreateRequest(BaseModel):
     name: str
@@ -36,15 +65,24 @@ def require_admin_password(request: Request):
 
 router = APIRouter(tags=["Admin"], dependencies=[Depends(require_admin_password)])
 
+# Seconds between SSE comment lines on otherwise idle streams (proxies drop silent connections)
+SSE_KEEPALIVE_SECONDS = 10
+
+# Admin lists return everything unless ?limit= is given (the admin panel loads them whole)
+ADMIN_MAX_PAGE_SIZE = 1000
+
 @router.post("/upload-students")
 async def upload_students_csv(
     file: UploadFile = File(...),
+    background: bool = False,
     db: Session = Depends(get_db)
 ):
     print(f"DEBUG: Received file: {file if file else 'None'}; filename: {getattr(file, 'filename', None)}")
     """
     Upload CSV file with student names and IDs
-    CSV format: name,student_id
+    CSV format: name,student_id,block
+    
+    With background=true the import runs as a job; poll /admin/jobs/{id} for the result.
     """
     
     if not file.filename.endswith('.csv'):
@@ -55,97 +93,151 @@ async def upload_students_csv(
         content = await file.read()
         csv_content = content.decode('utf-8')
         
-        # Parse CSV
-        csv_reader = csv.DictReader(io.StringIO(csv_content))
+        if background:
+            job = enqueue_job(db, "import_students", {"filename": file.filename, "csv": csv_content}, max_attempts=1)
+            return JSONResponse(status_code=202, content={"success": True, "job": job_to_dict(job)})
         
-        students_processed = 0
-        students_updated = 0
-        students_created = 0
+        return import_students(csv_content, db)
         
-        for row in csv_reader:
-            if 'name' not in row or 'student_id' not in row or 'block' not in row:
-                raise HTTPException(status_code=400, detail="CSV must have 'name', 'student_id', and 'block' columns")
-            
-            name = row['name'].strip()
-            student_id = row['student_id'].strip()
-            block = row['block'].strip()
-            
-            if not name or not student_id or not block:
-                continue
-            
-            if block not in ('4', '6'):
-                raise HTTPException(status_code=400, detail="Block must be 4 or 6")
-            block = int(block)
-            
-            # Check if student already exists
-            existing_student = db.query(Student).filter(Student.student_id == student_id).first()
-            
-            if existing_student:
-                # Update existing student
-                existing_student.name = name
-                existing_student.block = block
-                existing_student.is_approved = True
-                existing_student.updated_at = datetime.utcnow()
-                students_updated += 1
-            else:
-                # Create new student
-                student = Student(
-                    student_id=student_id,
-                    name=name,
-                    block=block,
-                    is_approved=True,
-                    is_active=True,
-                    created_at=datetime.utcnow()
-                )
-                db.add(student)
-                students_created += 1
-            
-            students_processed += 1
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"CSV processing failed: {str(e)}")
+
+def import_students(csv_content: str, db: Session) -> dict:
+    """Create or update students from CSV text; raises ValueError for a bad file.
+
+    Every row is checked and matched to existing students before anything is
+    written, and the changes go in with one commit, so a bad row or a
+    cancelled import job leaves the student list untouched.
+    """
+    # Parse CSV
+    csv_reader = csv.DictReader(io.StringIO(csv_content))
+    
+    rows = []
+    for row in csv_reader:
+        if 'name' not in row or 'student_id' not in row or 'block' not in row:
+            raise ValueError("CSV must have 'name', 'student_id', and 'block' columns")
         
-        db.commit()
+        name = (row['name'] or '').strip()
+        student_id = (row['student_id'] or '').strip()
+        block = (row['block'] or '').strip()
         
-        return {
-            "success": True,
-            "message": f"Student list updated successfully",
-            "students_processed": students_processed,
-            "students_created": students_created,
-            "students_updated": students_updated
-        }
+        if not name or not student_id or not block:
+            continue
         
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"CSV processing failed: {str(e)}")
+        if block not in ('4', '6'):
+            raise ValueError("Block must be 4 or 6")
+        rows.append((name, student_id, int(block)))
+    
+    # Look up existing students 100 rows at a time. Nothing is pending yet, so
+    # the progress reports (which commit when running as a job) write only the
+    # job row, and cancelling here leaves no partial import behind.
+    existing = {}
+    for start in range(0, len(rows), 100):
+        chunk_ids = {student_id for _, student_id, _ in rows[start:start + 100]}
+        existing.update(
+            (student.student_id, student)
+            for student in db.query(Student).filter(Student.student_id.in_(chunk_ids))
+        )
+        report_progress(db, min(start + 100, len(rows)), len(rows), "Checking students")
+    
+    students_updated = 0
+    students_created = 0
+    
+    for name, student_id, block in rows:
+        existing_student = existing.get(student_id)
+        
+        if existing_student:
+            # Update existing student
+            existing_student.name = name
+            existing_student.block = block
+            existing_student.is_approved = True
+            existing_student.updated_at = datetime.utcnow()
+            students_updated += 1
+        else:
+            # Create new student
+            student = Student(
+                student_id=student_id,
+                name=name,
+                block=block,
+                is_approved=True,
+                is_active=True,
+                created_at=datetime.utcnow()
+            )
+            db.add(student)
+            existing[student_id] = student  # A repeated row updates this one
+            students_created += 1
+    
+    db.commit()
+    
+    return {
+        "success": True,
+        "message": f"Student list updated successfully",
+        "students_processed": len(rows),
+        "students_created": students_created,
+        "students_updated": students_updated
+    }
+
+def _submission_summaries(db: Session, student_ids) -> dict:
+    """Submission metadata per student (by DB id), oldest first, from one column-only query"""
+    rows = db.query(
+        Submission.id, Submission.student_id, Submission.assignment_name, Submission.file_name,
+        Submission.file_size, Submission.created_at
+    ).filter(Submission.student_id.in_(student_ids)).order_by(Submission.student_id, Submission.id).all()
+    summaries = {}
+    for row in rows:
+        summaries.setdefault(row.student_id, []).append({
+            "id": row.id,
+            "assignment_name": row.assignment_name,
+            "file_name": row.file_name,
+            "file_size": row.file_size,
+            "created_at": row.created_at.isoformat() if row.created_at else None
+        })
+    return summaries
+
+STUDENT_FIELDS = {
+    name: getattr(Student, name) for name in (
+        "id", "student_id", "name", "block", "is_approved", "is_active", "github_username", "created_at", "updated_at"
+    )
+}
+STUDENT_SUBMISSION_FIELDS = ("submission_count", "latest_assignment", "submissions")
 
 @router.get("/students")
-async def get_all_students(db: Session = Depends(get_db), block: int = None):
-    """Get all students (admin view)"""
+async def get_all_students(
+    db: AsyncSession = Depends(get_async_db),
+    block: int = None,
+    page: PageParams = Depends(page_params(default_limit=None, max_limit=ADMIN_MAX_PAGE_SIZE))
+):
+    """Get all students (admin view), by name; pass ?limit= to page through large classes"""
+    # run_sync runs the ORM code on the async connection, so the event loop isn't blocked
+    return await db.run_sync(_list_students, block, page)
+
+def _list_students(db: Session, block: Optional[int], page: PageParams) -> dict:
     query = db.query(Student)
     if block in (4, 6):
         query = query.filter(Student.block == block)
-    students = query.order_by(Student.name).all()
-    return {
-        "students": [
-            {
-                "id": student.id,
-                "student_id": student.student_id,
-                "name": student.name,
-                "block": student.block,
-                "is_approved": student.is_approved,
-                "created_at": student.created_at.isoformat(),
-                "submission_count": len(student.submissions),
-                "latest_assignment": student.submissions[-1].assignment_name if student.submissions else None,
-                "submissions": [
-                    {
-                        "id": sub.id,
-                        "assignment_name": sub.assignment_name,
-                        "file_name": sub.file_name,
-                        "created_at": sub.created_at.isoformat()
-                    }
-                    for sub in student.submissions
+    result = paginate(
+        query, page, STUDENT_FIELDS,
+        ("id", "student_id", "name", "block", "is_approved", "created_at") + STUDENT_SUBMISSION_FIELDS,
+        key_columns=(Student.name, Student.id), descending=False, computed=STUDENT_SUBMISSION_FIELDS
+    )
+    
+    if set(result.fields) & set(STUDENT_SUBMISSION_FIELDS):
+        # One more query for the whole page instead of lazy-loading each student's submissions
+        submissions_by_student = _submission_summaries(db, [key[-1] for key in result.keys])
+        for item, key in zip(result.items, result.keys):
+            submissions = submissions_by_student.get(key[-1], [])
+            if "submission_count" in result.fields:
+                item["submission_count"] = len(submissions)
+            if "latest_assignment" in result.fields:
+                item["latest_assignment"] = submissions[-1]["assignment_name"] if submissions else None
+            if "submissions" in result.fields:
+                item["submissions"] = [
+                    {name: sub[name] for name in ("id", "assignment_name", "file_name", "created_at")}
+                    for sub in submissions
                 ]
-            }
-            for student in students
-        ]
-    }
+    return result.to_dict("students")
 
 @router.get("/students/{student_id}")
 async def get_student(student_id: str, db: Session = Depends(get_db)):
@@ -155,6 +247,7 @@ async def get_student(student_id: str, db: Session = Depends(get_db)):
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     
+    submissions = _submission_summaries(db, [student.id]).get(student.id, [])
     return {
         "student": {
             "id": student.id,
@@ -163,18 +256,9 @@ async def get_student(student_id: str, db: Session = Depends(get_db)):
             "is_approved": student.is_approved,
             "created_at": student.created_at.isoformat(),
             "updated_at": student.updated_at.isoformat() if student.updated_at else None,
-            "submission_count": len(student.submissions),
-            "latest_assignment": student.submissions[-1].assignment_name if student.submissions else None,
-            "submissions": [
-                {
-                    "id": sub.id,
-                    "assignment_name": sub.assignment_name,
-                    "file_name": sub.file_name,
-                    "file_size": sub.file_size,
-                    "created_at": sub.created_at.isoformat()
-                }
-                for sub in student.submissions
-            ]
+            "submission_count": len(submissions),
+            "latest_assignment": submissions[-1]["assignment_name"] if submissions else None,
+            "submissions": submissions
         }
     }
 
@@ -257,181 +341,614 @@ async def delete_student(
         "message": f"Student {student_id} deleted"
     }
 
+def _find_submissions(request: QuizGenerationRequest, db: Session):
+    """Get all submissions for the selected students and assignment.
+
+    Returns (submissions, {student_id: (Student, [Submission])}).
+    """
+    submissions = []
+    submissions_by_student = {}  # student_id -> (Student, [Submission])
+    print(f"Debug: Looking for submissions for students {request.student_ids} and assignment '{request.assignment_name}'")
+    
+    for student_id in request.student_ids:
+        # Find student by string student_id
+        student = db.query(Student).filter(Student.student_id == student_id).first()
+        if student:
+            print(f"Debug: Found student {student.name} (DB ID: {student.id})")
+            # Get submissions for this student and assignment
+            student_submissions = db.query(Submission).filter(
+                Submission.student_id == student.id,  # Use database ID
+                Submission.assignment_name == request.assignment_name
+            ).all()
+            print(f"Debug: Found {len(student_submissions)} submissions for student {student.name}")
+            submissions.extend(student_submissions)
+            if student_submissions:
+                submissions_by_student[student_id] = (student, student_submissions)
+        else:
+            print(f"Debug: Student with ID {student_id} not found")
+    # Code isn't loaded here: precomputed lookups hash from content_hash, and
+    # callers prefetch_code() only the submissions they generate from
+    return submissions, submissions_by_student
+
 @router.post("/generate-quiz")
 async def generate_quiz(
     request: QuizGenerationRequest,
+    background: bool = False,
     db: Session = Depends(get_db)
 ):
-    """Generate quizzes for selected students using AI analysis"""
+    """Generate quizzes for selected students using AI analysis.
+
+    With background=true the generation and PDF rendering run as a job and
+    this returns 202 right away; /admin/jobs/{id} reports progress, the
+    students finished so far and finally the same body as a direct call.
+    """
     
     # Generate quiz questions using AI
     try:
         # Get all submissions for the selected students and assignment
-        submissions = []
-        print(f"Debug: Looking for submissions for students {request.student_ids} and assignment '{request.assignment_name}'")
-        
-        for student_id in request.student_ids:
-            # Find student by string student_id
-            student = db.query(Student).filter(Student.student_id == student_id).first()
-            if student:
-                print(f"Debug: Found student {student.name} (DB ID: {student.id})")
-                # Get submissions for this student and assignment
-                student_submissions = db.query(Submission).filter(
-                    Submission.student_id == student.id,  # Use database ID
-                    Submission.assignment_name == request.assignment_name
-                ).all()
-                print(f"Debug: Found {len(student_submissions)} submissions for student {student.name}")
-                submissions.extend(student_submissions)
-            else:
-                print(f"Debug: Student with ID {student_id} not found")
+        submissions, submissions_by_student = _find_submissions(request, db)
         
         print(f"Debug: Total submissions found: {len(submissions)}")
         
         if not submissions:
             raise HTTPException(status_code=400, detail="No submissions found for selected students and assignment")
         
-        # Get student names
-        student_names = []
-        for student_id in request.student_ids:
-            student = db.query(Student).filter(Student.student_id == student_id).first()
-            if student:
-                student_names.append(student.name)
+        if background:
+            # Not retried: a second attempt would render a second PDF
+            job = enqueue_job(db, "generate_quiz", request.dict(), max_attempts=1)
+            return JSONResponse(status_code=202, content={"success": True, "job": job_to_dict(job)})
+        
+        # Identical concurrent requests (double clicks, two teachers) share one generation and PDF
+        flight_key = make_flight_key(
+            "generate-quiz",
+            request.assignment_name,
+            (submission_hash(sub) for sub in submissions),
+            student_ids=sorted(submissions_by_student) if request.per_student else sorted(request.student_ids),
+            per_student=request.per_student,
+            batched=_use_batching(request),
+            bypass_cache=request.bypass_cache
+        )
+        bind = db.get_bind()
+        
+        async def work():
+            # The shared task can outlive this request (and its session), so it gets a session of its own
+            work_db = SessionLocal(bind=bind)
+            try:
+                work_submissions, work_by_student = _find_submissions(request, work_db)
+                if request.per_student:
+                    return await _generate_per_student_quiz(request, work_by_student, work_db)
+                return await _generate_combined_quiz(request, work_submissions, work_db)
+            finally:
+                work_db.close()
         
-        # Combine all code content for analysis
-        all_code_content = "\n\n".join([sub.file_content for sub in submissions])
+        result, shared = await get_single_flight().run(flight_key, work)
+        return {**result, "coalesced": shared}
         
-        # Generate questions using the new quiz service
-        print(f"Debug: About to call quiz generation service with content length: {len(all_code_content)}")
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Quiz generation error: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to generate quiz: {str(e)}")
+
+async def _generate_combined_quiz(request: QuizGenerationRequest, submissions: list, db: Session):
+    """Generate one question set from every selected submission and give it to each student"""
+    
+    # Combine all code content for analysis, condensed so every submission fits the prompt budget
+    prefetch_code(db, submissions)
+    all_code_content = condense_code_samples([sub.file_content for sub in submissions])
+    
+    # Generate questions using the new quiz service
+    print(f"Debug: About to call quiz generation service with content length: {len(all_code_content)}")
+    quiz_service = QuizGenerationService()
+    try:
+        questions = await quiz_service.generate_quiz_questions(
+            all_code_content, request.assignment_name, use_cache=not request.bypass_cache
+        )
+        print(f"Debug: Received {len(questions)} questions")
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=f"Quiz generation service unavailable: {str(e)}")
+    
+    # Create quiz data from QuizQuestion objects
+    quiz_data = _pdf_questions(questions)
+    
+    print(f"Debug: Created quiz_data: {quiz_data}")
+    
+    report_progress(db, 1, 1, "Rendering PDF")
+    
+    # Create separate PDF data for each student
+    pdf_quiz_data = []
+    for i, student_id in enumerate(request.student_ids):
+        student = db.query(Student).filter(Student.student_id == student_id).first()
+        if student:
+            pdf_quiz_data.append({
+                "name": student.name,
+                "student_id": student_id,
+                "questions": quiz_data
+            })
+    
+    # Generate the PDF and store it, off the event loop
+    pdf_id = await asyncio.to_thread(_store_quiz_pdf, pdf_quiz_data, request.assignment_name, db.get_bind())
+    
+    return {
+        "success": True,
+        "message": f"Quiz generated successfully! PDF ID: {pdf_id}",
+        "pdf_id": pdf_id,
+        "questions_count": len(quiz_data)
+    }
+
+def _use_batching(request: QuizGenerationRequest) -> bool:
+    if not request.per_student:
+        return False
+    return QUIZ_BATCHING if request.batched is None else request.batched
+
+def _precomputed_results(request: QuizGenerationRequest, submissions_by_student: dict, db: Session) -> dict:
+    """Students with a single submission may already have questions from speculative pre-generation"""
+    if request.bypass_cache:
+        return {}
+    single_hashes = {
+        student_id: submission_hash(student_submissions[0])
+        for student_id, (student, student_submissions) in submissions_by_student.items()
+        if len(student_submissions) == 1
+    }
+    precomputed = get_precomputed(db, request.assignment_name, single_hashes.values())
+    results = {
+        student_id: precomputed[code_hash]
+        for student_id, code_hash in single_hashes.items() if code_hash in precomputed
+    }
+    return results
+
+def _pdf_questions(questions) -> list:
+    """QuizQuestion objects in the shape create_quiz_pdf expects"""
+    return [
+        {
+            "question_text": q.question,
+            "code_snippet": q.code_snippet,
+            "focus": q.focus,
+            "question_number": i
+        }
+        for i, q in enumerate(questions, 1)
+    ]
+
+async def _generate_per_student_quiz(request: QuizGenerationRequest, submissions_by_student: dict, db: Session,
+                                     on_result=None):
+    """Generate one question set per student concurrently and combine them into a single PDF.
+
+    on_result(student_id, questions_or_exception) is called as each student finishes.
+    """
+    
+    results = _precomputed_results(request, submissions_by_student, db)
+    if on_result:
+        for student_id, questions in results.items():
+            on_result(student_id, questions)
+    
+    prefetch_code(db, [
+        sub for student_id, (student, student_submissions) in submissions_by_student.items()
+        if student_id not in results for sub in student_submissions
+    ])
+    code_by_student = {
+        student_id: condense_code_samples([sub.file_content for sub in student_submissions])
+        for student_id, (student, student_submissions) in submissions_by_student.items()
+        if student_id not in results
+    }
+    
+    if code_by_student:
         quiz_service = QuizGenerationService()
+        generate = (
+            quiz_service.generate_quiz_questions_batched if _use_batching(request)
+            else quiz_service.generate_quiz_questions_per_submission
+        )
         try:
-            questions = await quiz_service.generate_quiz_questions(all_code_content, request.assignment_name)
-            print(f"Debug: Received {len(questions)} questions")
+            results.update(await generate(
+                code_by_student,
+                request.assignment_name,
+                use_cache=not request.bypass_cache,
+                max_concurrency=request.max_concurrency,
+                on_result=on_result
+            ))
         except RuntimeError as e:
             raise HTTPException(status_code=503, detail=f"Quiz generation service unavailable: {str(e)}")
+    
+    pdf_quiz_data = []
+    failed_students = []
+    for student_id, (student, _) in submissions_by_student.items():
+        questions = results[student_id]
+        if isinstance(questions, Exception) or not questions:
+            print(f"Quiz generation failed for student {student_id}: {questions}")
+            failed_students.append(student_id)
+            continue
+        pdf_quiz_data.append({
+            "name": student.name,
+            "student_id": student_id,
+            "questions": _pdf_questions(questions)
+        })
+    
+    if not pdf_quiz_data:
+        raise HTTPException(status_code=503, detail="Quiz generation failed for every selected student")
+    
+    report_progress(db, len(submissions_by_student), len(submissions_by_student), "Rendering PDF")
+    pdf_id = await asyncio.to_thread(_store_quiz_pdf, pdf_quiz_data, request.assignment_name, db.get_bind())
+    
+    return {
+        "success": True,
+        "message": f"Quiz generated successfully! PDF ID: {pdf_id}",
+        "pdf_id": pdf_id,
+        "questions_count": sum(len(student["questions"]) for student in pdf_quiz_data),
+        "students_count": len(pdf_quiz_data),
+        "precomputed_students": len(submissions_by_student) - len(code_by_student),
+        "batched": _use_batching(request),
+        "failed_students": failed_students
+    }
+
+async def run_quiz_generation_job(payload: dict, db: Session) -> dict:
+    """Body of the "generate_quiz" job queued by /generate-quiz?background=true"""
+    request = QuizGenerationRequest(**payload)
+    submissions, submissions_by_student = _find_submissions(request, db)
+    if not submissions:
+        raise ValueError("No submissions found for selected students and assignment")
+    
+    try:
+        if not request.per_student:
+            report_progress(db, 0, 1, "Generating questions")
+            return await _generate_combined_quiz(request, submissions, db)
         
-        # Create quiz data from QuizQuestion objects
-        quiz_data = []
-        for i, q in enumerate(questions, 1):
-            quiz_data.append({
-                "question_text": q.question,
-                "code_snippet": q.code_snippet,
-                "focus": q.focus,
-                "question_number": i
-            })
-        
-        print(f"Debug: Created quiz_data: {quiz_data}")
+        # Partial result: questions (or the error) per student as they finish
+        finished = {}
         
-        # Create separate PDF data for each student
-        pdf_quiz_data = []
-        for i, student_id in enumerate(request.student_ids):
-            student = db.query(Student).filter(Student.student_id == student_id).first()
-            if student:
-                pdf_quiz_data.append({
-                    "name": student.name,
-                    "student_id": student_id,
-                    "questions": quiz_data
-                })
+        def on_result(student_id, questions):
+            if isinstance(questions, Exception) or not questions:
+                finished[student_id] = {"status": "failed", "error": str(questions)}
+            else:
+                finished[student_id] = {"status": "done", "questions": len(questions)}
+            report_progress(db, len(finished), len(submissions_by_student), "Generating questions",
+                            partial={"students": finished})
         
-        # Generate PDF
-        pdf_info = create_quiz_pdf(pdf_quiz_data, request.assignment_name)
+        report_progress(db, 0, len(submissions_by_student), "Generating questions")
+        return await _generate_per_student_quiz(request, submissions_by_student, db, on_result=on_result)
+    except HTTPException as e:
+        raise RuntimeError(e.detail)
+
+@router.post("/generate-quiz/stream")
+async def generate_quiz_stream(
+    request: QuizGenerationRequest,
+    db: Session = Depends(get_db)
+):
+    """Generate a quiz PDF like /generate-quiz, reporting progress as Server-Sent Events.
+
+    Events: "start", then "progress" per student (generating, question,
+    precomputed, done or failed), then "done" with the /generate-quiz
+    response body, or "error". Questions are streamed from the model, so
+    the first ones show up within a second or two. Comment lines keep
+    proxies from timing out the connection.
+    """
+    submissions, submissions_by_student = _find_submissions(request, db)
+    if not submissions:
+        raise HTTPException(status_code=400, detail="No submissions found for selected students and assignment")
+    
+    # Load everything up front: the request's DB session may close before the stream ends
+    if request.per_student:
+        precomputed = _precomputed_results(request, submissions_by_student, db)
+        prefetch_code(db, [
+            sub for student_id, (student, student_submissions) in submissions_by_student.items()
+            if student_id not in precomputed for sub in student_submissions
+        ])
+        code_by_key = {
+            student_id: condense_code_samples([sub.file_content for sub in student_submissions])
+            for student_id, (student, student_submissions) in submissions_by_student.items()
+            if student_id not in precomputed
+        }
+        names = {student_id: student.name for student_id, (student, _) in submissions_by_student.items()}
+    else:
+        precomputed = {}
+        prefetch_code(db, submissions)
+        code_by_key = {"all": condense_code_samples([sub.file_content for sub in submissions])}
+        names = {
+            student.student_id: student.name
+            for student in db.query(Student).filter(Student.student_id.in_(request.student_ids))
+        }
+    
+    return StreamingResponse(
+        _quiz_event_stream(request, code_by_key, precomputed, names),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _store_quiz_pdf(pdf_quiz_data: list, assignment_name: str, bind=None) -> int:
+    """Render and store a quiz PDF on a session of its own; returns the PDF id.
+
+    Rendering, the file write and the commit all block, so callers run this
+    with asyncio.to_thread. bind defaults to the app's engine.
+    """
+    db = SessionLocal(bind=bind) if bind is not None else SessionLocal()
+    try:
+        return store_quiz_pdf_in_db(create_quiz_pdf(pdf_quiz_data, assignment_name), db).id
+    finally:
+        db.close()
+
+async def _quiz_event_stream(request: QuizGenerationRequest, code_by_key: dict, precomputed: dict, names: dict):
+    """Run the generations behind /generate-quiz/stream and turn their progress into SSE lines"""
+    quiz_service = QuizGenerationService()
+    semaphore = asyncio.Semaphore(max(1, request.max_concurrency or QUIZ_GENERATION_CONCURRENCY))
+    events = asyncio.Queue()
+    results = dict(precomputed)
+    
+    async def generate(key, code):
+        async with semaphore:
+            await events.put(("progress", {"student_id": key, "status": "generating"}))
+            try:
+                streamed = 0
+                async for kind, value in quiz_service.stream_quiz_questions(
+                    code, request.assignment_name, use_cache=not request.bypass_cache
+                ):
+                    if kind == "question":
+                        streamed += 1
+                        await events.put(("progress", {
+                            "student_id": key, "status": "question", "questions": streamed, "question": value.question
+                        }))
+                    else:
+                        results[key] = value
+                await events.put(("progress", {"student_id": key, "status": "done", "questions": len(results[key])}))
+            except Exception as e:
+                print(f"Quiz generation failed for {key}: {e}")
+                results[key] = e
+                await events.put(("progress", {"student_id": key, "status": "failed", "error": str(e)}))
+    
+    async def produce():
+        await asyncio.gather(*(generate(key, code) for key, code in code_by_key.items()))
+        await events.put(None)
+    
+    yield _sse("start", {"students": len(names), "requests": len(code_by_key), "per_student": request.per_student})
+    for student_id in precomputed:
+        yield _sse("progress", {"student_id": student_id, "status": "precomputed", "questions": len(precomputed[student_id])})
+    
+    producer = asyncio.ensure_future(produce())
+    try:
+        while True:
+            try:
+                item = await asyncio.wait_for(events.get(), timeout=SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if item is None:
+                break
+            yield _sse(*item)
         
-        # Store PDF in database
-        quiz_pdf = store_quiz_pdf_in_db(pdf_info, db)
+        if request.per_student:
+            per_student = {student_id: results[student_id] for student_id in names}
+        else:
+            per_student = {student_id: results["all"] for student_id in names}
+        failed_students = [
+            student_id for student_id, questions in per_student.items()
+            if isinstance(questions, Exception) or not questions
+        ]
+        pdf_quiz_data = [
+            {"name": names[student_id], "student_id": student_id, "questions": _pdf_questions(questions)}
+            for student_id, questions in per_student.items() if student_id not in failed_students
+        ]
+        if not pdf_quiz_data:
+            yield _sse("error", {"detail": "Quiz generation failed for every selected student"})
+            return
         
-        return {
+        pdf_id = await asyncio.to_thread(_store_quiz_pdf, pdf_quiz_data, request.assignment_name)
+        yield _sse("done", {
             "success": True,
-            "message": f"Quiz generated successfully! PDF ID: {quiz_pdf.id}",
-            "pdf_id": quiz_pdf.id,
-            "questions_count": len(quiz_data)
-        }
-        
+            "message": f"Quiz generated successfully! PDF ID: {pdf_id}",
+            "pdf_id": pdf_id,
+            "questions_count": sum(len(student["questions"]) for student in pdf_quiz_data),
+            "students_count": len(pdf_quiz_data),
+            "precomputed_students": len(precomputed),
+            "failed_students": failed_students
+        })
     except Exception as e:
         print(f"Quiz generation error: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to generate quiz: {str(e)}")
+        yield _sse("error", {"detail": f"Failed to generate quiz: {str(e)}"})
+    finally:
+        # The admin closed the page: stop paying for the rest of the generations
+        if not producer.done():
+            producer.cancel()
 
-@router.get("/quiz-pdfs")
-async def list_quiz_pdfs(db: Session = Depends(get_db)):
-    """List all generated quiz PDFs"""
-    
-    pdfs = db.query(QuizPDF).order_by(QuizPDF.created_at.desc()).all()
-    
+@router.get("/llm-cache")
+async def get_llm_cache_stats():
+    """Get LLM response cache hit/miss counters and size"""
+    cache = get_llm_cache()
+    if not cache:
+        return {"enabled": False}
+    return cache.stats()
+
+@router.delete("/llm-cache")
+async def clear_llm_cache():
+    """Clear all cached LLM responses"""
+    cache = get_llm_cache()
+    if not cache:
+        return {"success": True, "message": "LLM response cache is disabled"}
+    count = cache.clear()
+    return {"success": True, "message": f"Cleared {count} cached LLM responses."}
+
+@router.get("/llm-metrics")
+async def get_llm_metrics(recent: int = 20):
+    """Get per-model and per-tier LLM call metrics, rate limit bucket levels and circuit breaker state"""
+    limiter = get_rate_limiter()
     return {
-        "pdfs": [
-            {
-                "id": pdf.id,
-                "assignment_name": pdf.assignment_name,
-                "pdf_filename": pdf.pdf_filename,
-                "student_count": pdf.student_count,
-                "student_ids": pdf.student_ids,
-                "created_at": pdf.created_at.isoformat(),
-                "generated_by": pdf.generated_by
-            }
-            for pdf in pdfs
-        ]
+        **llm_metrics.snapshot(recent=recent),
+        "circuit_breaker": llm_circuit_breaker.snapshot(),
+        "model_tiers": router_metrics.snapshot(),
+        "rate_limits": {
+            "limits_per_minute": limiter.limits if limiter else {},
+            "available": limiter.levels() if limiter else {}
+        }
     }
 
+@router.get("/github-metrics")
+async def get_github_metrics():
+    """GitHub API usage: requests, 304 revalidations, remaining rate limit and cache size"""
+    return get_github_client().metrics()
+
+@router.post("/llm-circuit/reset")
+async def reset_llm_circuit():
+    """Close the LLM circuit breaker so the next call goes to OpenAI"""
+    llm_circuit_breaker.reset()
+    return {"success": True, "circuit_breaker": llm_circuit_breaker.snapshot()}
+
+@router.get("/jobs")
+async def list_jobs(db: Session = Depends(get_db), status: str = None, job_type: str = None, limit: int = 50):
+    """List background jobs, newest first"""
+    query = db.query(Job)
+    if status:
+        query = query.filter(Job.status == status)
+    if job_type:
+        query = query.filter(Job.job_type == job_type)
+    jobs = query.order_by(Job.created_at.desc()).limit(limit).all()
+    return {"jobs": [job_to_dict(job) for job in jobs]}
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: int, db: Session = Depends(get_db)):
+    """Get the status of a background job"""
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"job": job_to_dict(job)}
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_background_job(job_id: int, db: Session = Depends(get_db)):
+    """Cancel a queued job, or stop a running one (what it finished so far stays in partial_result)"""
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not cancel_job(db, job):
+        raise HTTPException(status_code=409, detail=f"Job already {job.status}")
+    return {"success": True, "job": job_to_dict(job)}
+
+@router.post("/llm-batches")
+async def create_llm_batch(request: LLMBatchRequest, db: Session = Depends(get_db)):
+    """Queue an assignment's quizzes (and pending analyses) as an offline LLM batch.
+
+    Cheaper and easier on rate limits than /generate-quiz, but results can take
+    up to the batch completion window. The PDF shows up in the quiz PDF list
+    once the batch has been ingested.
+    """
+    try:
+        batch = prepare_batch(db, request.assignment_name, request.student_ids,
+                              request.include_analysis, request.backend)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"success": True, "batch": batch_to_dict(batch)}
+
+@router.get("/llm-batches")
+async def list_llm_batches(db: Session = Depends(get_db), limit: int = 20):
+    """List offline LLM batches, newest first"""
+    batches = db.query(LLMBatch).order_by(LLMBatch.created_at.desc()).limit(limit).all()
+    return {"batches": [batch_to_dict(batch) for batch in batches]}
+
+@router.get("/llm-batches/{batch_id}")
+async def get_llm_batch(batch_id: int, db: Session = Depends(get_db)):
+    """Get the status of an offline LLM batch"""
+    batch = db.query(LLMBatch).filter(LLMBatch.id == batch_id).first()
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return {"batch": batch_to_dict(batch)}
+
+QUIZ_PDF_FIELDS = {
+    name: getattr(QuizPDF, name) for name in (
+        "id", "assignment_name", "pdf_filename", "student_count", "student_ids", "file_size", "created_at",
+        "generated_by", "quiz_data"
+    )
+}
+
+@router.get("/quiz-pdfs")
+async def list_quiz_pdfs(
+    db: AsyncSession = Depends(get_async_db),
+    page: PageParams = Depends(page_params(default_limit=None, max_limit=ADMIN_MAX_PAGE_SIZE))
+):
+    """List generated quiz PDFs, newest first"""
+    return await db.run_sync(_list_quiz_pdfs, page)
+
+def _list_quiz_pdfs(db: Session, page: PageParams) -> dict:
+    # Metadata columns only (quiz_data just when asked for); the files stay on disk
+    return paginate(
+        db.query(QuizPDF), page, QUIZ_PDF_FIELDS, [name for name in QUIZ_PDF_FIELDS if name != "quiz_data"],
+        key_columns=(QuizPDF.created_at, QuizPDF.id)
+    ).to_dict("pdfs")
+
 @router.get("/quiz-pdfs/{pdf_id}/download")
-async def download_quiz_pdf(pdf_id: int, db: Session = Depends(get_db)):
-    """Download a specific quiz PDF"""
+async def download_quiz_pdf(pdf_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Download a specific quiz PDF (supports Range and If-None-Match)"""
     
-    quiz_pdf = db.query(QuizPDF).filter(QuizPDF.id == pdf_id).first()
-    if not quiz_pdf:
+    quiz_pdf = (await db.execute(
+        select(QuizPDF.sha256, QuizPDF.file_size, QuizPDF.pdf_filename).where(QuizPDF.id == pdf_id)
+    )).first()
+    if not quiz_pdf or not quiz_pdf.sha256 or not os.path.isfile(pdf_path(quiz_pdf.sha256)):
         raise HTTPException(status_code=404, detail="PDF not found")
     
-    return Response(
-        content=quiz_pdf.pdf_data,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": f"attachment; filename={quiz_pdf.pdf_filename}"
-        }
-    )
+    return pdf_file_response(request, quiz_pdf.sha256, quiz_pdf.file_size, quiz_pdf.pdf_filename)
+
+def _delete_quiz_pdfs(query, db: Session) -> int:
+    """Delete the QuizPDF rows in query, then the files no remaining row points at.
+
+    The files go before the commit, while the delete still holds the write
+    lock, so a concurrent store of identical bytes cannot point a new row at
+    a file that is about to disappear (see store_quiz_pdf_in_db).
+    """
+    lock_pdf_files(db)
+    sha256s = {row.sha256 for row in query.with_entities(QuizPDF.sha256) if row.sha256}
+    count = query.delete(synchronize_session=False)
+    still_used = {row.sha256 for row in db.query(QuizPDF.sha256).filter(QuizPDF.sha256.in_(sha256s))}
+    remove_pdfs(sha256s - still_used)
+    db.commit()
+    return count
+
+@router.delete("/quiz-pdfs/delete-all")
+async def delete_all_quiz_pdfs(db: Session = Depends(get_db)):
+    """Delete all quiz PDFs"""
+    count = _delete_quiz_pdfs(db.query(QuizPDF), db)
+    return {"success": True, "message": f"Deleted {count} quiz PDFs."}
 
 @router.delete("/quiz-pdfs/{pdf_id}")
 async def delete_quiz_pdf(pdf_id: int, db: Session = Depends(get_db)):
     """Delete a quiz PDF"""
     
-    quiz_pdf = db.query(QuizPDF).filter(QuizPDF.id == pdf_id).first()
-    if not quiz_pdf:
+    pdf_filename = db.query(QuizPDF.pdf_filename).filter(QuizPDF.id == pdf_id).scalar()
+    if pdf_filename is None:
         raise HTTPException(status_code=404, detail="PDF not found")
     
-    db.delete(quiz_pdf)
-    db.commit()
+    _delete_quiz_pdfs(db.query(QuizPDF).filter(QuizPDF.id == pdf_id), db)
     
     return {
         "success": True,
-        "message": f"PDF {quiz_pdf.pdf_filename} deleted successfully"
+        "message": f"PDF {pdf_filename} deleted successfully"
     }
 
-@router.delete("/quiz-pdfs/delete-all")
-async def delete_all_quiz_pdfs(db: Session = Depends(get_db)):
-    """Delete all quiz PDFs"""
-    count = db.query(QuizPDF).delete()
-    db.commit()
-    return {"success": True, "message": f"Deleted {count} quiz PDFs."}
-
 # Assignment Management Endpoints
 
+ASSIGNMENT_FIELDS = {
+    name: getattr(Assignment, name) for name in (
+        "id", "name", "description", "instructions", "is_active", "created_at", "updated_at"
+    )
+}
+
 @router.get("/assignments")
-async def get_all_assignments(db: Session = Depends(get_db)):
-    """Get all assignments"""
-    
-    assignments = db.query(Assignment).order_by(Assignment.name).all()
-    
-    return {
-        "assignments": [
-            {
-                "id": assignment.id,
-                "name": assignment.name,
-                "description": assignment.description,
-                "instructions": assignment.instructions,
-                "is_active": assignment.is_active,
-                "created_at": assignment.created_at.isoformat(),
-                "updated_at": assignment.updated_at.isoformat(),
-                "submission_count": len(assignment.submissions)
-            }
-            for assignment in assignments
-        ]
-    }
+async def get_all_assignments(
+    db: AsyncSession = Depends(get_async_db),
+    page: PageParams = Depends(page_params(default_limit=None, max_limit=ADMIN_MAX_PAGE_SIZE))
+):
+    """Get all assignments, by name"""
+    return await db.run_sync(_list_assignments, page)
+
+def _list_assignments(db: Session, page: PageParams) -> dict:
+    result = paginate(
+        db.query(Assignment), page, ASSIGNMENT_FIELDS, list(ASSIGNMENT_FIELDS) + ["submission_count"],
+        key_columns=(Assignment.name, Assignment.id), descending=False, computed=["submission_count"]
+    )
+    if "submission_count" in result.fields:
+        ids = [key[-1] for key in result.keys]
+        counts = dict(
+            db.query(Submission.assignment_id, func.count(Submission.id))
+            .filter(Submission.assignment_id.in_(ids)).group_by(Submission.assignment_id).all()
+        )
+        for item, key in zip(result.items, result.keys):
+            item["submission_count"] = counts.get(key[-1], 0)
+    return result.to_dict("assignments")
 
 @router.post("/assignments")
 async def create_assignment(
@@ -2,17 +2,29 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from ..models import get_db, Analysis, Student
 from typing import List, Dict, Any
+from .pagination import PageParams, page_params, paginate
 
 router = APIRouter(prefix="/analyses", tags=["Analyses"])
 
+ANALYSIS_FIELDS = {
+    name: getattr(Analysis, name) for name in (
+        "id", "student_id", "submission_id", "analysis_type", "status", "results", "confidence_score",
+        "created_at", "completed_at"
+    )
+}
+
 @router.get("/")
 async def get_analyses(
     db: Session = Depends(get_db),
     student_id: int = None,
     analysis_type: str = None,
-    limit: int = 50
+    page: PageParams = Depends(page_params())
 ):
-    """Get all analyses or analyses for a specific student"""
+    """Get all analyses or analyses for a specific student, newest first.
+
+    Paged by ?limit= and the returned next_cursor; leave "results" out of
+    ?fields= to skip the analysis JSON.
+    """
     query = db.query(Analysis)
     
     if student_id:
@@ -21,24 +33,10 @@ async def get_analyses(
     if analysis_type:
         query = query.filter(Analysis.analysis_type == analysis_type)
     
-    analyses = query.order_by(Analysis.created_at.desc()).limit(limit).all()
-    
-    return {
-        "analyses": [
-            {
-                "id": analysis.id,
-                "student_id": analysis.student_id,
-                "submission_id": analysis.submission_id,
-                "analysis_type": analysis.analysis_type,
-                "status": analysis.status,
-                "results": analysis.results,
-                "confidence_score": analysis.confidence_score,
-                "created_at": analysis.created_at.isoformat() if analysis.created_at else None,
-                "completed_at": analysis.completed_at.isoformat() if analysis.completed_at else None
-            }
-            for analysis in analyses
-        ]
-    }
+    return paginate(
+        query, page, ANALYSIS_FIELDS, list(ANALYSIS_FIELDS),
+        key_columns=(Analysis.created_at, Analysis.id)
+    ).to_dict("analyses")
 
 @router.get("/{analysis_id}")
 async def get_analysis(analysis_id: int, db: Session = Depends(get_db)):
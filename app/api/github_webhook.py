@@ -1,10 +1,16 @@
 from fastapi import APIRouter, Request, Depends, HTTPException
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from ..models import get_db
 from ..services.github_service import GitHubService
-from ..services.ai_analysis_service import AIAnalysisService
+from ..services.job_queue import enqueue_job
+from ..services.webhook_idempotency import get_webhook_idempotency_store, delivery_key, commit_key
 from typing import Dict, Any
 import json
+import os
+
+# Seconds a redelivery that arrives while the first attempt is still running is told to wait
+WEBHOOK_RETRY_AFTER = int(os.getenv("WEBHOOK_RETRY_AFTER", "30"))
 
 router = APIRouter(prefix="/webhook", tags=["GitHub Webhook"])
 
@@ -18,7 +24,6 @@ async def github_webhook(request: Request, db: Session = Depends(get_db)):
     
     # Initialize services
     github_service = GitHubService()
-    ai_analysis_service = AIAnalysisService()
     
     # Verify webhook signature
     signature = headers.get("x-hub-signature-256", "")
@@ -35,32 +40,61 @@ async def github_webhook(request: Request, db: Session = Depends(get_db)):
     event_type = headers.get("x-github-event", "")
     
     if event_type == "push":
-        # Process push event
-        result = github_service.process_push_event(payload, db)
+        # GitHub redelivers an event after a timeout (or on request) with the same delivery id;
+        # duplicates are acknowledged without touching the database or the LLM
+        store = get_webhook_idempotency_store()
+        delivery_id = headers.get("x-github-delivery")
+        claimed_keys = []
+        if delivery_id:
+            claimed, previous = store.claim(delivery_key(delivery_id))
+            if not claimed and previous is None:
+                # The first attempt is still running (or crashed before releasing its claim);
+                # ask GitHub to try again rather than acknowledge a delivery that may never finish
+                return JSONResponse(status_code=409, headers={"Retry-After": str(WEBHOOK_RETRY_AFTER)}, content={
+                    "status": "in_progress",
+                    "message": "Delivery is being processed",
+                    "results": []
+                })
+            if not claimed:
+                return JSONResponse(status_code=200, content={
+                    "status": "duplicate",
+                    "message": "Delivery already processed",
+                    "results": previous["results"]
+                })
+            claimed_keys.append(delivery_key(delivery_id))
         
-        if result['success']:
-            # Generate AI analysis and quiz for each processed commit
-            for commit_result in result['results']:
-                submission_id = commit_result['submission_id']
-                
-                # Get the submission
-                from ..models import Submission
-                submission = db.query(Submission).filter(Submission.id == submission_id).first()
-                
-                if submission:
-                    # Generate AI analysis
-                    analysis = ai_analysis_service.analyze_submission_with_ai(submission, db)
-                    
-                    # Generate AI-powered quiz
-                    quiz = ai_analysis_service.generate_ai_quiz(submission, analysis, db)
+        try:
+            # The same commit can also arrive in a different delivery (e.g. pushed to a second branch)
+            repository = payload.get('repository', {}).get('full_name', '')
+            commits = payload.get('commits', [])
+            keys_by_sha = {commit['id']: commit_key(repository, commit['id']) for commit in commits if commit.get('id')}
+            new_keys = store.claim_many(keys_by_sha.values())
+            claimed_keys.extend(new_keys)
+            new_commits = [commit for commit in commits if keys_by_sha.get(commit.get('id')) in new_keys]
+            skipped = [{'commit_sha': sha, 'status': 'duplicate'} for sha, key in keys_by_sha.items() if key not in new_keys]
+            
+            # Process push event
+            result = github_service.process_push_event({**payload, 'commits': new_commits}, db)
             
-            return {
-                "status": "success",
-                "message": f"Processed {result['processed_commits']} commits",
-                "results": result['results']
-            }
-        else:
-            raise HTTPException(status_code=500, detail=f"Processing failed: {result['error']}")
+            if not result['success']:
+                raise HTTPException(status_code=500, detail=f"Processing failed: {result['error']}")
+            
+            # Queue AI analysis and quiz generation for each processed commit;
+            # the job workers pick them up so GitHub gets its response right away
+            for commit_result in result['results']:
+                job = enqueue_job(db, "analyze_submission", {"submission_id": commit_result['submission_id']})
+                commit_result['job_id'] = job.id
+        except BaseException:
+            store.release(claimed_keys)
+            raise
+        
+        results = result['results'] + skipped
+        store.complete(claimed_keys, {"results": results})
+        return JSONResponse(status_code=202, content={
+            "status": "accepted",
+            "message": f"Processed {result['processed_commits']} commits; analysis queued",
+            "results": results
+        })
     
     elif event_type == "ping":
         # GitHub sends ping events to verify webhook
@@ -68,4 +102,4 @@ async def github_webhook(request: Request, db: Session = Depends(get_db)):
     
     else:
         # Unsupported event type
-        return {"status": "ignored", "message": f"Event type '{event_type}' not supported"} 
\ No newline at end of file
+        return {"status": "ignored", "message": f"Event type '{event_type}' not supported"} 
@@ -0,0 +1,137 @@
+import json
+import base64
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+from fastapi import HTTPException, Query as QueryParam
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Query
+
+MAX_PAGE_SIZE = 500
+
+# NULL never compares equal, less or greater, so a nullable sort key is read as
+# the lowest value of its type; otherwise rows without it drop out of every page
+_NULL_SORTS_AS = {datetime: datetime.min, str: ""}
+
+
+class PageParams(NamedTuple):
+    limit: Optional[int]  # None returns every row (admin lists the UI loads in full)
+    cursor: Optional[str]
+    fields: Optional[str]  # Comma-separated projection, e.g. "id,status,created_at"
+    include_total: bool
+
+
+def page_params(default_limit: Optional[int] = 50, max_limit: int = MAX_PAGE_SIZE):
+    """FastAPI dependency reading ?limit=&cursor=&fields=&include_total= for a list endpoint"""
+    def dependency(
+        limit: Optional[int] = QueryParam(default_limit, ge=1, le=max_limit),
+        cursor: Optional[str] = None,
+        fields: Optional[str] = None,
+        include_total: bool = False
+    ) -> PageParams:
+        return PageParams(limit, cursor, fields, include_total)
+    return dependency
+
+
+class Page(NamedTuple):
+    items: List[Dict[str, Any]]  # Requested fields only
+    keys: List[tuple]  # Each item's sort key values, the primary key last
+    fields: List[str]
+    next_cursor: Optional[str]
+    total: Optional[int]
+
+    def to_dict(self, key: str) -> Dict[str, Any]:
+        result = {key: self.items, "next_cursor": self.next_cursor}
+        if self.total is not None:
+            result["total"] = self.total
+        return result
+
+
+def select_fields(requested: Optional[str], allowed: Sequence[str], default: Sequence[str]) -> List[str]:
+    """Validate a fields= parameter against the endpoint's allowed fields, keeping their order"""
+    if not requested:
+        return list(default)
+    wanted = {name.strip() for name in requested.split(",") if name.strip()}
+    unknown = wanted - set(allowed)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}. "
+                                                    f"Available: {', '.join(allowed)}")
+    return [name for name in allowed if name in wanted]
+
+
+def _encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str, key_columns: Sequence[Any]) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(key_columns):
+            raise ValueError(cursor)
+        return [
+            datetime.fromisoformat(value) if value is not None and column.type.python_type is datetime else value
+            for value, column in zip(values, key_columns)
+        ]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _sort_key(column):
+    """The column as it is ordered and compared: coalesced to _NULL_SORTS_AS when nullable"""
+    if getattr(column, "nullable", False):
+        python_type = column.type.python_type
+        if python_type in _NULL_SORTS_AS:
+            return func.coalesce(column, _NULL_SORTS_AS[python_type])
+    return column
+
+
+def _after(key_columns: Sequence[Any], values: Sequence[Any], descending: bool):
+    """Rows strictly after the cursor in (k1, k2, ...) order, as an OR of prefix equalities"""
+    clauses = []
+    for i, (column, value) in enumerate(zip(key_columns, values)):
+        prefix = [c == v for c, v in zip(key_columns[:i], values[:i])]
+        clauses.append(and_(*prefix, column < value if descending else column > value))
+    return or_(*clauses)
+
+
+def paginate(query: Query, params: PageParams, columns: Dict[str, Any], default_fields: Sequence[str],
+             key_columns: Sequence[Any], descending: bool = True, computed: Sequence[str] = ()) -> Page:
+    """Keyset-paginate a filtered query, selecting only the requested columns.
+
+    columns maps field name -> mapped column; computed names are accepted in
+    fields= but filled in by the caller, using page.keys. key_columns must end
+    in a unique column (the primary key) so the order is total; the next
+    page starts strictly after the last row's key, which stays correct while
+    rows are being added. Nullable keys sort as the lowest value of their type.
+    """
+    key_columns = [_sort_key(column) for column in key_columns]
+    allowed = list(columns) + list(computed)
+    fields = select_fields(params.fields, allowed, default_fields)
+    selected = [columns[name].label(name) for name in fields if name in columns]
+    key_labels = [f"_key{i}" for i in range(len(key_columns))]
+    selected += [column.label(label) for column, label in zip(key_columns, key_labels)]
+
+    total = query.order_by(None).count() if params.include_total else None
+
+    paged = query.with_entities(*selected)
+    if params.cursor:
+        paged = paged.filter(_after(key_columns, _decode_cursor(params.cursor, key_columns), descending))
+    paged = paged.order_by(None).order_by(*[column.desc() if descending else column.asc() for column in key_columns])
+    if params.limit is not None:
+        paged = paged.limit(params.limit + 1)
+    rows = paged.all()
+
+    has_more = params.limit is not None and len(rows) > params.limit
+    rows = rows[:params.limit] if has_more else rows
+    keys = [tuple(row._mapping[label] for label in key_labels) for row in rows]
+    next_cursor = _encode_cursor(keys[-1]) if has_more else None
+
+    items = []
+    for row in rows:
+        item = {}
+        for name in fields:
+            if name in columns:
+                value = row._mapping[name]
+                item[name] = value.isoformat() if isinstance(value, datetime) else value
+        items.append(item)
+    return Page(items=items, keys=keys, fields=fields, next_cursor=next_cursor, total=total)
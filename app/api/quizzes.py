@@ -2,17 +2,25 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from ..models import get_db, Quiz, QuizQuestion, Student
 from typing import List, Dict, Any
+from .pagination import PageParams, page_params, paginate
 
 router = APIRouter(prefix="/quizzes", tags=["Quizzes"])
 
+QUIZ_FIELDS = {
+    name: getattr(Quiz, name) for name in (
+        "id", "student_id", "submission_id", "quiz_type", "status", "total_questions", "correct_answers",
+        "score", "created_at", "completed_at"
+    )
+}
+
 @router.get("/")
 async def get_quizzes(
     db: Session = Depends(get_db),
     student_id: int = None,
     quiz_type: str = None,
-    limit: int = 50
+    page: PageParams = Depends(page_params())
 ):
-    """Get all quizzes or quizzes for a specific student"""
+    """Get all quizzes or quizzes for a specific student, newest first (paged, see /submissions/)"""
     query = db.query(Quiz)
     
     if student_id:
@@ -21,25 +29,10 @@ async def get_quizzes(
     if quiz_type:
         query = query.filter(Quiz.quiz_type == quiz_type)
     
-    quizzes = query.order_by(Quiz.created_at.desc()).limit(limit).all()
-    
-    return {
-        "quizzes": [
-            {
-                "id": quiz.id,
-                "student_id": quiz.student_id,
-                "submission_id": quiz.submission_id,
-                "quiz_type": quiz.quiz_type,
-                "status": quiz.status,
-                "total_questions": quiz.total_questions,
-                "correct_answers": quiz.correct_answers,
-                "score": quiz.score,
-                "created_at": quiz.created_at.isoformat() if quiz.created_at else None,
-                "completed_at": quiz.completed_at.isoformat() if quiz.completed_at else None
-            }
-            for quiz in quizzes
-        ]
-    }
+    return paginate(
+        query, page, QUIZ_FIELDS, list(QUIZ_FIELDS),
+        key_columns=(Quiz.created_at, Quiz.id)
+    ).to_dict("quizzes")
 
 @router.get("/{quiz_id}")
 async def get_quiz(quiz_id: int, db: Session = Depends(get_db)):
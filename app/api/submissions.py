@@ -1,44 +1,45 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from ..models import get_db, Submission, Student
+from ..models.code_blob import iter_code
+from .pagination import PageParams, page_params, paginate
 from typing import List, Dict, Any
-from fastapi.responses import Response
+from fastapi.responses import StreamingResponse
 
 router = APIRouter(prefix="/submissions", tags=["Submissions"])
 
+# Fields available to ?fields=; the code itself is only served by /{id}/download
+SUBMISSION_FIELDS = {
+    name: getattr(Submission, name) for name in (
+        "id", "student_id", "assignment_id", "assignment_name", "file_name", "file_size", "content_hash",
+        "commit_sha", "commit_message", "commit_date", "lines_added", "lines_deleted", "github_repo", "branch",
+        "created_at"
+    )
+}
+DEFAULT_SUBMISSION_FIELDS = (
+    "id", "student_id", "commit_sha", "commit_message", "commit_date", "lines_added", "lines_deleted",
+    "github_repo", "branch", "assignment_id", "created_at"
+)
+
 @router.get("/")
 async def get_submissions(
     db: Session = Depends(get_db),
     student_id: int = None,
-    limit: int = 50
+    page: PageParams = Depends(page_params())
 ):
-    """Get all submissions or submissions for a specific student"""
+    """Get all submissions or submissions for a specific student, newest first.
+
+    Paged by ?limit= and the returned next_cursor; ?fields= picks columns.
+    """
     query = db.query(Submission)
     
     if student_id:
         query = query.filter(Submission.student_id == student_id)
     
-    submissions = query.order_by(Submission.created_at.desc()).limit(limit).all()
-    
-    return {
-        "submissions": [
-            {
-                "id": sub.id,
-                "student_id": sub.student_id,
-                "commit_sha": sub.commit_sha,
-                "commit_message": sub.commit_message,
-                "commit_date": sub.commit_date.isoformat() if sub.commit_date else None,
-                "lines_added": sub.lines_added,
-                "lines_deleted": sub.lines_deleted,
-                "files_changed": sub.files_changed,
-                "github_repo": sub.github_repo,
-                "branch": sub.branch,
-                "assignment_id": sub.assignment_id,
-                "created_at": sub.created_at.isoformat() if sub.created_at else None
-            }
-            for sub in submissions
-        ]
-    }
+    return paginate(
+        query, page, SUBMISSION_FIELDS, DEFAULT_SUBMISSION_FIELDS,
+        key_columns=(Submission.created_at, Submission.id)
+    ).to_dict("submissions")
 
 @router.get("/{submission_id}")
 async def get_submission(submission_id: int, db: Session = Depends(get_db)):
@@ -76,10 +77,11 @@ async def download_submission_file(submission_id: int, db: Session = Depends(get
     submission = db.query(Submission).filter(Submission.id == submission_id).first()
     if not submission:
         raise HTTPException(status_code=404, detail="Submission not found")
-    file_content = submission.file_content or ''
+    # Streamed from the blob store, decompressing as it goes
+    chunks = iter_code(db, submission.content_hash) if submission.content_hash else None
     file_name = getattr(submission, 'file_name', None) or 'submission.txt'
-    return Response(
-        content=file_content,
+    return StreamingResponse(
+        chunks if chunks is not None else iter([b""]),
         media_type="text/plain",
         headers={
             "Content-Disposition": f"attachment; filename={file_name}"
@@ -1,8 +1,11 @@
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional
-from ..models import get_db, Student, Submission, Assignment
+from ..models import get_db, get_async_db, Student, Submission, Assignment
 from ..services.ai_analysis_service import AIAnalysisService
+from ..services.quiz_precompute import SPECULATIVE_QUIZ_GENERATION, enqueue_pregeneration
 from datetime import datetime
 import os
 
@@ -15,21 +18,21 @@ async def upload_code(
     file: Optional[UploadFile] = File(None),
     code_paste: Optional[str] = Form(None),
     submission_type: Optional[str] = Form(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Upload code file for a student"""
+    """Upload code file for a student (async session: a slow query doesn't hold up other requests)"""
     
     try:
         # Validate student exists
-        student = db.query(Student).filter(Student.student_id == student_id).first()
+        student = (await db.execute(select(Student).where(Student.student_id == student_id))).scalars().first()
         if not student:
             raise HTTPException(status_code=404, detail="Student not found")
         
         # Check if assignment exists and is active
-        assignment = db.query(Assignment).filter(
+        assignment = (await db.execute(select(Assignment).where(
             Assignment.name == assignment_name,
             Assignment.is_active == True
-        ).first()
+        ))).scalars().first()
         if not assignment:
             raise HTTPException(status_code=404, detail="Assignment not found or inactive")
         
@@ -49,16 +52,16 @@ async def upload_code(
             raise HTTPException(status_code=400, detail="Either file or code_paste must be provided")
         
         # Check if student already has a submission for this assignment
-        existing_submission = db.query(Submission).filter(
+        existing_submission = (await db.execute(select(Submission).where(
             Submission.student_id == student.id,
             Submission.assignment_name == assignment_name
-        ).first()
+        ))).scalars().first()
         
         if existing_submission:
             # Delete the old submission
             print(f"Deleting old submission for student {student_id} on assignment {assignment_name}")
-            db.delete(existing_submission)
-            db.commit()
+            await db.delete(existing_submission)
+            await db.commit()
         
         # Create new submission
         submission = Submission(
@@ -72,8 +75,16 @@ async def upload_code(
         )
         
         db.add(submission)
-        db.commit()
-        db.refresh(submission)
+        await db.commit()
+        await db.refresh(submission)
+        
+        if SPECULATIVE_QUIZ_GENERATION:
+            # Warm the class quiz in the background; never fail the upload over it
+            try:
+                await db.run_sync(enqueue_pregeneration, submission)
+            except Exception as e:
+                print(f"Could not queue quiz pre-generation for submission {submission.id}: {e}")
+                await db.rollback()
         
         return {
             "success": True,
@@ -2,7 +2,11 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from .models import Base, engine
+from .models.database import close_async_engine
 from .api import github_router, students_router, submissions_router, analyses_router, quizzes_router, upload_router, admin_router
+from .services.job_queue import start_job_workers, stop_job_workers
+from .services.circuit_breaker import llm_circuit_breaker
+from .services.openai_client import close_async_clients, close_clients
 import os
 from dotenv import load_dotenv
 
@@ -40,6 +44,20 @@ app.include_router(quizzes_router)
 app.include_router(upload_router)
 app.include_router(admin_router, prefix='/admin')
 
+@app.on_event("startup")
+async def startup_event():
+    """Start background job workers unless they run as a separate process"""
+    if os.getenv("JOB_WORKERS_IN_PROCESS", "true").lower() in ("1", "true", "yes"):
+        start_job_workers()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background job workers and close pooled OpenAI and database connections"""
+    stop_job_workers()
+    await close_async_clients()
+    close_clients()
+    await close_async_engine()
+
 @app.get("/")
 async def root():
     """Root endpoint - redirects to upload page"""
@@ -52,7 +70,8 @@ async def health_check():
     return {
         "status": "healthy",
         "database": "connected",
-        "services": "running"
+        "services": "running",
+        "llm_circuit": llm_circuit_breaker.snapshot()
     }
 
 @app.get("/status")
@@ -61,7 +80,8 @@ async def status():
     return {
         "status": "online",
         "service": "AI Code Assessment System",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "llm_circuit": llm_circuit_breaker.state
     }
 
 @app.get("/docs")
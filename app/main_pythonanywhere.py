@@ -6,7 +6,11 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from .models import Base, engine
+from .models.database import close_async_engine
 from .api import github_router, students_router, submissions_router, analyses_router, quizzes_router, upload_router, admin_router
+from .services.job_queue import start_job_workers, stop_job_workers
+from .services.circuit_breaker import llm_circuit_breaker
+from .services.openai_client import close_async_clients, close_clients
 import os
 import sys
 from pathlib import Path
@@ -71,6 +75,7 @@ async def health_check():
         "status": "healthy",
         "database": "connected",
         "services": "running",
+        "llm_circuit": llm_circuit_breaker.snapshot(),
         "platform": "pythonanywhere"
     }
 
@@ -81,6 +86,7 @@ async def status():
         "status": "online",
         "service": "AI Code Assessment System",
         "version": "1.0.0",
+        "llm_circuit": llm_circuit_breaker.state,
         "platform": "pythonanywhere"
     }
 
@@ -119,9 +125,17 @@ async def startup_event():
     if not static_dir.exists():
         static_dir.mkdir()
         print("✅ Created static directory")
+    
+    # Start background job workers (disable and run start_worker.py on WSGI hosts)
+    if os.getenv("JOB_WORKERS_IN_PROCESS", "true").lower() in ("1", "true", "yes"):
+        start_job_workers()
 
 # PythonAnywhere-specific shutdown event
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
     print("🛑 AI Code Assessment System shutting down...")
+    stop_job_workers()
+    await close_async_clients()
+    close_clients()
+    await close_async_engine()
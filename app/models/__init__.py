@@ -1,11 +1,14 @@
-from .database import Base, engine, get_db
+from .database import Base, engine, get_db, get_async_db
 from .student import Student
-from .submission import Submission
+from .submission import Submission, prefetch_code
+from .code_blob import CodeBlob
 from .analysis import Analysis
-from .quiz import Quiz, QuizQuestion, QuizPDF
+from .quiz import Quiz, QuizQuestion, QuizPDF, PrecomputedQuestions
 from .assignment import Assignment
+from .job import Job
+from .llm_batch import LLMBatch
 
 __all__ = [
-    'Base', 'engine', 'get_db',
-    'Student', 'Submission', 'Analysis', 'Quiz', 'QuizQuestion', 'QuizPDF', 'Assignment'
+    'Base', 'engine', 'get_db', 'get_async_db',
+    'Student', 'Submission', 'CodeBlob', 'prefetch_code', 'Analysis', 'Quiz', 'QuizQuestion', 'QuizPDF', 'PrecomputedQuestions', 'Assignment', 'Job', 'LLMBatch'
 ] 
\ No newline at end of file
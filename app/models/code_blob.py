@@ -0,0 +1,121 @@
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary, insert, select
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+import os
+import zlib
+import hashlib
+from .database import Base
+
+try:
+    import zstandard
+except ImportError:  # Optional; zlib is always available
+    zstandard = None
+
+# Compression for newly stored code: zlib, zstd (needs the zstandard package) or none
+CODE_BLOB_COMPRESSION = os.getenv("CODE_BLOB_COMPRESSION", "zlib").lower()
+CODE_BLOB_COMPRESSION_LEVEL = int(os.getenv("CODE_BLOB_COMPRESSION_LEVEL", "6"))
+CODE_BLOB_CHUNK_SIZE = 64 * 1024  # Bytes per chunk when streaming code out
+
+class CodeBlob(Base):
+    """Submission code, stored once per distinct content and keyed by its SHA-256"""
+    __tablename__ = "code_blobs"
+
+    sha256 = Column(String(64), primary_key=True)  # Of the UTF-8 code, same as content_hash()
+    size = Column(Integer, nullable=False)  # Uncompressed bytes
+    compression = Column(String, nullable=False, default="none")  # zlib, zstd or none
+    data = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+def hash_code(content: str) -> Tuple[str, bytes]:
+    """(sha256 hex, UTF-8 bytes) of a piece of code"""
+    raw = content.encode("utf-8")
+    return hashlib.sha256(raw).hexdigest(), raw
+
+def _compress(raw: bytes) -> Tuple[str, bytes]:
+    if CODE_BLOB_COMPRESSION == "zstd" and zstandard is not None:
+        data, compression = zstandard.ZstdCompressor(level=CODE_BLOB_COMPRESSION_LEVEL).compress(raw), "zstd"
+    elif CODE_BLOB_COMPRESSION in ("zlib", "zstd"):
+        data, compression = zlib.compress(raw, CODE_BLOB_COMPRESSION_LEVEL), "zlib"
+    else:
+        return "none", raw
+    # Tiny files can grow when compressed
+    return (compression, data) if len(data) < len(raw) else ("none", raw)
+
+def store_code(db: Session, content: str) -> Tuple[str, int]:
+    """Store code unless identical content is already there; returns (sha256, size).
+
+    Runs on the session's connection without flushing, so it is safe to call
+    from flush hooks, and concurrent writers of the same content both succeed.
+    """
+    sha, raw = hash_code(content)
+    compression, data = _compress(raw)
+    values = {"sha256": sha, "size": len(raw), "compression": compression, "data": data,
+              "created_at": datetime.utcnow()}
+    connection = db.connection()
+    dialect = connection.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        connection.execute(dialect_insert(CodeBlob.__table__).values(**values).on_conflict_do_nothing())
+    elif connection.execute(select(CodeBlob.sha256).where(CodeBlob.sha256 == sha)).first() is None:
+        connection.execute(insert(CodeBlob.__table__).values(**values))
+    return sha, len(raw)
+
+def _decode(compression: str, data: bytes) -> bytes:
+    if compression == "zlib":
+        return zlib.decompress(data)
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Code blob is zstd-compressed but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return bytes(data)
+
+def load_codes(db: Session, hashes: Iterable[str]) -> Dict[str, str]:
+    """Code for many hashes in one query; unknown hashes are left out"""
+    wanted = list({h for h in hashes if h})
+    if not wanted:
+        return {}
+    rows = db.connection().execute(
+        select(CodeBlob.sha256, CodeBlob.compression, CodeBlob.data).where(CodeBlob.sha256.in_(wanted))
+    ).all()
+    return {sha: _decode(compression, data).decode("utf-8") for sha, compression, data in rows}
+
+def load_code(db: Session, sha: str) -> Optional[str]:
+    return load_codes(db, [sha]).get(sha)
+
+def iter_code(db: Session, sha: str, chunk_size: int = CODE_BLOB_CHUNK_SIZE) -> Optional[Iterator[bytes]]:
+    """UTF-8 code as a stream of chunks, decompressed as it is consumed.
+
+    The compressed blob is read here, so the iterator no longer needs the
+    session; returns None for an unknown hash.
+    """
+    row = db.connection().execute(
+        select(CodeBlob.compression, CodeBlob.data).where(CodeBlob.sha256 == sha)
+    ).first()
+    if row is None:
+        return None
+    compression, data = row
+    return _iter_decoded(compression, bytes(data), chunk_size)
+
+def _iter_decoded(compression: str, data: bytes, chunk_size: int) -> Iterator[bytes]:
+    if compression == "zlib":
+        decompressor = zlib.decompressobj()
+        pending = data
+        while pending:
+            chunk = decompressor.decompress(pending, chunk_size)
+            pending = decompressor.unconsumed_tail
+            if chunk:
+                yield chunk
+        tail = decompressor.flush()
+        if tail:
+            yield tail
+    elif compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Code blob is zstd-compressed but the zstandard package is not installed")
+        yield from zstandard.ZstdDecompressor().read_to_iter(data, read_size=chunk_size, write_size=chunk_size)
+    else:
+        for start in range(0, len(data), chunk_size):
+            yield data[start:start + chunk_size]
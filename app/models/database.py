@@ -1,7 +1,10 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from typing import Optional
 import os
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -23,4 +26,47 @@ def get_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+def _async_database_url(url: str) -> str:
+    """DATABASE_URL with an asyncio driver: aiosqlite for SQLite, asyncpg for PostgreSQL"""
+    scheme, rest = url.split("://", 1)
+    dialect = scheme.split("+", 1)[0]
+    if dialect == "sqlite":
+        return f"sqlite+aiosqlite://{rest}"
+    if dialect in ("postgres", "postgresql"):
+        return f"postgresql+asyncpg://{rest}"
+    return url
+
+# Async engine for routes that must not block the event loop; same database as `engine`
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_database_url(DATABASE_URL)
+
+_async_engine: Optional[AsyncEngine] = None
+_async_session_factory: Optional[async_sessionmaker] = None
+_async_lock = threading.Lock()
+
+def get_async_engine() -> AsyncEngine:
+    """Create the async engine on first use, so the driver is only needed where it's used"""
+    global _async_engine, _async_session_factory
+    with _async_lock:
+        if _async_engine is None:
+            _async_engine = create_async_engine(ASYNC_DATABASE_URL)
+            # Objects stay usable after commit; async sessions can't lazily refresh them
+            _async_session_factory = async_sessionmaker(_async_engine, expire_on_commit=False, autoflush=False)
+        return _async_engine
+
+def AsyncSessionLocal() -> AsyncSession:
+    get_async_engine()
+    return _async_session_factory()
+
+async def get_async_db():
+    """Dependency to get an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def close_async_engine():
+    global _async_engine, _async_session_factory
+    with _async_lock:
+        engine_to_close, _async_engine, _async_session_factory = _async_engine, None, None
+    if engine_to_close is not None:
+        await engine_to_close.dispose()
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, Boolean
+from datetime import datetime
+from .database import Base
+
+class Job(Base):
+    __tablename__ = "jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_type = Column(String, index=True)  # e.g. 'analyze_submission'
+    payload = Column(JSON)  # Handler arguments
+    status = Column(String, default="queued", index=True)  # queued, running, completed, failed, cancelled
+    priority = Column(Integer, default=0, index=True)  # Higher runs first; speculative work is negative
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    available_at = Column(DateTime, default=datetime.utcnow, index=True)  # Not claimable before this (retry backoff)
+    locked_by = Column(String)  # Worker holding the job
+    locked_until = Column(DateTime)  # Visibility timeout; expired leases are reclaimed
+    result = Column(JSON)
+    progress = Column(JSON)  # {"done", "total", "message"} reported by the handler while it runs
+    partial_result = Column(JSON)  # Whatever the handler has finished so far; kept if it fails or is cancelled
+    cancel_requested = Column(Boolean, default=False)  # Set by the cancel endpoint; the worker stops the handler
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    completed_at = Column(DateTime)
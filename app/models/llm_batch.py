@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, JSON
+from datetime import datetime
+from .database import Base
+
+class LLMBatch(Base):
+    __tablename__ = "llm_batches"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    assignment_name = Column(String, index=True)
+    backend = Column(String)  # 'openai' (Batch API) or 'local'
+    backend_batch_id = Column(String)  # Id assigned by the backend on submit
+    status = Column(String, default="prepared", index=True)  # prepared, submitted, completed, failed
+    input_path = Column(String)  # JSONL request file
+    output_path = Column(String)  # JSONL results, once downloaded
+    request_count = Column(Integer, default=0)
+    items = Column(JSON)  # What each custom_id is for, and precomputed work that needs no request
+    result = Column(JSON)  # pdf_id, ingested counts, per-item errors
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    submitted_at = Column(DateTime)
+    completed_at = Column(DateTime)
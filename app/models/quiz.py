@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, ForeignKey, Boolean, LargeBinary
+from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, ForeignKey, Boolean, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
@@ -46,11 +46,23 @@ class QuizPDF(Base):
     id = Column(Integer, primary_key=True, index=True)
     assignment_name = Column(String, index=True)
     pdf_filename = Column(String)  # Original filename for reference
-    pdf_data = Column(LargeBinary)  # Actual PDF file data
+    sha256 = Column(String(64), index=True)  # File name under QUIZ_PDF_DIR, and the download ETag
+    file_size = Column(Integer)  # Bytes
     student_count = Column(Integer)  # Number of students in this PDF
     generated_by = Column(String, default="admin")  # Who generated it
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Metadata for easy querying
     student_ids = Column(JSON)  # List of student IDs included
-    quiz_data = Column(JSON)  # Store the quiz data used to generate PDF 
\ No newline at end of file
+    quiz_data = Column(JSON)  # Store the quiz data used to generate PDF
+
+class PrecomputedQuestions(Base):
+    __tablename__ = "precomputed_questions"
+    __table_args__ = (UniqueConstraint("content_hash", "assignment_name"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), index=True)  # SHA-256 of the submission's code
+    assignment_name = Column(String, index=True)
+    questions = Column(JSON)  # [{"question", "code_snippet", "focus"}]
+    source_submission_id = Column(Integer)  # Submission that triggered generation
+    created_at = Column(DateTime, default=datetime.utcnow)
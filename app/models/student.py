@@ -14,6 +14,7 @@ class Student(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     block = Column(Integer, nullable=False)  # 4 or 6 only
+    github_username = Column(String, unique=True, index=True)  # Commit author for webhook pushes
     
     # Relationships
     submissions = relationship("Submission", back_populates="student")
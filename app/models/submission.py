@@ -1,7 +1,9 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, event
+from sqlalchemy.orm import relationship, object_session, Session
 from datetime import datetime
-from .database import Base
+from typing import Iterable, Optional
+from .database import Base, SessionLocal
+from .code_blob import hash_code, store_code, load_code, load_codes
 
 class Submission(Base):
     __tablename__ = "submissions"
@@ -11,11 +13,58 @@ class Submission(Base):
     assignment_id = Column(Integer, ForeignKey("assignments.id"))  # New foreign key
     assignment_name = Column(String, index=True)  # Keep for backward compatibility
     file_name = Column(String)  # Original file name
-    file_content = Column(Text)  # File content
+    content_hash = Column(String(64), index=True)  # SHA-256 of the code, which lives in code_blobs
     file_size = Column(Integer)  # File size in bytes
+    github_repo = Column(String)  # Set for submissions that came from a GitHub push
+    commit_sha = Column(String, index=True)
+    commit_message = Column(Text)
+    commit_date = Column(DateTime)
+    branch = Column(String)
+    lines_added = Column(Integer)  # Commit line stats, filled from the local git mirror
+    lines_deleted = Column(Integer)
+    diff_content = Column(Text)  # Unified diff of the commit
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
     student = relationship("Student", back_populates="submissions")
     assignment = relationship("Assignment", back_populates="submissions")
-    analyses = relationship("Analysis", back_populates="submission") 
\ No newline at end of file
+    analyses = relationship("Analysis", back_populates="submission")
+
+    @property
+    def file_content(self) -> Optional[str]:
+        """The submitted code, read from the blob store on first access"""
+        if "_code" not in self.__dict__:
+            if self.content_hash is None:
+                return None
+            session = object_session(self)
+            if session is not None:
+                code = load_code(session, self.content_hash)
+            else:
+                with SessionLocal() as db:
+                    code = load_code(db, self.content_hash)
+            self.__dict__["_code"] = code
+        return self.__dict__["_code"]
+
+    @file_content.setter
+    def file_content(self, content: Optional[str]) -> None:
+        # The blob itself is written when the submission is flushed
+        if content is None:
+            self.content_hash = None
+        else:
+            self.content_hash, raw = hash_code(content)
+            self.file_size = len(raw)
+        self.__dict__["_code"] = content
+        self.__dict__["_code_pending"] = content is not None
+
+def prefetch_code(db: Session, submissions: Iterable[Submission]) -> None:
+    """Load the code of many submissions with one query instead of one per file_content access"""
+    missing = [sub for sub in submissions if "_code" not in sub.__dict__ and sub.content_hash]
+    codes = load_codes(db, (sub.content_hash for sub in missing))
+    for sub in missing:
+        sub.__dict__["_code"] = codes.get(sub.content_hash)
+
+@event.listens_for(Session, "before_flush")
+def _store_pending_code(session, flush_context, instances):
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Submission) and obj.__dict__.pop("_code_pending", False):
+            store_code(session, obj.__dict__["_code"])
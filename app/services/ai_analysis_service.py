@@ -4,25 +4,30 @@ from sqlalchemy.orm import Session
 from ..models import Submission, Analysis, Quiz, QuizQuestion, Student
 from datetime import datetime
 import json
-from .openai_client import get_client_or_none
+from .llm_gateway import LLMGateway
+from .circuit_breaker import CircuitOpenError
+from .model_router import ModelRouter, ValidationError
+from .code_condenser import condense_code
 
 class AIAnalysisService:
     def __init__(self):
-        self.openai_client = get_client_or_none()
+        self.gateway = LLMGateway()
+        self.router = ModelRouter(self.gateway)
     
-    def analyze_submission_with_ai(self, submission: Submission, db: Session) -> Analysis:
+    async def analyze_submission_with_ai(self, submission: Submission, db: Session) -> Analysis:
         """Use OpenAI to analyze code submission"""
         
-        # Get student's submission history for context
-        submission_history = self._get_submission_history(submission.student_id, db)
-        
-        # Prepare comprehensive context including history
-        analysis_context = self._prepare_analysis_context(submission, submission_history)
+        # Prepare comprehensive context including the student's submission history
+        analysis_context = self.build_analysis_context(submission, db)
         
         # Get AI analysis with historical context
-        ai_analysis = self._get_ai_analysis_with_history(analysis_context)
+        ai_analysis = await self._get_ai_analysis_with_history(analysis_context)
         
-        # Create analysis record
+        return self.save_analysis(submission, ai_analysis, db)
+    
+    def save_analysis(self, submission: Submission, ai_analysis: Dict[str, Any], db: Session,
+                      commit: bool = True) -> Analysis:
+        """Store analysis results for a submission (commit=False leaves the commit to the caller)"""
         analysis = Analysis(
             student_id=submission.student_id,
             submission_id=submission.id,
@@ -34,8 +39,9 @@ class AIAnalysisService:
         )
         
         db.add(analysis)
-        db.commit()
-        db.refresh(analysis)
+        if commit:
+            db.commit()
+            db.refresh(analysis)
         
         return analysis
     
@@ -86,9 +92,40 @@ class AIAnalysisService:
         except:
             return 0
     
-    def _get_ai_analysis_with_history(self, context: Dict[str, Any]) -> Dict[str, Any]:
+    def build_analysis_context(self, submission: Submission, db: Session) -> Dict[str, Any]:
+        """History-aware analysis context for a submission"""
+        return self._prepare_analysis_context(submission, self._get_submission_history(submission.student_id, db))
+    
+    async def _get_ai_analysis_with_history(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """Use OpenAI to analyze submission with historical context"""
         
+        request_kwargs = self.build_analysis_request(context)
+        
+        try:
+            analysis_result, tier = await self.router.complete(
+                "analysis", request_kwargs, _parse_analysis_response
+            )
+            return self.annotate_analysis(analysis_result, context, tier.model, 'openai_with_history')
+            
+        except Exception as e:
+            # Fallback to basic analysis if AI fails
+            return self._fallback_analysis_with_history(context)
+    
+    def annotate_analysis(self, analysis_result: Dict[str, Any], context: Dict[str, Any],
+                          model: str, method: str) -> Dict[str, Any]:
+        """Add the metadata stored alongside every AI analysis"""
+        analysis_result['ai_analysis_timestamp'] = datetime.utcnow().isoformat()
+        analysis_result['analysis_method'] = method
+        analysis_result['model'] = model
+        analysis_result['history_context'] = {
+            'submissions_analyzed': len(context['submission_history']) + 1,
+            'time_span_days': context['analysis_parameters']['time_span_days']
+        }
+        return analysis_result
+    
+    def build_analysis_request(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """The analysis chat request for a context, without "model"."""
+        
         current = context['current_submission']
         history = context['submission_history']
         
@@ -199,34 +236,16 @@ class AIAnalysisService:
         }}
         """
         
-        try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are an expert educational assessment system that analyzes code submission history to detect authentic learning vs tool dependency. Focus on patterns, consistency, and gradual progression over time."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=2500
-            )
-            
-            # Parse AI response
-            ai_response = response.choices[0].message.content
-            analysis_result = json.loads(ai_response)
-            
-            # Add metadata
-            analysis_result['ai_analysis_timestamp'] = datetime.utcnow().isoformat()
-            analysis_result['analysis_method'] = 'openai_gpt4_with_history'
-            analysis_result['history_context'] = {
-                'submissions_analyzed': len(history) + 1,
-                'time_span_days': context['analysis_parameters']['time_span_days']
-            }
-            
-            return analysis_result
-            
-        except Exception as e:
-            # Fallback to basic analysis if AI fails
-            return self._fallback_analysis_with_history(context)
+        request_kwargs = {
+            "messages": [
+                {"role": "system", "content": "You are an expert educational assessment system that analyzes code submission history to detect authentic learning vs tool dependency. Focus on patterns, consistency, and gradual progression over time."},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.3,
+            "max_tokens": 2500
+        }
+        
+        return request_kwargs
     
     def _fallback_analysis_with_history(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """Fallback analysis with historical context if AI fails"""
@@ -282,7 +301,7 @@ class AIAnalysisService:
             "error": "AI analysis failed"
         }
     
-    def generate_ai_quiz(self, submission: Submission, analysis: Analysis, db: Session) -> Quiz:
+    async def generate_ai_quiz(self, submission: Submission, analysis: Analysis, db: Session) -> Quiz:
         """Use OpenAI to generate personalized quiz based on historical analysis"""
         
         # Get submission history for quiz context
@@ -303,7 +322,7 @@ class AIAnalysisService:
         db.refresh(quiz)
         
         # Generate AI-powered questions with historical context
-        questions = self._generate_ai_questions_with_history(submission, analysis, submission_history)
+        questions = await self._generate_ai_questions_with_history(submission, analysis, submission_history)
         
         # Add questions to database
         for question_data in questions:
@@ -320,7 +339,7 @@ class AIAnalysisService:
         
         return quiz
     
-    def _generate_ai_questions_with_history(self, submission: Submission, analysis: Analysis, history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    async def _generate_ai_questions_with_history(self, submission: Submission, analysis: Analysis, history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Use OpenAI to generate personalized quiz questions with historical context"""
         
         analysis_results = analysis.results
@@ -335,7 +354,7 @@ class AIAnalysisService:
         - Assignment: {submission.assignment_name}
         - File Name: {submission.file_name}
         ```python
-        {submission.file_content}
+        {condense_code(submission.file_content or '')}
         ```
 
         **HISTORICAL CONTEXT (Previous Submissions):**
@@ -386,34 +405,20 @@ class AIAnalysisService:
                 print("OpenAI API key not configured, using fallback questions")
                 return self._fallback_questions_with_history(submission, history)
             
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4",
-                messages=[
+            request_kwargs = {
+                "messages": [
                     {"role": "system", "content": "You are an expert programming instructor creating a quiz to test a student's true understanding of their code. Generate questions based on the provided code and analysis. Output JSON only."},
                     {"role": "user", "content": prompt}
                 ],
-                temperature=0.6,
-                max_tokens=2500
+                "temperature": 0.6,
+                "max_tokens": 2500
+            }
+            questions, tier = await self.router.complete(
+                "history_quiz", request_kwargs, _parse_history_questions
             )
             
-            # Parse AI response
-            ai_response = response.choices[0].message.content
-            print(f"AI Response: {ai_response}")  # Debug output
-            
-            # Check if response looks like an error message
-            if ai_response.startswith("Internal") or ai_response.startswith("Error") or "error" in ai_response.lower():
-                print(f"AI returned error message: {ai_response}")
-                raise Exception(f"AI API Error: {ai_response}")
-            
-            questions = json.loads(ai_response)
-            
             return questions
             
-        except json.JSONDecodeError as e:
-            print(f"JSON Parse Error: {str(e)}")
-            print(f"Raw AI Response: {ai_response}")
-            # Fallback to basic questions
-            return self._fallback_questions_with_history(submission, history)
         except Exception as e:
             print(f"AI Generation Error: {str(e)}")  # Debug output
             # Fallback to basic questions
@@ -434,12 +439,13 @@ class AIAnalysisService:
     def _fallback_questions_with_history(self, submission: Submission, history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Fallback questions with historical context if AI generation fails"""
         
-        # Generate questions based on actual code content
-        code_lines = submission.file_content.split('\n')
+        # Generate questions based on actual code content (none if the commit couldn't be read)
+        code = submission.file_content or ''
+        code_lines = code.split('\n')
         questions = []
         
         # Question 1: About the main function/entry point
-        if 'def ' in submission.file_content:
+        if 'def ' in code:
             questions.append({
                 "question_type": "code_explanation",
                 "question_text": "What is the purpose of the main function in your code? Explain what it does when the program runs.",
@@ -452,7 +458,7 @@ class AIAnalysisService:
             })
         
         # Question 2: About input handling
-        if 'input(' in submission.file_content:
+        if 'input(' in code:
             questions.append({
                 "question_type": "code_explanation",
                 "question_text": "How does your program handle user input? What happens if a user enters invalid input?",
@@ -465,7 +471,7 @@ class AIAnalysisService:
             })
         
         # Question 3: About conditional logic
-        if 'if ' in submission.file_content or 'elif ' in submission.file_content:
+        if 'if ' in code or 'elif ' in code:
             questions.append({
                 "question_type": "code_explanation",
                 "question_text": "Explain the conditional logic in your code. What determines which operation is performed?",
@@ -478,7 +484,7 @@ class AIAnalysisService:
             })
         
         # Question 4: About error handling
-        if 'if ' in submission.file_content and '== 0' in submission.file_content:
+        if 'if ' in code and '== 0' in code:
             questions.append({
                 "question_type": "code_explanation",
                 "question_text": "What error handling did you implement in your code? Why was this necessary?",
@@ -513,6 +519,62 @@ class AIAnalysisService:
         
         return analysis 
 
+def _parse_analysis_response(response) -> Dict[str, Any]:
+    """Analysis JSON from the model; raises ValidationError if it isn't the expected object."""
+    try:
+        analysis_result = json.loads(response.choices[0].message.content)
+    except (TypeError, json.JSONDecodeError) as e:
+        raise ValidationError(f"analysis is not valid JSON: {e}")
+    if not isinstance(analysis_result, dict) or "tool_dependency" not in analysis_result:
+        raise ValidationError("analysis JSON is missing required sections")
+    return analysis_result
+
+def _parse_history_questions(response) -> List[Dict[str, Any]]:
+    """Personalized quiz questions; raises ValidationError if unusable."""
+    ai_response = response.choices[0].message.content or ""
+    print(f"AI Response: {ai_response}")  # Debug output
+    try:
+        questions = json.loads(ai_response)
+    except json.JSONDecodeError as e:
+        raise ValidationError(f"JSON Parse Error: {e}")
+    if not isinstance(questions, list) or not questions or not all(
+        isinstance(q, dict) and q.get("question_text") for q in questions
+    ):
+        raise ValidationError("expected a non-empty JSON array of questions with question_text")
+    return questions
+
+def _parse_question_list(response) -> List[Dict[str, str]]:
+    """Normalize a JSON array of {question, code_snippet, focus}; raises ValidationError otherwise."""
+    content = (response.choices[0].message.content or "").strip()
+    print(f"AI Response received: {content[:200]}...")  # Debug: show first 200 chars
+    try:
+        questions_data = json.loads(content)
+    except json.JSONDecodeError as e:
+        raise ValidationError(f"JSON parsing error: {e}")
+    if not isinstance(questions_data, list) or len(questions_data) == 0:
+        raise ValidationError("Invalid response format")
+    questions = []
+    for i, q in enumerate(questions_data[:5], 1):  # Limit to 5 questions
+        questions.append({
+            "question": q.get("question", f"Question {i}"),
+            "code_snippet": q.get("code_snippet", ""),
+            "focus": q.get("focus", "")
+        })
+    return questions
+
+def _parse_standardized_questions(response) -> List[Dict[str, str]]:
+    """Like _parse_question_list, but every item must be an object with question text."""
+    content = (response.choices[0].message.content or "").strip()
+    try:
+        questions_data = json.loads(content)
+    except json.JSONDecodeError as e:
+        raise ValidationError(f"JSON parsing error: {e}")
+    if not isinstance(questions_data, list) or not questions_data or not all(
+        isinstance(q, dict) and q.get("question") for q in questions_data
+    ):
+        raise ValidationError("expected a non-empty JSON array of questions with question")
+    return _parse_question_list(response)
+
 async def generate_quiz_questions(code_content: str, assignment_name: str) -> List[Dict[str, str]]:
     """
     Generate quiz questions using AI analysis of the code
@@ -520,7 +582,7 @@ async def generate_quiz_questions(code_content: str, assignment_name: str) -> Li
     try:
         # Try with a real API approach - mock the AI response for now until we get a real key
         api_key = os.getenv('OPENAI_API_KEY', 'sk-your-api-key-here')
-        print(f"Debug: Using API key: {api_key[:10]}...")
+        print(f"Debug: API key configured: {api_key != 'sk-your-api-key-here'}")
         
         # For now, create intelligent questions based on code analysis instead of failing
         if api_key == 'sk-your-api-key-here':
@@ -528,8 +590,8 @@ async def generate_quiz_questions(code_content: str, assignment_name: str) -> Li
             return create_intelligent_questions(code_content, assignment_name)
         
         # Only create client if we have a real API key
-        client = get_client_or_none()
-        if not client:
+        client = LLMGateway()
+        if not client.available:
             print("Debug: No OpenAI client available, using intelligent questions...")
             return create_intelligent_questions(code_content, assignment_name)
         
@@ -540,7 +602,7 @@ You are an expert programming instructor creating quiz questions to verify that
 Analyze the provided code samples to understand what this {assignment_name} assignment involves, then create 5 STANDARDIZED questions that can test ANY student's comprehension of their own {assignment_name} implementation.
 
 CODE SAMPLES TO ANALYZE:
-{code_content}
+{condense_code(code_content)}
 
 CRITICAL REQUIREMENTS:
 1. Create questions that work for ANY student's implementation of this {assignment_name} assignment
@@ -576,44 +638,29 @@ CREATE: Questions any student with this assignment can answer regardless of thei
 """
 
         print("Debug: Making AI request...")
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are an expert programming instructor who creates precise, code-specific quiz questions."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3,
-            max_tokens=1500
-        )
-        print("Debug: AI request completed successfully")
-
-        content = response.choices[0].message.content.strip()
-        print(f"AI Response received: {content[:200]}...")  # Debug: show first 200 chars
-        
-        # Handle potential error messages in response
-        if "error" in content.lower() or "invalid" in content.lower():
-            print(f"AI Generation Error: {content}")
-            return generate_fallback_questions(code_content, assignment_name)
-        
-        # Try to parse JSON response
+        router = ModelRouter(client)
         try:
-            questions_data = json.loads(content)
-            if isinstance(questions_data, list) and len(questions_data) > 0:
-                questions = []
-                for i, q in enumerate(questions_data[:5], 1):  # Limit to 5 questions
-                    questions.append({
-                        "question": q.get("question", f"Question {i}"),
-                        "code_snippet": q.get("code_snippet", ""),
-                        "focus": q.get("focus", "")
-                    })
-                return questions
-            else:
-                raise ValueError("Invalid response format")
-        except (json.JSONDecodeError, ValueError) as e:
-            print(f"JSON parsing error: {e}")
-            print(f"Raw response: {content}")
+            questions, tier = await router.complete(
+                "standardized_quiz",
+                {
+                    "messages": [
+                        {"role": "system", "content": "You are an expert programming instructor who creates precise, code-specific quiz questions."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    "temperature": 0.3,
+                    "max_tokens": 1500
+                },
+                _parse_standardized_questions
+            )
+        except ValidationError as e:
+            print(f"AI Generation Error: {e}")
             return generate_fallback_questions(code_content, assignment_name)
+        print(f"Debug: AI request completed successfully ({tier.model})")
+        return questions
             
+    except CircuitOpenError as e:
+        print(f"Debug: {e}, using intelligent questions...")
+        return create_intelligent_questions(code_content, assignment_name)
     except Exception as e:
         print(f"AI Generation Error: {e}")
         print("Falling back to AI-generated questions with default API key...")
@@ -628,7 +675,7 @@ CREATE: Questions any student with this assignment can answer regardless of thei
             simple_prompt = f"""
 Generate 5 specific quiz questions about this {assignment_name} code:
 
-{code_content}
+{condense_code(code_content)}
 
 Focus on:
 1. Specific functions and their implementation
@@ -640,31 +687,20 @@ Focus on:
 Return as JSON array with: question, code_snippet, focus
 """
             
-            response = client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are a programming instructor. Generate specific quiz questions about the provided code."},
-                    {"role": "user", "content": simple_prompt}
-                ],
-                temperature=0.1,
-                max_tokens=1000
+            questions, tier = await ModelRouter(client).complete(
+                "standardized_quiz",
+                {
+                    "messages": [
+                        {"role": "system", "content": "You are a programming instructor. Generate specific quiz questions about the provided code."},
+                        {"role": "user", "content": simple_prompt}
+                    ],
+                    "temperature": 0.1,
+                    "max_tokens": 1000
+                },
+                _parse_question_list
             )
-            
-            content = response.choices[0].message.content.strip()
-            print(f"Retry AI Response: {content[:200]}...")
-            
-            questions_data = json.loads(content)
-            if isinstance(questions_data, list) and len(questions_data) > 0:
-                questions = []
-                for i, q in enumerate(questions_data[:5], 1):
-                    questions.append({
-                        "question": q.get("question", f"Question {i}"),
-                        "code_snippet": q.get("code_snippet", ""),
-                        "focus": q.get("focus", "")
-                    })
-                return questions
-            else:
-                raise ValueError("Invalid retry response format")
+            print(f"Retry AI Response from {tier.model}: {len(questions)} questions")
+            return questions
                 
         except Exception as retry_error:
             print(f"Retry also failed: {retry_error}")
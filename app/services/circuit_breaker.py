@@ -0,0 +1,138 @@
+import os
+import time
+import threading
+from collections import deque
+from typing import Dict, Any, Optional
+from .llm_metrics import percentile
+
+# Breaker configuration from environment
+LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5"))
+LLM_BREAKER_P95_LATENCY = float(os.getenv("LLM_BREAKER_P95_LATENCY", "45"))  # seconds, 0 disables
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "60"))
+LLM_BREAKER_WINDOW = int(os.getenv("LLM_BREAKER_WINDOW", "20"))
+LLM_BREAKER_MIN_SAMPLES = 5
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the LLM while the breaker is open."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure and p95-latency circuit breaker.
+
+    closed    -> calls go through; opens after failure_threshold consecutive
+                 failures or when p95 latency of recent calls exceeds the limit
+    open      -> calls are refused until cooldown seconds have passed
+    half_open -> a single probe call is let through; success closes the
+                 breaker, failure re-opens it for another cooldown
+    """
+
+    def __init__(self, name: str, failure_threshold: int = LLM_BREAKER_FAILURE_THRESHOLD,
+                 p95_latency: float = LLM_BREAKER_P95_LATENCY, cooldown: float = LLM_BREAKER_COOLDOWN,
+                 window: int = LLM_BREAKER_WINDOW):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.p95_latency = p95_latency
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._open_reason: Optional[str] = None
+        self._probe_in_flight = False
+        self._times_opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def allow_request(self) -> bool:
+        """True if a call may go to the LLM now (claims the probe when half-open)."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self, latency: float) -> None:
+        with self._lock:
+            self._consecutive_failures = 0
+            if self._state == HALF_OPEN:
+                self._probe_in_flight = False
+                self._latencies.clear()
+                self._close()
+                return
+            self._latencies.append(latency)
+            p95 = percentile(list(self._latencies), 95)
+            if (self.p95_latency and len(self._latencies) >= LLM_BREAKER_MIN_SAMPLES
+                    and p95 > self.p95_latency):
+                self._open(f"p95 latency {p95:.1f}s over {self.p95_latency:.0f}s")
+
+    def record_failure(self, reason: str = "") -> None:
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._state == HALF_OPEN:
+                self._probe_in_flight = False
+                self._open(f"probe failed: {reason}")
+            elif self._consecutive_failures >= self.failure_threshold:
+                self._open(f"{self._consecutive_failures} consecutive failures: {reason}")
+
+    def release_probe(self) -> None:
+        """Give back an unused half-open probe (e.g. the call was never made)."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self._latencies.clear()
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+            self._close()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._maybe_half_open()
+            return {
+                "name": self.name,
+                "state": self._state,
+                "consecutive_failures": self._consecutive_failures,
+                "recent_p95_latency": percentile(list(self._latencies), 95),
+                "open_reason": self._open_reason,
+                "opened_at": self._opened_at,
+                "retry_in": max(0.0, round(self._opened_at + self.cooldown - time.time(), 1))
+                if self._state == OPEN else None,
+                "times_opened": self._times_opened
+            }
+
+    def _open(self, reason: str) -> None:
+        self._state = OPEN
+        self._opened_at = time.time()
+        self._open_reason = reason
+        self._times_opened += 1
+        print(f"⚠️ Circuit '{self.name}' opened: {reason}")
+
+    def _close(self) -> None:
+        if self._state != CLOSED:
+            print(f"✅ Circuit '{self.name}' closed")
+        self._state = CLOSED
+        self._opened_at = None
+        self._open_reason = None
+
+    def _maybe_half_open(self) -> None:
+        if self._state == OPEN and time.time() - self._opened_at >= self.cooldown:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+
+
+# One breaker per process guards every LLM call made through the gateway
+llm_circuit_breaker = CircuitBreaker("openai")
@@ -0,0 +1,201 @@
+import os
+import ast
+import math
+from typing import List, Optional
+
+# Optional exact tokenizer; fall back to a character heuristic when missing
+try:
+    import tiktoken as _tiktoken
+    _ENCODING = _tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _ENCODING = None
+
+# Default token budget for student code embedded in a prompt
+CODE_TOKEN_BUDGET = int(os.getenv("CODE_TOKEN_BUDGET", "3000"))
+
+_CONTROL_FLOW_NODES = (ast.If, ast.For, ast.AsyncFor, ast.While, ast.Try, ast.With, ast.AsyncWith)
+_CONTROL_FLOW_PREFIXES = (
+    "if ", "if(", "elif ", "else:", "for ", "async for ", "while ", "try:", "except", "finally:",
+    "with ", "async with ", "return", "raise", "yield", "break", "continue", "match ", "case "
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count for text (tiktoken if installed, else ~4 characters per token)."""
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return math.ceil(len(text) / 4)
+
+
+class _Unit:
+    """A function, method or top-level compound statement that can be condensed."""
+
+    def __init__(self, node: ast.stmt, lines: List[str]):
+        body = node.body
+        self.signature_end = body[0].lineno - 1  # header without docstring
+        # Keep the docstring with the header
+        if (isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and body
+                and isinstance(body[0], ast.Expr) and isinstance(getattr(body[0], "value", None), ast.Constant)
+                and isinstance(body[0].value.value, str) and len(body) > 1):
+            body = body[1:]
+        self.start = node.lineno - 1          # header first line (0-based)
+        self.body_start = body[0].lineno - 1  # first body line kept/elided
+        self.end = node.end_lineno            # exclusive
+        first = lines[self.body_start] if self.body_start < len(lines) else ""
+        self.indent = first[:len(first) - len(first.lstrip())]
+        self.level = 0
+        self.score = self._score(node)
+
+    @staticmethod
+    def _score(node: ast.stmt) -> float:
+        control_flow = calls = 0
+        names = set()
+        for child in ast.walk(node):
+            if isinstance(child, _CONTROL_FLOW_NODES):
+                control_flow += 1
+            elif isinstance(child, ast.Call):
+                calls += 1
+            elif isinstance(child, ast.Name):
+                names.add(child.id)
+        statements = sum(isinstance(child, ast.stmt) for child in ast.walk(node)) - 1
+        if statements <= 2 and control_flow == 0:
+            return 0.0  # Trivial body: expanded last
+        return control_flow * 3 + calls + len(names)
+
+    def render(self, lines: List[str]) -> List[str]:
+        header = lines[self.start:self.body_start]
+        body = lines[self.body_start:self.end]
+        if self.level < 0:
+            elided = self.end - self.signature_end
+            return lines[self.start:self.signature_end] + [f"{self.indent}...  # {elided} lines elided"]
+        if self.level >= 2 or len(body) <= 1:
+            return header + body
+        if self.level == 1:
+            flow = [line for line in body if line.strip().startswith(_CONTROL_FLOW_PREFIXES)]
+            if len(flow) < len(body):
+                marker = f"{self.indent}# ... {len(body) - len(flow)} lines elided, control flow shown"
+                return header + [marker] + flow
+            return header + body
+        return header + [f"{self.indent}...  # {len(body)} lines elided"]
+
+
+def _collect_units(tree: ast.Module, lines: List[str]) -> List[_Unit]:
+    candidates = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) or isinstance(node, _CONTROL_FLOW_NODES):
+            candidates.append(node)
+        elif isinstance(node, ast.ClassDef):
+            candidates.extend(
+                child for child in node.body if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef))
+            )
+    units = [_Unit(node, lines) for node in candidates]
+    # One-liners like "if x: y()" have no separate body to elide
+    return [unit for unit in units if unit.body_start > unit.start]
+
+
+def _render(lines: List[str], units: List[_Unit]) -> str:
+    output = []
+    position = 0
+    for unit in units:
+        output.extend(lines[position:unit.start])
+        output.extend(unit.render(lines))
+        position = unit.end
+    output.extend(lines[position:])
+    return "\n".join(output)
+
+
+def _truncate_lines(code: str, max_tokens: int) -> str:
+    """Head-and-tail fallback for code that isn't valid Python or has no structure to exploit."""
+    lines = code.split("\n")
+    head: List[str] = []
+    tail: List[str] = []
+    budget = max_tokens - 20  # Room for the marker
+    i, j = 0, len(lines) - 1
+    while i <= j:
+        line = lines[i]
+        if estimate_tokens(line) + 1 > budget:
+            break
+        head.append(line)
+        budget -= estimate_tokens(line) + 1
+        i += 1
+        # Give the tail one line for every three from the head
+        if i % 3 == 0 and i <= j:
+            line = lines[j]
+            if estimate_tokens(line) + 1 > budget:
+                break
+            tail.insert(0, line)
+            budget -= estimate_tokens(line) + 1
+            j -= 1
+    if i > j:
+        return code
+    return "\n".join(head + [f"# ... {j - i + 1} lines omitted ..."] + tail)
+
+
+def condense_code(code: str, max_tokens: Optional[int] = None) -> str:
+    """Return a view of code that fits in max_tokens (default CODE_TOKEN_BUDGET).
+
+    Code that already fits is returned unchanged. Otherwise every function,
+    method and top-level block starts as a bare signature; blocks are then
+    expanded to their control-flow lines and finally to full bodies, most
+    informative first, while the budget allows. Trivial bodies (a couple
+    of statements, no branching) are expanded last. Module-level imports,
+    assignments and class headers are always kept, so the model sees the
+    whole structure of the file.
+    """
+    max_tokens = max_tokens or CODE_TOKEN_BUDGET
+    if estimate_tokens(code) <= max_tokens:
+        return code
+
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return _truncate_lines(code, max_tokens)
+
+    lines = code.split("\n")
+    units = _collect_units(tree, lines)
+    if not units:
+        return _truncate_lines(code, max_tokens)
+
+    # Start from bare signatures; drop docstrings too if even that is too big
+    condensed = _render(lines, units)
+    if estimate_tokens(condensed) > max_tokens:
+        for unit in units:
+            unit.level = -1
+        condensed = _render(lines, units)
+        if estimate_tokens(condensed) > max_tokens:
+            return _truncate_lines(condensed, max_tokens)
+
+    by_score = sorted(units, key=lambda unit: unit.score, reverse=True)
+    for level in (0, 1, 2):
+        for unit in by_score:
+            previous = unit.level
+            if previous >= level:
+                continue
+            unit.level = level
+            candidate = _render(lines, units)
+            if estimate_tokens(candidate) <= max_tokens:
+                condensed = candidate
+            else:
+                unit.level = previous
+    return condensed
+
+
+def condense_code_samples(samples: List[Optional[str]], max_tokens: Optional[int] = None,
+                          separator: str = "\n\n") -> str:
+    """Condense several files so that together they fit in max_tokens.
+
+    The budget is split evenly; budget left over by short files is passed on
+    to the longer ones. Missing content (a push whose files have not been
+    fetched yet) counts as empty.
+    """
+    max_tokens = max_tokens or CODE_TOKEN_BUDGET
+    samples = [sample or "" for sample in samples]
+    remaining = max_tokens
+    condensed = [""] * len(samples)
+    # Shortest first so their unused share flows to the larger files
+    order = sorted(range(len(samples)), key=lambda i: len(samples[i]))
+    for position, index in enumerate(order):
+        share = max(1, remaining // (len(samples) - position))
+        condensed[index] = condense_code(samples[index], share)
+        remaining -= estimate_tokens(condensed[index])
+    return separator.join(condensed)
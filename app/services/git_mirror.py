@@ -0,0 +1,207 @@
+import os
+import re
+import base64
+import threading
+import subprocess
+from typing import Dict, List, NamedTuple, Optional
+
+# Local bare clones used to compute commit diffs without the GitHub API
+GIT_MIRROR_ENABLED = os.getenv("GIT_MIRROR_ENABLED", "true").lower() in ("1", "true", "yes")
+GIT_MIRROR_DIR = os.getenv("GIT_MIRROR_DIR", "./git_mirrors")
+# Where to fetch a repository from; {repo} is the full name, e.g. "class/calculator".
+# Point it at a local directory (e.g. "/srv/repos/{repo}") to run against local repositories.
+GIT_MIRROR_REMOTE = os.getenv("GIT_MIRROR_REMOTE", "https://github.com/{repo}.git")
+GIT_MIRROR_TIMEOUT = int(os.getenv("GIT_MIRROR_TIMEOUT", "120"))  # seconds per git command
+GIT_MIRROR_MAX_DIFF_CHARS = int(os.getenv("GIT_MIRROR_MAX_DIFF_CHARS", str(200 * 1024)))  # stored diff per commit
+
+_REPO_NAME = re.compile(r"^[A-Za-z0-9_.-]+/[A-Za-z0-9_.-]+$")
+
+
+class GitMirrorError(RuntimeError):
+    """A git command failed or the commit could not be found in the mirror."""
+
+
+class FileDiff(NamedTuple):
+    path: str
+    status: str  # A, M, D or T (git name-status letters)
+    lines_added: int  # 0 for binary files
+    lines_deleted: int
+    binary: bool
+    patch: str
+    content: Optional[str]  # File content at the commit; None when deleted or binary
+
+
+class CommitDiff(NamedTuple):
+    sha: str
+    files: List[FileDiff]
+
+    @property
+    def lines_added(self) -> int:
+        return sum(f.lines_added for f in self.files)
+
+    @property
+    def lines_deleted(self) -> int:
+        return sum(f.lines_deleted for f in self.files)
+
+
+class GitMirror:
+    """Keeps one bare clone per repository and reads commits from it.
+
+    The first push for a repository clones it; later pushes fetch only the
+    new objects, and commits already in the mirror need no network at all.
+    Diffs, line stats and file contents are computed locally with git, so
+    a push costs at most one fetch instead of one API call per commit.
+    """
+
+    def __init__(self, root: str = GIT_MIRROR_DIR, remote_template: str = GIT_MIRROR_REMOTE,
+                 token: Optional[str] = None):
+        self.root = root
+        self.remote_template = remote_template
+        self.token = token if token is not None else os.getenv("GITHUB_TOKEN")
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    def path_for(self, repo: str) -> str:
+        if not _REPO_NAME.match(repo) or ".." in repo:
+            raise GitMirrorError(f"Invalid repository name '{repo}'")
+        return os.path.join(self.root, repo.replace("/", "__") + ".git")
+
+    def fetch(self, repo: str) -> None:
+        """Create the mirror if needed and fetch every branch (incremental after the first time)."""
+        path = self.path_for(repo)
+        with self._lock_for(repo):
+            if not os.path.isdir(path):
+                os.makedirs(self.root, exist_ok=True)
+                self._git(None, "init", "--bare", "--quiet", path)
+            remote = self.remote_template.format(repo=repo)
+            config = []
+            if self.token and remote.startswith("https://"):
+                credentials = base64.b64encode(f"x-access-token:{self.token}".encode()).decode()
+                config = ["-c", f"http.extraHeader=Authorization: Basic {credentials}"]
+            self._git(path, *config, "fetch", "--quiet", "--prune", "--no-tags", remote, "+refs/heads/*:refs/heads/*")
+
+    def has_commit(self, repo: str, sha: str) -> bool:
+        path = self.path_for(repo)
+        if not os.path.isdir(path):
+            return False
+        try:
+            self._git(path, "cat-file", "-e", f"{sha}^{{commit}}")
+            return True
+        except GitMirrorError:
+            return False
+
+    def commit_diff(self, repo: str, sha: str) -> CommitDiff:
+        """Per-file diff, line stats and contents of one commit, fetching first if it's new."""
+        if not re.fullmatch(r"[0-9a-fA-F]{4,64}", sha):
+            raise GitMirrorError(f"Invalid commit SHA '{sha}'")
+        if not self.has_commit(repo, sha):
+            self.fetch(repo)
+            if not self.has_commit(repo, sha):
+                raise GitMirrorError(f"Commit {sha} not found in {repo}")
+        path = self.path_for(repo)
+
+        # Compare against the first parent (merges included); root commits against the empty tree
+        parents = self._git(path, "rev-list", "--parents", "-n", "1", sha).split()[1:]
+        trees = [parents[0], sha] if parents else ["--root", sha]
+        diff_args = ["diff-tree", "-r", "--no-commit-id", "--no-renames"]
+
+        statuses = self._git(path, *diff_args, "--name-status", "-z", *trees).split("\0")
+        numstats = self._git(path, *diff_args, "--numstat", "-z", *trees).split("\0")
+        patches = self._split_patch(self._git(path, *diff_args, "-p", *trees))
+
+        files = []
+        for (status, file_path), numstat in zip(zip(statuses[0::2], statuses[1::2]), numstats):
+            added, deleted, _ = numstat.split("\t", 2)
+            binary = added == "-"
+            files.append(FileDiff(
+                path=file_path,
+                status=status,
+                lines_added=0 if binary else int(added),
+                lines_deleted=0 if binary else int(deleted),
+                binary=binary,
+                patch=patches.get(file_path, ""),
+                content=None
+            ))
+
+        contents = self._read_blobs(path, sha, [f.path for f in files if f.status != "D" and not f.binary])
+        return CommitDiff(sha=sha, files=[f._replace(content=contents.get(f.path)) for f in files])
+
+    def _split_patch(self, patch: str) -> Dict[str, str]:
+        """Split `git diff-tree -p` output into one patch per path (paths are a/ b/ prefixed)."""
+        patches = {}
+        for chunk in re.split(r"(?m)^(?=diff --git )", patch):
+            header = chunk.split("\n", 1)[0]
+            match = re.match(r"diff --git a/(.*) b/(.*)$", header)
+            if match:
+                patches[match.group(2)] = chunk
+        return patches
+
+    def _read_blobs(self, path: str, sha: str, file_paths: List[str]) -> Dict[str, str]:
+        """File contents at a commit, all read by one `git cat-file --batch` process."""
+        if not file_paths:
+            return {}
+        request = "".join(f"{sha}:{file_path}\n" for file_path in file_paths).encode("utf-8")
+        output = self._run(["git", "cat-file", "--batch"], path, request)
+        contents = {}
+        offset = 0
+        for file_path in file_paths:
+            header_end = output.index(b"\n", offset)
+            header = output[offset:header_end].split()
+            offset = header_end + 1
+            if len(header) < 3:
+                continue  # "<object> missing"
+            size = int(header[2])
+            if header[1] == b"blob":  # Submodules come back as commits
+                contents[file_path] = output[offset:offset + size].decode("utf-8", errors="replace")
+            offset += size + 1
+        return contents
+
+    def _lock_for(self, repo: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(repo, threading.Lock())
+
+    def _git(self, path: Optional[str], *args: str) -> str:
+        return self._run(["git", *args], path).decode("utf-8", errors="replace")
+
+    def _run(self, command: List[str], path: Optional[str], stdin: Optional[bytes] = None) -> bytes:
+        if path is not None:
+            command = [command[0], "--git-dir", path, *command[1:]]
+        try:
+            completed = subprocess.run(
+                command, input=stdin, capture_output=True, timeout=GIT_MIRROR_TIMEOUT,
+                env={**os.environ, "GIT_TERMINAL_PROMPT": "0"}
+            )
+        except subprocess.TimeoutExpired:
+            raise GitMirrorError(f"{' '.join(command[:6])} timed out after {GIT_MIRROR_TIMEOUT}s")
+        if completed.returncode != 0:
+            raise GitMirrorError(completed.stderr.decode("utf-8", errors="replace").strip() or "git failed")
+        return completed.stdout
+
+
+def apply_commit_diff(submission, diff: CommitDiff) -> None:
+    """Fill a push submission's code, diff and line stats from its commit"""
+    sources = [f for f in diff.files if f.content is not None]
+    if len(sources) == 1:
+        submission.file_name = sources[0].path
+        submission.file_content = sources[0].content
+    elif sources:
+        submission.file_content = "\n\n".join(f"# File: {f.path}\n{f.content}" for f in sources)
+    else:
+        submission.file_content = ""
+    submission.file_size = len(submission.file_content.encode("utf-8"))
+    submission.lines_added = diff.lines_added
+    submission.lines_deleted = diff.lines_deleted
+    submission.diff_content = "".join(f.patch for f in diff.files)[:GIT_MIRROR_MAX_DIFF_CHARS]
+
+
+_mirror: Optional[GitMirror] = None
+_mirror_lock = threading.Lock()
+
+
+def get_git_mirror() -> GitMirror:
+    """Return the process-wide git mirror."""
+    global _mirror
+    with _mirror_lock:
+        if _mirror is None:
+            _mirror = GitMirror()
+        return _mirror
@@ -0,0 +1,239 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import quote, urlencode
+import httpx
+from .git_mirror import CommitDiff, FileDiff
+
+# GitHub REST API client configuration from environment
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+GITHUB_API_TIMEOUT = float(os.getenv("GITHUB_API_TIMEOUT", "30"))
+GITHUB_CACHE_PATH = os.getenv("GITHUB_CACHE_PATH", "./github_cache.db")
+GITHUB_CACHE_MAX_ENTRIES = int(os.getenv("GITHUB_CACHE_MAX_ENTRIES", "2000"))
+GITHUB_CACHE_MAX_BYTES = int(os.getenv("GITHUB_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+# Commit API file status -> git name-status letter
+_FILE_STATUS = {"added": "A", "removed": "D", "modified": "M", "renamed": "M", "copied": "A", "changed": "T"}
+
+
+class GitHubAPIError(RuntimeError):
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"GitHub API {status_code}: {message}")
+        self.status_code = status_code
+
+
+class GitHubResponseCache:
+    """SQLite-backed store of GitHub responses with their validators.
+
+    Entries never go stale on their own: every read is revalidated with
+    If-None-Match / If-Modified-Since, and a 304 (which GitHub does not
+    count against the rate limit) serves the stored body. Size is bounded
+    by entry count and bytes, evicting the least recently used.
+    """
+
+    def __init__(self, path: str = GITHUB_CACHE_PATH, max_entries: int = GITHUB_CACHE_MAX_ENTRIES,
+                 max_bytes: int = GITHUB_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS github_responses (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_github_responses_last_access ON github_responses (last_access)")
+        self._conn.commit()
+
+    def get(self, url: str) -> Optional[Tuple[Optional[str], Optional[str], str]]:
+        """(etag, last_modified, body) stored for url, or None."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT etag, last_modified, body FROM github_responses WHERE url = ?", (url,)
+            ).fetchone()
+
+    def set(self, url: str, etag: Optional[str], last_modified: Optional[str], body: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO github_responses (url, etag, last_modified, body, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, body, len(body), now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def touch(self, url: str) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE github_responses SET last_access = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, total_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM github_responses"
+            ).fetchone()
+        return {"entries": entries, "total_bytes": total_bytes,
+                "max_entries": self.max_entries, "max_bytes": self.max_bytes}
+
+    def _evict(self) -> None:
+        entries, total_bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM github_responses"
+        ).fetchone()
+        if entries <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+        stale = []
+        for url, size in self._conn.execute(
+            "SELECT url, size FROM github_responses ORDER BY last_access"
+        ).fetchall():
+            if entries <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            stale.append((url,))
+            entries -= 1
+            total_bytes -= size
+        self._conn.executemany("DELETE FROM github_responses WHERE url = ?", stale)
+
+
+class GitHubAPIClient:
+    """Shared GitHub REST client that revalidates cached responses.
+
+    Every GET sends the stored ETag / Last-Modified, so an unchanged
+    resource comes back as a 304 that costs no rate limit. The rate-limit
+    headers of every response are kept for /admin/github-metrics.
+    """
+
+    def __init__(self, base_url: str = GITHUB_API_URL, token: Optional[str] = None,
+                 cache: Optional[GitHubResponseCache] = None, transport: Optional[httpx.BaseTransport] = None):
+        token = token if token is not None else os.getenv("GITHUB_TOKEN")
+        headers = {"Accept": "application/vnd.github+json", "X-GitHub-Api-Version": "2022-11-28",
+                   "User-Agent": "codecheck"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        self.cache = cache if cache is not None else GitHubResponseCache()
+        self._client = httpx.Client(base_url=base_url, headers=headers, timeout=GITHUB_API_TIMEOUT, transport=transport)
+        self._lock = threading.Lock()
+        self._counters = {"requests": 0, "conditional": 0, "not_modified": 0, "errors": 0}
+        self._rate_limit: Dict[str, Any] = {}
+
+    def get_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        return json.loads(self.get_text(path, params))
+
+    def get_text(self, path: str, params: Optional[Dict[str, Any]] = None, accept: Optional[str] = None) -> str:
+        """GET path, revalidating any cached copy; returns the response body."""
+        url = path + ("?" + urlencode(sorted(params.items())) if params else "")
+        cache_key = f"{accept or ''} {url}"
+        cached = self.cache.get(cache_key)
+        headers = {"Accept": accept} if accept else {}
+        if cached:
+            etag, last_modified, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        try:
+            response = self._client.get(url, headers=headers)
+        except httpx.HTTPError:
+            self._count("errors")
+            raise
+        self._record(response, conditional=bool(cached))
+
+        if response.status_code == 304 and cached:
+            self.cache.touch(cache_key)
+            return cached[2]
+        if response.status_code >= 400:
+            self._count("errors")
+            try:
+                message = response.json().get("message", response.text)
+            except ValueError:
+                message = response.text
+            raise GitHubAPIError(response.status_code, message)
+
+        etag = response.headers.get("etag")
+        last_modified = response.headers.get("last-modified")
+        if etag or last_modified:
+            self.cache.set(cache_key, etag, last_modified, response.text)
+        return response.text
+
+    def get_repository(self, full_name: str) -> Dict[str, Any]:
+        return self.get_json(f"/repos/{full_name}")
+
+    def get_commit(self, full_name: str, sha: str) -> Dict[str, Any]:
+        return self.get_json(f"/repos/{full_name}/commits/{sha}")
+
+    def commit_diff(self, full_name: str, sha: str) -> CommitDiff:
+        """Same shape as GitMirror.commit_diff, from the commits and contents API."""
+        files = []
+        for entry in self.get_commit(full_name, sha).get("files", []):
+            status = _FILE_STATUS.get(entry.get("status"), "M")
+            binary = "patch" not in entry and status != "D"
+            content = None
+            if status != "D" and not binary:
+                content = self.get_text(f"/repos/{full_name}/contents/{quote(entry['filename'])}",
+                                        {"ref": sha}, accept="application/vnd.github.raw")
+            files.append(FileDiff(
+                path=entry["filename"],
+                status=status,
+                lines_added=entry.get("additions", 0),
+                lines_deleted=entry.get("deletions", 0),
+                binary=binary,
+                patch=f"diff --git a/{entry['filename']} b/{entry['filename']}\n{entry.get('patch', '')}\n",
+                content=content
+            ))
+        return CommitDiff(sha=sha, files=files)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            rate_limit = dict(self._rate_limit)
+        conditional = counters["conditional"]
+        return {
+            **counters,
+            "not_modified_rate": round(counters["not_modified"] / conditional, 3) if conditional else 0.0,
+            "rate_limit": rate_limit,
+            "cache": self.cache.stats()
+        }
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def _record(self, response: httpx.Response, conditional: bool) -> None:
+        headers = response.headers
+        with self._lock:
+            self._counters["requests"] += 1
+            if conditional:
+                self._counters["conditional"] += 1
+            if response.status_code == 304:
+                self._counters["not_modified"] += 1
+            if "x-ratelimit-remaining" in headers:
+                self._rate_limit = {
+                    "limit": int(headers.get("x-ratelimit-limit", 0)),
+                    "remaining": int(headers["x-ratelimit-remaining"]),
+                    "used": int(headers.get("x-ratelimit-used", 0)),
+                    "reset": int(headers.get("x-ratelimit-reset", 0)),
+                    "resource": headers.get("x-ratelimit-resource")
+                }
+
+
+_client: Optional[GitHubAPIClient] = None
+_client_lock = threading.Lock()
+
+
+def get_github_client() -> GitHubAPIClient:
+    """Return the process-wide GitHub API client (one connection pool and cache per process)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = GitHubAPIClient()
+        return _client
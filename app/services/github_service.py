@@ -1,12 +1,12 @@
 import os
 import hmac
 import hashlib
-from typing import Dict, Any, Optional
-from github import Github
-from github.Repository import Repository
-from github.Commit import Commit
+from typing import Dict, Any, List, Optional, Set, Tuple
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from ..models import Student, Submission
+from .github_api import get_github_client
 from datetime import datetime
 import json
 
@@ -14,7 +14,8 @@ class GitHubService:
     def __init__(self):
         self.github_token = os.getenv("GITHUB_TOKEN")
         self.webhook_secret = os.getenv("GITHUB_WEBHOOK_SECRET")
-        self.github = Github(self.github_token) if self.github_token else None
+        # One client per process, so its connection pool and ETag cache outlive each webhook
+        self.api = get_github_client()
     
     def verify_webhook_signature(self, payload: bytes, signature: str) -> bool:
         """Verify GitHub webhook signature"""
@@ -33,27 +34,20 @@ class GitHubService:
         """Process GitHub push event and store commit data"""
         try:
             # Extract commit information
-            commits = payload.get('commits', [])
+            commits = [commit for commit in payload.get('commits', []) if commit.get('id')]
             repository = payload.get('repository', {})
             ref = payload.get('ref', '')
             
-            results = []
-            
-            for commit_data in commits:
-                # Find or create student
-                student = self._get_or_create_student(commit_data, db)
-                
-                # Create submission record
-                submission = self._create_submission(
-                    student, commit_data, repository, ref, db
-                )
-                
-                results.append({
-                    'student_id': student.id,
-                    'submission_id': submission.id,
+            submission_ids = self.ingest_commits(commits, repository, ref, db)
+            results = [
+                {
+                    'student_id': student_id,
+                    'submission_id': submission_id,
                     'commit_sha': commit_data['id'],
                     'status': 'processed'
-                })
+                }
+                for commit_data, (submission_id, student_id) in zip(commits, submission_ids)
+            ]
             
             return {
                 'success': True,
@@ -62,72 +56,101 @@ class GitHubService:
             }
             
         except Exception as e:
+            db.rollback()
             return {
                 'success': False,
                 'error': str(e)
             }
     
-    def _get_or_create_student(self, commit_data: Dict[str, Any], db: Session) -> Student:
-        """Get or create student based on commit author"""
-        author = commit_data.get('author', {})
-        github_username = author.get('username', 'unknown')
-        email = author.get('email', '')
-        name = author.get('name', github_username)
+    def ingest_commits(self, commits: List[Dict[str, Any]], repository: Dict[str, Any],
+                       ref: str, db: Session) -> List[Tuple[int, int]]:
+        """Store a push's commits as submissions in one transaction.
+
+        All authors are resolved with one query, unknown authors are added as
+        unapproved students, and the submissions go in with one bulk INSERT,
+        so the cost of a push barely grows with its commit count. Returns
+        (submission id, student id) per commit, in order.
+        """
+        if not commits:
+            return []
         
-        # Try to find existing student
-        student = db.query(Student).filter(
-            Student.github_username == github_username
-        ).first()
+        students = self._get_or_create_students({self._author_username(c) for c in commits}, commits, db)
         
-        if not student:
-            # Create new student
-            student = Student(
-                github_username=github_username,
-                email=email,
-                name=name,
-                class_id='default'  # Will be updated when teacher assigns
-            )
-            db.add(student)
-            db.commit()
-            db.refresh(student)
+        rows = [
+            self._submission_row(students[self._author_username(commit_data)], commit_data, repository, ref)
+            for commit_data in commits
+        ]
+        # One multi-row INSERT; RETURNING order isn't guaranteed, so map the ids back by SHA
+        submission_ids = dict(
+            (sha, submission_id) for submission_id, sha in
+            db.execute(insert(Submission).returning(Submission.id, Submission.commit_sha), rows)
+        )
+        db.commit()
         
-        return student
+        return [(submission_ids[row['commit_sha']], row['student_id']) for row in rows]
     
-    def _create_submission(self, student: Student, commit_data: Dict[str, Any], 
-                          repository: Dict[str, Any], ref: str, db: Session) -> Submission:
-        """Create submission record from commit data"""
-        
-        # Calculate basic metrics
-        files_changed = []
-        lines_added = 0
-        lines_deleted = 0
-        
-        for file_change in commit_data.get('modified', []):
-            files_changed.append(file_change)
-        
-        for file_change in commit_data.get('added', []):
-            files_changed.append(file_change)
+    def _author_username(self, commit_data: Dict[str, Any]) -> str:
+        author = commit_data.get('author') or {}
+        return author.get('username') or author.get('email') or 'unknown'
+    
+    def _get_or_create_students(self, usernames: Set[str], commits: List[Dict[str, Any]],
+                                db: Session) -> Dict[str, int]:
+        """Map commit author usernames to student ids, adding students for new authors"""
+        students = dict(db.query(Student.github_username, Student.id).filter(
+            Student.github_username.in_(usernames)
+        ).all())
         
-        # Create submission
-        submission = Submission(
-            student_id=student.id,
-            github_repo=repository.get('full_name', ''),
-            commit_sha=commit_data['id'],
-            commit_message=commit_data.get('message', ''),
-            commit_date=datetime.fromisoformat(commit_data['timestamp'].replace('Z', '+00:00')),
-            files_changed=files_changed,
-            lines_added=lines_added,
-            lines_deleted=lines_deleted,
-            diff_content=commit_data.get('url', ''),  # We'll fetch actual diff later
-            branch=ref.replace('refs/heads/', ''),
-            assignment_id='default'  # Will be updated when teacher assigns
-        )
+        missing = usernames - students.keys()
+        if missing:
+            names = {}
+            for commit_data in commits:
+                username = self._author_username(commit_data)
+                names.setdefault(username, (commit_data.get('author') or {}).get('name') or username)
+            rows = [
+                {
+                    'student_id': f"github-{username}",
+                    'github_username': username,
+                    'name': names[username],
+                    'is_approved': False,  # A teacher approves and assigns a block
+                    'block': 0,
+                    'created_at': datetime.utcnow()
+                }
+                for username in sorted(missing)
+            ]
+            try:
+                students.update(
+                    (username, student_id) for student_id, username in
+                    db.execute(insert(Student).returning(Student.id, Student.github_username), rows)
+                )
+            except IntegrityError:
+                # Another push created them first; nothing else has been written yet
+                db.rollback()
+                students.update(db.query(Student.github_username, Student.id).filter(
+                    Student.github_username.in_(missing)
+                ).all())
+                if usernames - students.keys():
+                    raise
         
-        db.add(submission)
-        db.commit()
-        db.refresh(submission)
+        return students
+    
+    def _submission_row(self, student_id: int, commit_data: Dict[str, Any],
+                        repository: Dict[str, Any], ref: str) -> Dict[str, Any]:
+        """Submission column values for one commit"""
+        files_changed = commit_data.get('added', []) + commit_data.get('modified', [])
+        timestamp = commit_data.get('timestamp')
         
-        return submission
+        return {
+            'student_id': student_id,
+            'assignment_name': repository.get('name', ''),  # Will be updated when teacher assigns
+            'file_name': files_changed[0] if files_changed else None,
+            'file_size': 0,
+            'github_repo': repository.get('full_name', ''),
+            'commit_sha': commit_data['id'],
+            'commit_message': commit_data.get('message', ''),
+            'commit_date': datetime.fromisoformat(timestamp.replace('Z', '+00:00')) if timestamp else None,
+            'branch': ref.replace('refs/heads/', ''),
+            'created_at': datetime.utcnow()
+        }
     
     def get_student_submissions(self, student_id: int, db: Session, 
                               limit: int = 50) -> list:
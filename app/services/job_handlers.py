@@ -0,0 +1,108 @@
+import asyncio
+from typing import Dict, Any, Optional
+from sqlalchemy.orm import Session
+from ..models import Submission, LLMBatch
+from .job_queue import register_job_handler, enqueue_job
+from .ai_analysis_service import AIAnalysisService
+from .quiz_generation_service import QuizGenerationService
+from .code_condenser import condense_code_samples
+from .quiz_precompute import get_precomputed, store_precomputed
+from .single_flight import submission_hash
+from .llm_batch import advance_batch, LLM_BATCH_POLL_INTERVAL
+from .git_mirror import get_git_mirror, apply_commit_diff, CommitDiff, GitMirrorError, GIT_MIRROR_ENABLED
+from .github_api import get_github_client
+
+async def _fetch_commit_diff(repo: str, sha: str) -> Optional[CommitDiff]:
+    """A pushed commit's files and diff from the local mirror, else the GitHub API; None if neither has it"""
+    if GIT_MIRROR_ENABLED:
+        try:
+            return await asyncio.to_thread(get_git_mirror().commit_diff, repo, sha)
+        except GitMirrorError as e:
+            # Private repo without a token, network trouble or a force-pushed commit
+            print(f"Git mirror could not read {repo}@{sha[:7]} ({e}), asking the GitHub API")
+    try:
+        return await asyncio.to_thread(get_github_client().commit_diff, repo, sha)
+    except Exception as e:
+        print(f"GitHub API could not read {repo}@{sha[:7]} ({e}), analyzing without the diff")
+        return None
+
+@register_job_handler("analyze_submission")
+async def analyze_submission(payload: Dict[str, Any], db: Session) -> Dict[str, Any]:
+    """Run AI analysis and quiz generation for one webhook submission"""
+    submission = db.query(Submission).filter(Submission.id == payload["submission_id"]).first()
+    if not submission:
+        raise ValueError(f"Submission {payload['submission_id']} not found")
+    
+    if submission.commit_sha and submission.content_hash is None:
+        # Webhook submissions get their code, diff and line stats from the local mirror;
+        # the first job of a push fetches, the rest find their commits already there.
+        # Without the mirror, or when it fails, the (ETag-cached) GitHub API is asked instead.
+        diff = await _fetch_commit_diff(submission.github_repo, submission.commit_sha)
+        if diff is not None:
+            apply_commit_diff(submission, diff)
+            db.commit()
+    
+    ai_analysis_service = AIAnalysisService()
+    
+    # Generate AI analysis
+    analysis = await ai_analysis_service.analyze_submission_with_ai(submission, db)
+    
+    # Generate AI-powered quiz
+    quiz = await ai_analysis_service.generate_ai_quiz(submission, analysis, db)
+    
+    return {
+        "submission_id": submission.id,
+        "analysis_id": analysis.id,
+        "quiz_id": quiz.id
+    }
+
+@register_job_handler("pregenerate_quiz")
+async def pregenerate_quiz(payload: Dict[str, Any], db: Session) -> Dict[str, Any]:
+    """Generate an uploaded submission's quiz questions ahead of time"""
+    submission = db.query(Submission).filter(Submission.id == payload["submission_id"]).first()
+    if not submission:
+        # Replaced by a newer upload before we got to it
+        return {"submission_id": payload["submission_id"], "skipped": "submission deleted"}
+    
+    code_hash = submission_hash(submission)
+    if get_precomputed(db, submission.assignment_name, [code_hash]):
+        return {"submission_id": submission.id, "skipped": "already precomputed"}
+    
+    # Same input as per-student generation in the admin panel; no local fallback questions,
+    # a failure is retried later by the job queue instead
+    questions = await QuizGenerationService().generate_quiz_questions(
+        condense_code_samples([submission.file_content]), submission.assignment_name, allow_fallback=False
+    )
+    store_precomputed(db, submission.assignment_name, code_hash, questions, submission_id=submission.id)
+    
+    return {
+        "submission_id": submission.id,
+        "content_hash": code_hash,
+        "questions_count": len(questions)
+    }
+
+@register_job_handler("llm_batch")
+async def run_llm_batch(payload: Dict[str, Any], db: Session) -> Dict[str, Any]:
+    """Submit an offline LLM batch, or check on it and ingest the results once it finishes"""
+    batch = db.query(LLMBatch).filter(LLMBatch.id == payload["batch_id"]).first()
+    if not batch:
+        raise ValueError(f"LLM batch {payload['batch_id']} not found")
+    
+    if not await advance_batch(db, batch):
+        # Still running at the provider; look again later
+        enqueue_job(db, "llm_batch", payload, delay=LLM_BATCH_POLL_INTERVAL)
+    
+    return {"batch_id": batch.id, "status": batch.status}
+
+@register_job_handler("generate_quiz")
+async def generate_quiz(payload: Dict[str, Any], db: Session) -> Dict[str, Any]:
+    """Admin quiz generation and PDF rendering queued with /admin/generate-quiz?background=true"""
+    # The admin quiz pipeline lives with its endpoints; imported on use so services don't load the API at import
+    from ..api.admin import run_quiz_generation_job
+    return await run_quiz_generation_job(payload, db)
+
+@register_job_handler("import_students")
+def import_students(payload: Dict[str, Any], db: Session) -> Dict[str, Any]:
+    """Student CSV import queued with /admin/upload-students?background=true"""
+    from ..api.admin import import_students as run_import
+    return run_import(payload["csv"], db)
@@ -0,0 +1,387 @@
+import os
+import uuid
+import asyncio
+import threading
+import traceback
+import contextvars
+from datetime import datetime, timedelta
+from typing import Dict, Any, Callable, Optional, List
+from sqlalchemy import or_, and_, update
+from sqlalchemy.orm import Session
+from ..models import Job
+from ..models.database import SessionLocal
+from .openai_client import close_async_clients
+
+# Worker configuration from environment
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_VISIBILITY_TIMEOUT = int(os.getenv("JOB_VISIBILITY_TIMEOUT", "600"))  # seconds a claimed job stays hidden
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BASE_DELAY = float(os.getenv("JOB_RETRY_BASE_DELAY", "10"))  # seconds, doubled per attempt
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+JOB_CANCEL_POLL_INTERVAL = float(os.getenv("JOB_CANCEL_POLL_INTERVAL", "2.0"))  # seconds between cancel checks
+
+# job_type -> handler(payload, db). Handlers may be plain functions or coroutines.
+JOB_HANDLERS: Dict[str, Callable[[Dict[str, Any], Session], Any]] = {}
+
+# Set whenever a job is enqueued so idle workers in this process wake immediately
+_job_available = threading.Event()
+
+# The job the current handler is running for (read by report_progress)
+_current_job: contextvars.ContextVar[Optional["_RunningJob"]] = contextvars.ContextVar("current_job", default=None)
+
+
+class JobCancelled(Exception):
+    """Raised in a synchronous handler when its job has been cancelled."""
+
+
+class _RunningJob:
+    def __init__(self, job_id: int):
+        self.job_id = job_id
+        self.task: Optional[asyncio.Task] = None  # Set for coroutine handlers
+
+
+def register_job_handler(job_type: str):
+    """Decorator registering the function that runs jobs of job_type."""
+    def decorator(func):
+        JOB_HANDLERS[job_type] = func
+        return func
+    return decorator
+
+
+def enqueue_job(db: Session, job_type: str, payload: Dict[str, Any],
+                max_attempts: int = JOB_MAX_ATTEMPTS, priority: int = 0, delay: float = 0) -> Job:
+    """Persist a new job and wake the local workers.
+
+    Workers always take the highest-priority claimable job first, so
+    background work enqueued with a negative priority never delays
+    webhook analysis. A job with a delay (seconds) is not claimed before
+    then, which polling jobs use to check back later.
+    """
+    job = Job(
+        job_type=job_type,
+        payload=payload,
+        status="queued",
+        priority=priority,
+        attempts=0,
+        max_attempts=max_attempts,
+        available_at=datetime.utcnow() + timedelta(seconds=delay),
+        created_at=datetime.utcnow()
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    _job_available.set()
+    return job
+
+
+def job_to_dict(job: Job) -> Dict[str, Any]:
+    """Serialize a job for the status endpoints."""
+    return {
+        "id": job.id,
+        "job_type": job.job_type,
+        "status": job.status,
+        "priority": job.priority,
+        "payload": job.payload,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "progress": job.progress,
+        "partial_result": job.partial_result,
+        "cancel_requested": bool(job.cancel_requested),
+        "result": job.result,
+        "last_error": job.last_error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "updated_at": job.updated_at.isoformat() if job.updated_at else None,
+        "completed_at": job.completed_at.isoformat() if job.completed_at else None
+    }
+
+
+def _claimable(now: datetime):
+    """Queued jobs whose backoff has passed, or running jobs whose lease expired."""
+    return and_(
+        Job.attempts < Job.max_attempts,
+        Job.cancel_requested.isnot(True),
+        or_(
+            and_(Job.status == "queued", Job.available_at <= now),
+            and_(Job.status == "running", Job.locked_until < now)
+        )
+    )
+
+
+def claim_next_job(db: Session, worker_id: str,
+                   visibility_timeout: int = JOB_VISIBILITY_TIMEOUT) -> Optional[Job]:
+    """Atomically lease the highest-priority, oldest claimable job, or return None.
+
+    The lease is taken with a conditional UPDATE, so two workers (threads or
+    processes) racing for the same row cannot both win, on SQLite or Postgres.
+    """
+    _fail_exhausted_leases(db)
+
+    for _ in range(5):
+        now = datetime.utcnow()
+        candidate = db.query(Job.id).filter(_claimable(now)).order_by(
+            Job.priority.desc(), Job.available_at, Job.id
+        ).first()
+        if not candidate:
+            return None
+
+        claimed = db.execute(
+            update(Job)
+            .where(Job.id == candidate.id, _claimable(now))
+            .values(
+                status="running",
+                locked_by=worker_id,
+                locked_until=now + timedelta(seconds=visibility_timeout),
+                attempts=Job.attempts + 1,
+                updated_at=now
+            )
+        ).rowcount
+        db.commit()
+        if claimed:
+            return db.query(Job).filter(Job.id == candidate.id).first()
+
+    return None
+
+
+def _fail_exhausted_leases(db: Session) -> None:
+    """Mark jobs failed when their lease expired on the final attempt, or cancelled if that was asked for."""
+    now = datetime.utcnow()
+    db.execute(
+        update(Job)
+        .where(Job.status == "running", Job.locked_until < now, Job.cancel_requested.is_(True))
+        .values(status="cancelled", last_error="Cancelled", completed_at=now, updated_at=now)
+    )
+    db.execute(
+        update(Job)
+        .where(Job.status == "running", Job.locked_until < now, Job.attempts >= Job.max_attempts)
+        .values(status="failed", last_error="Visibility timeout expired on final attempt", completed_at=now,
+                updated_at=now)
+    )
+    db.commit()
+
+
+def complete_job(db: Session, job: Job, result: Any = None) -> None:
+    job.status = "completed"
+    job.result = result
+    job.locked_by = None
+    job.locked_until = None
+    job.completed_at = datetime.utcnow()
+    db.commit()
+
+
+def fail_job(db: Session, job: Job, error: str) -> None:
+    """Requeue with exponential backoff, or mark failed once attempts run out."""
+    job.last_error = error
+    job.locked_by = None
+    job.locked_until = None
+    if job.attempts < job.max_attempts:
+        job.status = "queued"
+        job.available_at = datetime.utcnow() + timedelta(seconds=JOB_RETRY_BASE_DELAY * 2 ** (job.attempts - 1))
+    else:
+        job.status = "failed"
+        job.completed_at = datetime.utcnow()
+    db.commit()
+
+
+def cancel_job(db: Session, job: Job) -> bool:
+    """Cancel a queued job outright, or ask the worker running it to stop.
+
+    Returns False if the job had already finished. A running handler is
+    stopped at its next progress report, or within JOB_CANCEL_POLL_INTERVAL
+    for coroutine handlers; its partial result is kept.
+    """
+    now = datetime.utcnow()
+    cancelled = db.execute(
+        update(Job)
+        .where(Job.id == job.id, Job.status == "queued")
+        .values(status="cancelled", cancel_requested=True, last_error="Cancelled", completed_at=now, updated_at=now)
+    ).rowcount
+    if not cancelled:
+        cancelled = db.execute(
+            update(Job)
+            .where(Job.id == job.id, Job.status == "running")
+            .values(cancel_requested=True, updated_at=now)
+        ).rowcount
+    db.commit()
+    db.refresh(job)
+    return bool(cancelled)
+
+
+def report_progress(db: Session, done: Optional[int] = None, total: Optional[int] = None,
+                    message: Optional[str] = None, partial: Any = None) -> None:
+    """Record the running job's progress (and optionally its partial result).
+
+    Call from inside a job handler; outside one it does nothing. Commits the
+    handler's session and extends the job's lease, so long handlers that
+    report progress are not reclaimed by another worker. If the job has been
+    cancelled, a coroutine handler is cancelled at its next await and a
+    synchronous handler gets JobCancelled.
+    """
+    running = _current_job.get()
+    if running is None:
+        return
+    values = {
+        "progress": {"done": done, "total": total, "message": message},
+        "locked_until": datetime.utcnow() + timedelta(seconds=JOB_VISIBILITY_TIMEOUT),
+        "updated_at": datetime.utcnow()
+    }
+    if partial is not None:
+        values["partial_result"] = partial
+    db.execute(update(Job).where(Job.id == running.job_id).values(**values))
+    db.commit()
+    if db.query(Job.cancel_requested).filter(Job.id == running.job_id).scalar():
+        if running.task is not None:
+            running.task.cancel()
+        else:
+            raise JobCancelled()
+
+
+def _cancel_requested(job_id: int) -> bool:
+    db = SessionLocal()
+    try:
+        return bool(db.query(Job.cancel_requested).filter(Job.id == job_id).scalar())
+    finally:
+        db.close()
+
+
+async def _run_cancellable(coro, running: _RunningJob):
+    """Run a handler coroutine, cancelling it if the job is cancelled meanwhile."""
+    running.task = asyncio.ensure_future(coro)
+
+    async def watch():
+        while not running.task.done():
+            await asyncio.sleep(JOB_CANCEL_POLL_INTERVAL)
+            try:
+                requested = _cancel_requested(running.job_id)
+            except Exception as e:
+                print(f"Job {running.job_id} cancel check failed: {e}")
+                continue
+            if requested:
+                running.task.cancel()
+                return
+
+    watcher = asyncio.ensure_future(watch())
+    try:
+        return await running.task
+    finally:
+        watcher.cancel()
+
+
+def _finish_cancelled(db: Session, job: Job) -> None:
+    job.status = "cancelled"
+    job.last_error = "Cancelled"
+    job.locked_by = None
+    job.locked_until = None
+    job.completed_at = datetime.utcnow()
+    db.commit()
+
+
+def run_job(db: Session, job: Job, loop: asyncio.AbstractEventLoop) -> None:
+    """Run one claimed job through its handler and record the outcome."""
+    handler = JOB_HANDLERS.get(job.job_type)
+    if handler is None:
+        job.attempts = job.max_attempts  # Retrying won't help
+        fail_job(db, job, f"No handler registered for job type '{job.job_type}'")
+        return
+
+    running = _RunningJob(job.id)
+    token = _current_job.set(running)
+    try:
+        result = handler(job.payload or {}, db)
+        if asyncio.iscoroutine(result):
+            result = loop.run_until_complete(_run_cancellable(result, running))
+        complete_job(db, job, result)
+    except (JobCancelled, asyncio.CancelledError):
+        print(f"Job {job.id} ({job.job_type}) cancelled")
+        db.rollback()
+        _finish_cancelled(db, job)
+    except Exception as e:
+        print(f"Job {job.id} ({job.job_type}) attempt {job.attempts} failed: {e}")
+        traceback.print_exc()
+        db.rollback()
+        fail_job(db, job, str(e))
+    finally:
+        _current_job.reset(token)
+
+
+class JobWorkerPool:
+    """Pool of daemon threads that poll the jobs table and run handlers.
+
+    Each thread has its own DB session per job and its own event loop for
+    async handlers. Safe to run in several processes against one database.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, poll_interval: float = JOB_POLL_INTERVAL):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._prefix = f"{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._run, args=(f"{self._prefix}-{i}",), name=f"job-worker-{i}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        print(f"✅ Started {self.workers} job workers")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        _job_available.set()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+
+    def _run(self, worker_id: str) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            while not self._stop.is_set():
+                if not self._run_once(worker_id, loop):
+                    _job_available.wait(self.poll_interval)
+                    _job_available.clear()
+        finally:
+            # Close this loop's pooled OpenAI connections before the loop goes away
+            loop.run_until_complete(close_async_clients())
+            loop.close()
+
+    def _run_once(self, worker_id: str, loop: asyncio.AbstractEventLoop) -> bool:
+        """Claim and run one job; return False when the queue was empty."""
+        db = SessionLocal()
+        try:
+            job = claim_next_job(db, worker_id)
+            if job is None:
+                return False
+            run_job(db, job, loop)
+            return True
+        except Exception as e:
+            print(f"Job worker {worker_id} error: {e}")
+            db.rollback()
+            return False
+        finally:
+            db.close()
+
+
+_pool: Optional[JobWorkerPool] = None
+
+
+def start_job_workers() -> JobWorkerPool:
+    """Start the process-wide worker pool (idempotent)."""
+    global _pool
+    # Make sure handlers are registered before the first claim
+    from . import job_handlers  # noqa: F401
+    if _pool is None:
+        _pool = JobWorkerPool()
+    _pool.start()
+    return _pool
+
+
+def stop_job_workers() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.stop()
+        _pool = None
@@ -0,0 +1,387 @@
+import os
+import json
+import uuid
+import asyncio
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy.orm import Session
+from ..models import prefetch_code, LLMBatch, Student, Submission, Analysis, Quiz, QuizQuestion
+from .job_queue import enqueue_job
+from .llm_cache import CachedResponse
+from .llm_gateway import LLMGateway
+from .openai_client import get_client_or_none
+from .model_router import ModelRouter
+from .code_condenser import condense_code_samples, estimate_tokens
+from .quiz_generation_service import QuizGenerationService, QuizQuestion as GeneratedQuestion
+from .ai_analysis_service import AIAnalysisService, _parse_analysis_response
+from .quiz_precompute import get_precomputed, store_precomputed
+from .quiz_service import create_quiz_pdf, store_quiz_pdf_in_db
+from .single_flight import submission_hash
+
+# Offline batch runs: where request/result files live and how they are submitted
+LLM_BATCH_BACKEND = os.getenv("LLM_BATCH_BACKEND", "openai")  # 'openai' (Batch API) or 'local'
+LLM_BATCH_DIR = os.getenv("LLM_BATCH_DIR", "./llm_batches")
+LLM_BATCH_POLL_INTERVAL = float(os.getenv("LLM_BATCH_POLL_INTERVAL", "300"))  # seconds between status checks
+LLM_BATCH_COMPLETION_WINDOW = os.getenv("LLM_BATCH_COMPLETION_WINDOW", "24h")
+LLM_BATCH_LOCAL_CONCURRENCY = int(os.getenv("LLM_BATCH_LOCAL_CONCURRENCY", "5"))
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+
+class BatchBackend(ABC):
+    """Where a JSONL batch file is run.
+
+    submit() takes the path of a request file in OpenAI batch format and
+    returns the backend's batch id. retrieve() returns {"status": ...} with
+    status 'in_progress', 'completed' or 'failed'; completed batches also
+    carry "output", the result lines as JSONL text, and failed ones "error".
+    """
+
+    name = "base"
+
+    @abstractmethod
+    async def submit(self, input_path: str) -> str:
+        ...
+
+    @abstractmethod
+    async def retrieve(self, backend_batch_id: str) -> Dict[str, Any]:
+        ...
+
+
+class OpenAIBatchBackend(BatchBackend):
+    """The OpenAI Batch API (half price, results within the completion window).
+
+    Uses the pooled sync client, so OPENAI_BASE_URL also points it at the
+    local stand-in server.
+    """
+
+    name = "openai"
+
+    def __init__(self, client=None):
+        self.client = client or get_client_or_none()
+        if self.client is None or not hasattr(self.client, "batches"):
+            raise RuntimeError("OpenAI batch backend needs an API key and openai>=1.x")
+
+    async def submit(self, input_path: str) -> str:
+        return await asyncio.to_thread(self._submit, input_path)
+
+    def _submit(self, input_path: str) -> str:
+        with open(input_path, "rb") as f:
+            uploaded = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id, endpoint=BATCH_ENDPOINT, completion_window=LLM_BATCH_COMPLETION_WINDOW
+        )
+        return batch.id
+
+    async def retrieve(self, backend_batch_id: str) -> Dict[str, Any]:
+        return await asyncio.to_thread(self._retrieve, backend_batch_id)
+
+    def _retrieve(self, backend_batch_id: str) -> Dict[str, Any]:
+        batch = self.client.batches.retrieve(backend_batch_id)
+        if batch.status in ("validating", "in_progress", "finalizing", "cancelling"):
+            return {"status": "in_progress"}
+        # Expired or cancelled batches still return whatever finished in time
+        if batch.status in ("completed", "expired", "cancelled") and (batch.output_file_id or batch.error_file_id):
+            output = ""
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if file_id:
+                    output += self.client.files.content(file_id).text.rstrip("\n") + "\n"
+            return {"status": "completed", "output": output}
+        errors = getattr(getattr(batch, "errors", None), "data", None) or []
+        message = "; ".join(getattr(error, "message", "") or "" for error in errors) or f"batch {batch.status}"
+        return {"status": "failed", "error": message}
+
+
+class LocalBatchBackend(BatchBackend):
+    """Runs every line through the regular LLM gateway in this process.
+
+    For development and tests (point OPENAI_BASE_URL at llm_standin.py),
+    and for endpoints without a batch API. Requests still go through the
+    response cache, rate limiter and circuit breaker.
+    """
+
+    name = "local"
+
+    def __init__(self, concurrency: int = LLM_BATCH_LOCAL_CONCURRENCY):
+        self.concurrency = concurrency
+
+    async def submit(self, input_path: str) -> str:
+        gateway = LLMGateway()
+        if not gateway.available:
+            raise RuntimeError("OpenAI API key not configured")
+        with open(input_path) as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+        semaphore = asyncio.Semaphore(max(1, self.concurrency))
+
+        async def run(line: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    response = await gateway.chat_completion(**line["body"])
+                except Exception as e:
+                    return {"id": f"batch_req_{uuid.uuid4().hex[:12]}", "custom_id": line["custom_id"],
+                            "response": None, "error": {"code": type(e).__name__, "message": str(e)}}
+            # Cached and legacy responses are dicts; fresh modern ones are pydantic models
+            body = json.loads(json.dumps(response)) if isinstance(response, dict) else response.model_dump()
+            return {"id": f"batch_req_{uuid.uuid4().hex[:12]}", "custom_id": line["custom_id"],
+                    "response": {"status_code": 200, "body": body}, "error": None}
+
+        results = await asyncio.gather(*(run(line) for line in lines))
+        output_path = f"{input_path}.local-output"
+        with open(output_path, "w") as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+        return output_path
+
+    async def retrieve(self, backend_batch_id: str) -> Dict[str, Any]:
+        with open(backend_batch_id) as f:
+            return {"status": "completed", "output": f.read()}
+
+
+BATCH_BACKENDS = {"openai": OpenAIBatchBackend, "local": LocalBatchBackend}
+
+
+def get_batch_backend(name: Optional[str] = None) -> BatchBackend:
+    """Instantiate a backend by name (default LLM_BATCH_BACKEND)."""
+    name = name or LLM_BATCH_BACKEND
+    if name not in BATCH_BACKENDS:
+        raise ValueError(f"Unknown batch backend '{name}' (expected one of {', '.join(BATCH_BACKENDS)})")
+    return BATCH_BACKENDS[name]()
+
+
+def batch_to_dict(batch: LLMBatch) -> Dict[str, Any]:
+    """Serialize a batch for the admin endpoints."""
+    return {
+        "id": batch.id,
+        "assignment_name": batch.assignment_name,
+        "backend": batch.backend,
+        "backend_batch_id": batch.backend_batch_id,
+        "status": batch.status,
+        "request_count": batch.request_count,
+        "result": batch.result,
+        "error": batch.error,
+        "created_at": batch.created_at.isoformat() if batch.created_at else None,
+        "submitted_at": batch.submitted_at.isoformat() if batch.submitted_at else None,
+        "completed_at": batch.completed_at.isoformat() if batch.completed_at else None
+    }
+
+
+def _request_line(custom_id: str, router: ModelRouter, task: str, request: Dict[str, Any]) -> Dict[str, Any]:
+    # Batch requests can't escalate, so they go to the first tier the prompt fits
+    prompt_tokens = estimate_tokens("".join(str(m.get("content") or "") for m in request["messages"]))
+    model = router.plan(task, prompt_tokens)[0].model
+    return {"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": {**request, "model": model}}
+
+
+def prepare_batch(db: Session, assignment_name: str, student_ids: Optional[List[str]] = None,
+                  include_analysis: bool = True, backend: Optional[str] = None) -> LLMBatch:
+    """Write every pending quiz (and analysis) request for an assignment to a JSONL batch file.
+
+    One quiz per student with submissions (all approved students when
+    student_ids is None). Students whose code already has precomputed
+    questions need no request. With include_analysis, submissions without a
+    completed analysis get an analysis request too. The batch is queued for
+    submission by the job workers; raises ValueError when there is nothing to do.
+    """
+    backend = backend or LLM_BATCH_BACKEND
+    if backend not in BATCH_BACKENDS:
+        raise ValueError(f"Unknown batch backend '{backend}'")
+
+    query = db.query(Student)
+    if student_ids is not None:
+        query = query.filter(Student.student_id.in_(student_ids))
+    else:
+        query = query.filter(Student.is_approved == True)
+    students = query.order_by(Student.student_id).all()
+
+    quiz_service = QuizGenerationService()
+    analysis_service = AIAnalysisService()
+    router = ModelRouter(None)
+    lines, items = [], {"quizzes": [], "analyses": []}
+
+    for student in students:
+        submissions = db.query(Submission).filter(
+            Submission.student_id == student.id,
+            Submission.assignment_name == assignment_name
+        ).order_by(Submission.created_at).all()
+        if not submissions:
+            continue
+
+        item = {"student_id": student.student_id, "student_pk": student.id, "submission_id": submissions[-1].id}
+        if len(submissions) == 1:
+            item["content_hash"] = submission_hash(submissions[0])
+            precomputed = get_precomputed(db, assignment_name, [item["content_hash"]])
+            if precomputed:
+                item["questions"] = [q.model_dump() for q in precomputed[item["content_hash"]]]
+        if "questions" not in item:
+            item["custom_id"] = f"quiz-{student.id}"
+            prefetch_code(db, submissions)
+            code = condense_code_samples([sub.file_content for sub in submissions])
+            lines.append(_request_line(item["custom_id"], router, "quiz", quiz_service.build_quiz_request(
+                code, assignment_name, legacy=quiz_service.gateway.is_legacy
+            )))
+        items["quizzes"].append(item)
+
+        if include_analysis:
+            analyzed = {row.submission_id for row in db.query(Analysis.submission_id).filter(
+                Analysis.submission_id.in_([sub.id for sub in submissions]),
+                Analysis.status == "completed"
+            )}
+            for submission in submissions:
+                if submission.id in analyzed:
+                    continue
+                custom_id = f"analysis-{submission.id}"
+                context = analysis_service.build_analysis_context(submission, db)
+                lines.append(_request_line(custom_id, router, "analysis",
+                                           analysis_service.build_analysis_request(context)))
+                items["analyses"].append({"custom_id": custom_id, "submission_id": submission.id})
+
+    if not items["quizzes"]:
+        raise ValueError("No submissions found for this assignment")
+
+    batch = LLMBatch(assignment_name=assignment_name, backend=backend, status="prepared",
+                     request_count=len(lines), items=items, created_at=datetime.utcnow())
+    db.add(batch)
+    db.commit()
+
+    os.makedirs(LLM_BATCH_DIR, exist_ok=True)
+    batch.input_path = os.path.join(LLM_BATCH_DIR, f"batch_{batch.id}.jsonl")
+    with open(batch.input_path, "w") as f:
+        for line in lines:
+            f.write(json.dumps(line) + "\n")
+    db.commit()
+
+    enqueue_job(db, "llm_batch", {"batch_id": batch.id})
+    return batch
+
+
+async def advance_batch(db: Session, batch: LLMBatch, backend: Optional[BatchBackend] = None) -> bool:
+    """Move a batch one step along prepared -> submitted -> completed; True once finished."""
+    if batch.status in ("completed", "failed"):
+        return True
+    backend = backend or get_batch_backend(batch.backend)
+
+    if batch.status == "prepared":
+        if batch.request_count:
+            batch.backend_batch_id = await backend.submit(batch.input_path)
+        batch.status = "submitted"
+        batch.submitted_at = datetime.utcnow()
+        db.commit()
+        print(f"LLM batch {batch.id}: submitted {batch.request_count} requests to {batch.backend}")
+
+    output = ""
+    if batch.request_count:
+        state = await backend.retrieve(batch.backend_batch_id)
+        if state["status"] == "in_progress":
+            return False
+        if state["status"] == "failed":
+            batch.status = "failed"
+            batch.error = state.get("error")
+            batch.completed_at = datetime.utcnow()
+            db.commit()
+            return True
+        output = state["output"]
+        batch.output_path = f"{batch.input_path}.output"
+        with open(batch.output_path, "w") as f:
+            f.write(output)
+
+    batch.result = ingest_batch_output(db, batch, output)
+    batch.status = "completed"
+    batch.completed_at = datetime.utcnow()
+    db.commit()
+    print(f"LLM batch {batch.id}: ingested, PDF {batch.result.get('pdf_id')}")
+    return True
+
+
+def _response_from_line(line: Dict[str, Any]) -> Any:
+    """The chat completion in a result line; raises with the line's error if it has none.
+
+    Wrapped like a cached response, so the parse functions read it the same
+    way on either SDK version.
+    """
+    response = line.get("response") or {}
+    if line.get("error") or response.get("status_code") != 200:
+        error = line.get("error") or (response.get("body") or {}).get("error") or {}
+        raise RuntimeError(error.get("message") or f"status {response.get('status_code')}")
+    return CachedResponse(response["body"])
+
+
+def ingest_batch_output(db: Session, batch: LLMBatch, output: str) -> Dict[str, Any]:
+    """Store a finished batch's results as Quiz/QuizQuestion and Analysis rows and render the class PDF."""
+    lines = {}
+    for raw in output.splitlines():
+        if raw.strip():
+            line = json.loads(raw)
+            lines[line["custom_id"]] = line
+
+    quiz_service = QuizGenerationService()
+    analysis_service = AIAnalysisService()
+    errors = {}
+
+    def parsed(custom_id, parse):
+        if custom_id not in lines:
+            errors[custom_id] = "missing from batch output"
+            return None
+        try:
+            return parse(_response_from_line(lines[custom_id]))
+        except Exception as e:
+            errors[custom_id] = str(e)[:300]
+            return None
+
+    pdf_quiz_data = []
+    for item in batch.items["quizzes"]:
+        if "questions" in item:
+            questions = [GeneratedQuestion(**question) for question in item["questions"]]
+        else:
+            questions = parsed(item["custom_id"], quiz_service._parse_quiz_response)
+            if not questions:
+                continue
+            if item.get("content_hash"):
+                store_precomputed(db, batch.assignment_name, item["content_hash"], questions,
+                                  submission_id=item["submission_id"])
+
+        quiz = Quiz(student_id=item["student_pk"], submission_id=item["submission_id"], quiz_type="batch_generated",
+                    status="generated", total_questions=len(questions), created_at=datetime.utcnow())
+        db.add(quiz)
+        db.flush()
+        for question in questions:
+            db.add(QuizQuestion(quiz_id=quiz.id, question_type="code_explanation", question_text=question.question,
+                                code_snippet=question.code_snippet, learning_objectives=[question.focus]))
+
+        student = db.query(Student).filter(Student.id == item["student_pk"]).first()
+        pdf_quiz_data.append({
+            "name": student.name if student else item["student_id"],
+            "student_id": item["student_id"],
+            "questions": [
+                {"question_text": q.question, "code_snippet": q.code_snippet, "focus": q.focus, "question_number": i}
+                for i, q in enumerate(questions, 1)
+            ]
+        })
+
+    analyses = 0
+    for item in batch.items["analyses"]:
+        submission = db.query(Submission).filter(Submission.id == item["submission_id"]).first()
+        if not submission:
+            continue
+        line = lines.get(item["custom_id"])
+        result = parsed(item["custom_id"], _parse_analysis_response)
+        if result is None:
+            continue
+        context = analysis_service.build_analysis_context(submission, db)
+        model = (((line or {}).get("response") or {}).get("body") or {}).get("model", "unknown")
+        analysis_service.save_analysis(
+            submission, analysis_service.annotate_analysis(result, context, model, "openai_batch"), db, commit=False
+        )
+        analyses += 1
+    db.commit()
+
+    pdf_id = None
+    if pdf_quiz_data:
+        pdf_id = store_quiz_pdf_in_db(create_quiz_pdf(pdf_quiz_data, batch.assignment_name), db).id
+
+    return {
+        "pdf_id": pdf_id,
+        "students_count": len(pdf_quiz_data),
+        "analyses_count": analyses,
+        "failed": errors
+    }
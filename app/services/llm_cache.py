@@ -0,0 +1,207 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Any, Optional
+
+# Cache configuration from environment
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "./llm_cache.db")
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(100 * 1024 * 1024)))
+
+
+class CachedResponse(dict):
+    """Dict that also allows attribute access, so cached completions can be read
+    exactly like SDK response objects (``response.choices[0].message.content``)."""
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("__"):
+            raise AttributeError(name)
+        try:
+            return _wrap(self[name])
+        except KeyError:
+            return None
+
+    def __getitem__(self, key):
+        return _wrap(dict.__getitem__(self, key))
+
+
+def _wrap(value: Any) -> Any:
+    if isinstance(value, dict) and not isinstance(value, CachedResponse):
+        return CachedResponse(value)
+    if isinstance(value, list):
+        return [_wrap(v) for v in value]
+    return value
+
+
+def _to_jsonable(response: Any) -> Dict[str, Any]:
+    """Serialize a modern (pydantic) or legacy (dict-like) SDK response."""
+    if hasattr(response, "model_dump"):
+        return response.model_dump()
+    return json.loads(json.dumps(response, default=str))
+
+
+def make_cache_key(request: Dict[str, Any]) -> str:
+    """Content hash of a chat completion request.
+
+    Covers model, messages, temperature and the tools/functions schema along
+    with every other request parameter, so any change yields a new key.
+    """
+    canonical = json.dumps(request, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """SQLite-backed LLM response cache with TTL and size-bounded LRU eviction."""
+
+    def __init__(self, path: str = LLM_CACHE_PATH, ttl_seconds: int = LLM_CACHE_TTL_SECONDS,
+                 max_entries: int = LLM_CACHE_MAX_ENTRIES, max_bytes: int = LLM_CACHE_MAX_BYTES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                cache_key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_responses_last_access ON llm_responses (last_access)")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache_stats (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Return the cached response for key, or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM llm_responses WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row and now - row[1] <= self.ttl_seconds:
+                self._conn.execute("UPDATE llm_responses SET last_access = ? WHERE cache_key = ?", (now, key))
+                self._bump("hits")
+                self._conn.commit()
+                return CachedResponse(json.loads(row[0]))
+            if row:
+                self._conn.execute("DELETE FROM llm_responses WHERE cache_key = ?", (key,))
+            self._bump("misses")
+            self._conn.commit()
+            return None
+
+    def set(self, key: str, response: Any) -> None:
+        """Store a response and evict expired / least recently used entries."""
+        payload = json.dumps(_to_jsonable(response))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (cache_key, response, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload), now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        """Drop one entry (e.g. a response that failed validation)."""
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_responses WHERE cache_key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self) -> int:
+        """Remove every cached response and reset the counters."""
+        with self._lock:
+            count = self._conn.execute("DELETE FROM llm_responses").rowcount
+            self._conn.execute("DELETE FROM llm_cache_stats")
+            self._conn.commit()
+            return count
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current cache size."""
+        with self._lock:
+            counters = dict(self._conn.execute("SELECT name, value FROM llm_cache_stats").fetchall())
+            entries, total_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_responses"
+            ).fetchone()
+        hits = counters.get("hits", 0)
+        misses = counters.get("misses", 0)
+        return {
+            "enabled": LLM_CACHE_ENABLED,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            "evictions": counters.get("evictions", 0),
+            "entries": entries,
+            "total_bytes": total_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds
+        }
+
+    def _bump(self, name: str, amount: int = 1) -> None:
+        self._conn.execute(
+            "INSERT INTO llm_cache_stats (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, amount)
+        )
+
+    def _evict(self, now: float) -> None:
+        evicted = self._conn.execute(
+            "DELETE FROM llm_responses WHERE created_at < ?", (now - self.ttl_seconds,)
+        ).rowcount
+
+        entries, total_bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_responses"
+        ).fetchone()
+        if entries <= self.max_entries and total_bytes <= self.max_bytes:
+            if evicted:
+                self._bump("evictions", evicted)
+            return
+
+        # Walk entries newest-access first; everything past the limits goes
+        kept_entries = 0
+        kept_bytes = 0
+        stale_keys = []
+        for key, size in self._conn.execute(
+            "SELECT cache_key, size FROM llm_responses ORDER BY last_access DESC"
+        ).fetchall():
+            if kept_entries + 1 > self.max_entries or kept_bytes + size > self.max_bytes:
+                stale_keys.append((key,))
+            else:
+                kept_entries += 1
+                kept_bytes += size
+        if stale_keys:
+            self._conn.executemany("DELETE FROM llm_responses WHERE cache_key = ?", stale_keys)
+            evicted += len(stale_keys)
+
+        if evicted:
+            self._bump("evictions", evicted)
+
+
+_cache: Optional[LLMResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Return the process-wide response cache, or None when caching is disabled."""
+    global _cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMResponseCache()
+        return _cache
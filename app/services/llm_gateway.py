@@ -0,0 +1,302 @@
+import os
+import time
+import random
+import asyncio
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+from .openai_client import get_client_or_none, get_async_client_or_none
+from .llm_cache import get_llm_cache, make_cache_key, CachedResponse
+from .llm_rate_limiter import get_rate_limiter
+from .llm_metrics import llm_metrics
+from .circuit_breaker import llm_circuit_breaker, CircuitOpenError, CLOSED
+from .code_condenser import estimate_tokens
+
+# Retry policy for rate limits, timeouts and server errors
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "1.0"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "30.0"))
+
+_RETRYABLE_STATUS = {408, 409, 429}
+_RETRYABLE_ERRORS = {
+    "APITimeoutError", "APIConnectionError",             # openai>=1.x
+    "Timeout", "ServiceUnavailableError", "TryAgain"     # openai==0.x
+}
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    return getattr(error, "status_code", None) or getattr(error, "http_status", None)
+
+
+def is_retryable(error: Exception) -> bool:
+    """True for rate limits, timeouts, connection problems and 5xx responses."""
+    if getattr(error, "code", None) == "insufficient_quota":
+        return False  # Billing problem; waiting won't help
+    status = _status_code(error)
+    if status is not None:
+        return status in _RETRYABLE_STATUS or status >= 500
+    return type(error).__name__ in _RETRYABLE_ERRORS
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Server-requested delay from Retry-After / retry-after-ms headers, if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or getattr(error, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        return None
+    return None
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Full-jitter exponential backoff; never shorter than the server asked for."""
+    if retry_after is not None:
+        return retry_after + random.uniform(0, LLM_RETRY_BASE_DELAY)
+    return random.uniform(0, min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * 2 ** attempt))
+
+
+def _estimate_request_tokens(kwargs: Dict[str, Any]) -> int:
+    prompt = "".join(str(message.get("content") or "") for message in kwargs.get("messages", []))
+    return estimate_tokens(prompt) + int(kwargs.get("max_tokens") or 1000)
+
+
+def _response_text(response: Any) -> str:
+    """The forced function call's arguments, or the message content."""
+    message = response.choices[0].message
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        return tool_calls[0].function.arguments or ""
+    function_call = getattr(message, "function_call", None)
+    if function_call:
+        return function_call.arguments or ""
+    return message.content or ""
+
+
+class CompletionStream:
+    """Text deltas of a streamed chat completion.
+
+    Iterating yields the text as it arrives: the function call arguments
+    for tool-call requests, the message content otherwise. Afterwards
+    ``response`` holds the assembled completion, shaped like a regular
+    (cached) response so the usual parse functions work on it. Cached and
+    non-streamed responses are yielded as a single delta. on_complete gets
+    the assembled completion on a worker thread.
+    """
+
+    def __init__(self, stream: Any = None, response: Any = None,
+                 on_complete: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self._stream = stream
+        self.response = response
+        self._on_complete = on_complete
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        if self._stream is None:
+            text = _response_text(self.response)
+            if text:
+                yield text
+            return
+
+        content = ""
+        tool_calls: List[Dict[str, Any]] = []
+        finish_reason = None
+        model = None
+        async for chunk in self._stream:
+            model = model or getattr(chunk, "model", None)
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            finish_reason = choice.finish_reason or finish_reason
+            delta = choice.delta
+            if delta.content:
+                content += delta.content
+                yield delta.content
+            for call in delta.tool_calls or []:
+                while len(tool_calls) <= call.index:
+                    tool_calls.append({"id": None, "type": "function", "function": {"name": "", "arguments": ""}})
+                entry = tool_calls[call.index]
+                entry["id"] = call.id or entry["id"]
+                if call.function and call.function.name:
+                    entry["function"]["name"] += call.function.name
+                if call.function and call.function.arguments:
+                    entry["function"]["arguments"] += call.function.arguments
+                    yield call.function.arguments
+
+        completion = {
+            "object": "chat.completion",
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content or None, "tool_calls": tool_calls or None},
+                "finish_reason": finish_reason
+            }]
+        }
+        self.response = CachedResponse(completion)
+        if self._on_complete:
+            await asyncio.to_thread(self._on_complete, completion)
+
+
+class LLMGateway:
+    """Awaitable entry point for every chat completion the app makes.
+
+    Uses AsyncOpenAI when the modern SDK is installed. With the legacy SDK
+    (openai==0.x) the blocking call runs on a worker thread, so a slow GPT
+    request never stalls the event loop that serves uploads and admin pages.
+
+    Responses are served from the persistent LLM response cache when an
+    identical request has been made before. Fresh calls wait for the shared
+    requests/tokens-per-minute buckets, are retried with jittered backoff on
+    429s and transient errors, and are recorded in llm_metrics.
+
+    While the circuit breaker is open, fresh calls fail immediately with
+    CircuitOpenError so callers can switch to their local fallback.
+    """
+
+    def __init__(self):
+        self.client = get_async_client_or_none()
+        self._is_async = self.client is not None
+        if not self._is_async:
+            self.client = get_client_or_none()
+        self.cache = get_llm_cache()
+        self.rate_limiter = get_rate_limiter()
+        self.circuit_breaker = llm_circuit_breaker
+
+    @property
+    def available(self) -> bool:
+        """True when an API key is configured and a client could be built."""
+        return self.client is not None
+
+    @property
+    def is_legacy(self) -> bool:
+        """True when talking to the legacy SDK (functions/function_call API)."""
+        return self.client is not None and hasattr(self.client, 'ChatCompletion')
+
+    async def chat_completion(self, use_cache: bool = True, **kwargs: Any) -> Any:
+        """Create a chat completion without blocking the event loop.
+
+        Accepts the same keyword arguments as ``chat.completions.create``
+        (or ``ChatCompletion.create`` on the legacy SDK). Pass
+        ``use_cache=False`` to skip the cache lookup and force a fresh call;
+        the fresh response still replaces the cached one.
+        """
+        if self.client is None:
+            raise RuntimeError("OpenAI API key not configured")
+
+        model = kwargs.get("model", "unknown")
+        cache_key = make_cache_key(kwargs) if self.cache else None
+        # Cache and rate limiter calls are SQLite transactions, so they run on worker threads
+        if cache_key and use_cache:
+            started = time.monotonic()
+            cached = await asyncio.to_thread(self.cache.get, cache_key)
+            if cached is not None:
+                llm_metrics.record(model, "cached", time.monotonic() - started, attempts=0)
+                return cached
+
+        response = await self._create_with_retries(**kwargs)
+
+        if cache_key:
+            await asyncio.to_thread(self.cache.set, cache_key, response)
+        return response
+
+    async def stream_completion(self, use_cache: bool = True, **kwargs: Any) -> CompletionStream:
+        """Like chat_completion, but returns a CompletionStream to read the output as it arrives.
+
+        Waiting for rate limits and retries happen before the first delta;
+        an error after that reaches the reader. The assembled response is
+        cached under the same key as a non-streamed request.
+        """
+        if self.client is None:
+            raise RuntimeError("OpenAI API key not configured")
+
+        cache_key = make_cache_key(kwargs) if self.cache else None
+        if cache_key and use_cache:
+            cached = await asyncio.to_thread(self.cache.get, cache_key)
+            if cached is not None:
+                llm_metrics.record(kwargs.get("model", "unknown"), "cached", 0.0, attempts=0)
+                return CompletionStream(response=cached)
+
+        if not self._is_async:
+            # The legacy and sync clients can't stream into the event loop; send it whole
+            return CompletionStream(response=await self.chat_completion(use_cache=False, **kwargs))
+
+        # Recorded latency is time to first byte for streamed calls
+        stream = await self._create_with_retries(stream=True, **kwargs)
+        on_complete = (lambda completion: self.cache.set(cache_key, completion)) if cache_key else None
+        return CompletionStream(stream=stream, on_complete=on_complete)
+
+    def discard_cached(self, request: Dict[str, Any]) -> None:
+        """Forget the cached response for a request whose output failed validation."""
+        if self.cache:
+            self.cache.delete(make_cache_key(request))
+
+    async def _create_with_retries(self, **kwargs: Any) -> Any:
+        model = kwargs.get("model", "unknown")
+        if not self.circuit_breaker.allow_request():
+            llm_metrics.record(model, "rejected", 0.0, attempts=0)
+            raise CircuitOpenError(f"LLM circuit '{self.circuit_breaker.name}' is open; skipping call")
+
+        estimated_tokens = _estimate_request_tokens(kwargs)
+        started = time.monotonic()
+        rate_limit_wait = 0.0
+        attempt = 0
+
+        while True:
+            if self.rate_limiter:
+                rate_limit_wait += await self.rate_limiter.acquire(
+                    {"requests": 1, "tokens": estimated_tokens}
+                )
+            attempt_started = time.monotonic()
+            try:
+                response = await self._create(**kwargs)
+            except asyncio.CancelledError:
+                self.circuit_breaker.release_probe()
+                raise
+            except Exception as e:
+                retryable = is_retryable(e)
+                if retryable and _status_code(e) != 429:
+                    # Timeouts, connection errors and 5xx mean the endpoint is unhealthy
+                    self.circuit_breaker.record_failure(f"{type(e).__name__}")
+                else:
+                    # The endpoint answered (rate limit or bad request); says nothing about its health
+                    self.circuit_breaker.release_probe()
+                if attempt >= LLM_MAX_RETRIES or not retryable or self.circuit_breaker.state != CLOSED:
+                    llm_metrics.record(
+                        model, "error", time.monotonic() - started, attempts=attempt + 1,
+                        rate_limit_wait=rate_limit_wait, error=f"{type(e).__name__}: {e}"[:200]
+                    )
+                    raise
+                delay = backoff_delay(attempt, retry_after_seconds(e))
+                if self.rate_limiter and _status_code(e) == 429:
+                    # Hold every worker off, not just this call
+                    await asyncio.to_thread(self.rate_limiter.pause, delay)
+                print(f"LLM call to {model} failed ({type(e).__name__}), retry {attempt + 1} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+
+            self.circuit_breaker.record_success(time.monotonic() - attempt_started)
+            usage = getattr(response, "usage", None)
+            prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+            completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+            if self.rate_limiter and usage:
+                # Settle the estimate against what the call actually used
+                await asyncio.to_thread(
+                    self.rate_limiter.adjust, "tokens", estimated_tokens - prompt_tokens - completion_tokens
+                )
+            llm_metrics.record(
+                model, "success", time.monotonic() - started, attempts=attempt + 1,
+                rate_limit_wait=rate_limit_wait, prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens
+            )
+            return response
+
+    async def _create(self, **kwargs: Any) -> Any:
+        if self._is_async:
+            return await self.client.chat.completions.create(**kwargs)
+
+        if self.is_legacy:
+            return await asyncio.to_thread(self.client.ChatCompletion.create, **kwargs)
+
+        return await asyncio.to_thread(self.client.chat.completions.create, **kwargs)
@@ -0,0 +1,75 @@
+import time
+import threading
+from collections import deque
+from typing import Dict, Any, Optional, List
+
+# Number of recent calls kept for latency percentiles and the admin view
+RECENT_CALLS = 200
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of values, or None when empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class LLMMetrics:
+    """In-process per-call metrics for the LLM gateway."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=RECENT_CALLS)
+        self._by_model: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, model: str, outcome: str, latency: float, attempts: int = 1,
+               rate_limit_wait: float = 0.0, prompt_tokens: int = 0, completion_tokens: int = 0,
+               error: Optional[str] = None) -> None:
+        """Record one gateway call. outcome is 'success', 'cached', 'error' or 'rejected'."""
+        call = {
+            "timestamp": time.time(),
+            "model": model,
+            "outcome": outcome,
+            "latency": round(latency, 3),
+            "attempts": attempts,
+            "rate_limit_wait": round(rate_limit_wait, 3),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "error": error
+        }
+        with self._lock:
+            self._recent.append(call)
+            totals = self._by_model.setdefault(model, {
+                "calls": 0, "success": 0, "cached": 0, "error": 0, "retries": 0,
+                "rate_limit_wait": 0.0, "prompt_tokens": 0, "completion_tokens": 0
+            })
+            totals["calls"] += 1
+            totals[outcome] = totals.get(outcome, 0) + 1
+            totals["retries"] += max(0, attempts - 1)
+            totals["rate_limit_wait"] += rate_limit_wait
+            totals["prompt_tokens"] += prompt_tokens
+            totals["completion_tokens"] += completion_tokens
+
+    def latencies(self, model: Optional[str] = None, outcome: str = "success") -> List[float]:
+        """Recent latencies, optionally filtered by model."""
+        with self._lock:
+            return [
+                call["latency"] for call in self._recent
+                if call["outcome"] == outcome and (model is None or call["model"] == model)
+            ]
+
+    def snapshot(self, recent: int = 20) -> Dict[str, Any]:
+        with self._lock:
+            by_model = {model: dict(totals) for model, totals in self._by_model.items()}
+            recent_calls = list(self._recent)[-recent:]
+        for model, totals in by_model.items():
+            latencies = self.latencies(model)
+            totals["rate_limit_wait"] = round(totals["rate_limit_wait"], 3)
+            totals["p50_latency"] = percentile(latencies, 50)
+            totals["p95_latency"] = percentile(latencies, 95)
+        return {"by_model": by_model, "recent_calls": recent_calls}
+
+
+llm_metrics = LLMMetrics()
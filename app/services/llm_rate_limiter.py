@@ -0,0 +1,140 @@
+import os
+import time
+import sqlite3
+import asyncio
+import threading
+from typing import Dict, Optional
+
+# Account limits; 0 disables the corresponding bucket
+OPENAI_RPM_LIMIT = int(os.getenv("OPENAI_RPM_LIMIT", "500"))
+OPENAI_TPM_LIMIT = int(os.getenv("OPENAI_TPM_LIMIT", "200000"))
+LLM_RATE_LIMIT_PATH = os.getenv("LLM_RATE_LIMIT_PATH", "./llm_ratelimit.db")
+
+
+class SharedRateLimiter:
+    """Token buckets for requests and tokens per minute, shared across processes.
+
+    Bucket state lives in a small SQLite file and every update runs inside a
+    ``BEGIN IMMEDIATE`` transaction, which takes SQLite's write lock, so all
+    uvicorn workers and job worker processes on the machine draw from the same
+    allowance.
+    """
+
+    def __init__(self, limits: Dict[str, int], path: str = LLM_RATE_LIMIT_PATH):
+        # name -> per-minute limit; each bucket holds up to one minute's worth
+        self.limits = {name: limit for name, limit in limits.items() if limit > 0}
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS rate_buckets (
+                name TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+
+    def _refilled(self, name: str, now: float) -> float:
+        limit = self.limits[name]
+        row = self._conn.execute("SELECT tokens, updated_at FROM rate_buckets WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return float(limit)
+        tokens, updated_at = row
+        return min(float(limit), tokens + (now - updated_at) * limit / 60.0)
+
+    def _store(self, name: str, tokens: float, now: float) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO rate_buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+            (name, tokens, now)
+        )
+
+    def try_acquire(self, amounts: Dict[str, float]) -> float:
+        """Take amounts from all buckets at once, or nothing.
+
+        Returns 0 on success, otherwise the number of seconds to wait before
+        the request could fit.
+        """
+        amounts = {name: amount for name, amount in amounts.items() if name in self.limits}
+        if not amounts:
+            return 0.0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                levels = {name: self._refilled(name, now) for name in amounts}
+                wait = 0.0
+                for name, amount in amounts.items():
+                    # A request bigger than a whole bucket waits for a full bucket
+                    needed = min(amount, self.limits[name])
+                    if levels[name] < needed:
+                        wait = max(wait, (needed - levels[name]) * 60.0 / self.limits[name])
+                if wait == 0.0:
+                    for name, amount in amounts.items():
+                        self._store(name, levels[name] - amount, now)
+                self._conn.execute("COMMIT")
+                return wait
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    async def acquire(self, amounts: Dict[str, float]) -> float:
+        """Wait until amounts are available; returns the total time waited."""
+        waited = 0.0
+        while True:
+            wait = await asyncio.to_thread(self.try_acquire, amounts)
+            if wait == 0.0:
+                return waited
+            wait = min(wait, 60.0)
+            await asyncio.sleep(wait)
+            waited += wait
+
+    def adjust(self, name: str, delta: float) -> None:
+        """Return (positive) or charge (negative) tokens once actual usage is known."""
+        if name not in self.limits or not delta:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                self._store(name, min(float(self.limits[name]), self._refilled(name, now) + delta), now)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def pause(self, seconds: float) -> None:
+        """Empty the request bucket so every worker holds off for about seconds (after a 429)."""
+        if "requests" not in self.limits:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                # One request needs a level of 1, so go below that by seconds' worth of refill
+                debt = 1.0 - seconds * self.limits["requests"] / 60.0
+                self._store("requests", min(self._refilled("requests", now), debt), now)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def levels(self) -> Dict[str, float]:
+        with self._lock:
+            now = time.time()
+            return {name: round(self._refilled(name, now), 1) for name in self.limits}
+
+
+_limiter: Optional[SharedRateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> Optional[SharedRateLimiter]:
+    """Return the process-wide limiter, or None when both limits are disabled."""
+    global _limiter
+    if OPENAI_RPM_LIMIT <= 0 and OPENAI_TPM_LIMIT <= 0:
+        return None
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = SharedRateLimiter({"requests": OPENAI_RPM_LIMIT, "tokens": OPENAI_TPM_LIMIT})
+        return _limiter
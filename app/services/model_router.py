@@ -0,0 +1,157 @@
+import os
+import time
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from .code_condenser import estimate_tokens
+from .circuit_breaker import CircuitOpenError
+from .llm_metrics import percentile
+
+# Model tiers; the fast tier is tried first and the strong tier is the escalation target
+LLM_FAST_MODEL = os.getenv("LLM_FAST_MODEL", "gpt-4o-mini")
+LLM_STRONG_MODEL = os.getenv("LLM_STRONG_MODEL", "gpt-4")
+# Prompts bigger than this skip the fast tier; 0 sends every size to the fast tier first
+LLM_FAST_MAX_INPUT_TOKENS = int(os.getenv("LLM_FAST_MAX_INPUT_TOKENS", "6000"))
+# Per-task overrides, e.g. "analysis=strong;quiz=fast,strong"
+LLM_ROUTES = os.getenv("LLM_ROUTES", "")
+
+DEFAULT_ROUTE = ("fast", "strong")
+TASK_ROUTES = {
+    "quiz": ("fast", "strong"),               # Admin quiz (function calling, 5 questions)
+    "batch_quiz": ("fast", "strong"),         # Several students' admin quizzes in one call
+    "standardized_quiz": ("fast", "strong"),  # Assignment-wide questions from code samples
+    "history_quiz": ("fast", "strong"),       # Personalized quiz after webhook analysis
+    "analysis": ("fast", "strong"),           # Learning/tool-dependency analysis JSON
+}
+
+# Call errors that another model may not hit (unknown model, context length exceeded)
+_ESCALATE_ON_STATUS = {400, 404}
+
+
+class ModelTier(NamedTuple):
+    name: str
+    model: str
+    max_input_tokens: int = 0  # 0 means no limit
+
+
+class ValidationError(ValueError):
+    """Raised by a parse function when a model's output is unusable."""
+
+
+def _parse_routes(spec: str) -> Dict[str, Tuple[str, ...]]:
+    routes = {}
+    for part in spec.split(";"):
+        if "=" not in part:
+            continue
+        task, tiers = part.split("=", 1)
+        names = tuple(name.strip() for name in tiers.split(",") if name.strip())
+        if names:
+            routes[task.strip()] = names
+    return routes
+
+
+class RouterMetrics:
+    """Per-tier latency and success counters for routed calls."""
+
+    def __init__(self, window: int = 200):
+        self._lock = threading.Lock()
+        self._tiers: Dict[str, Dict[str, Any]] = {}
+        self._latencies: Dict[str, deque] = {}
+        self._window = window
+
+    def record(self, tier: ModelTier, task: str, outcome: str, latency: float) -> None:
+        """outcome is 'success', 'invalid' (failed validation) or 'error'."""
+        with self._lock:
+            totals = self._tiers.setdefault(tier.name, {
+                "model": tier.model, "calls": 0, "success": 0, "invalid": 0, "error": 0, "by_task": {}
+            })
+            totals["model"] = tier.model
+            totals["calls"] += 1
+            totals[outcome] += 1
+            task_totals = totals["by_task"].setdefault(task, {"calls": 0, "success": 0})
+            task_totals["calls"] += 1
+            if outcome == "success":
+                task_totals["success"] += 1
+                self._latencies.setdefault(tier.name, deque(maxlen=self._window)).append(latency)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            tiers = {}
+            for name, totals in self._tiers.items():
+                latencies = list(self._latencies.get(name, ()))
+                tiers[name] = {
+                    **totals,
+                    "by_task": {task: dict(counts) for task, counts in totals["by_task"].items()},
+                    "success_rate": round(totals["success"] / totals["calls"], 3) if totals["calls"] else None,
+                    "p50_latency": percentile(latencies, 50),
+                    "p95_latency": percentile(latencies, 95)
+                }
+            return tiers
+
+
+router_metrics = RouterMetrics()
+
+
+class ModelRouter:
+    """Picks a model per task and input size, cheapest first.
+
+    complete() sends the request to the first tier of the task's route and
+    passes the response to parse(). If parse() rejects the output (raises),
+    the cached response is discarded and the request is retried on the next
+    tier. Only the last tier's failure reaches the caller.
+    """
+
+    def __init__(self, gateway, tiers: Optional[Dict[str, ModelTier]] = None,
+                 routes: Optional[Dict[str, Tuple[str, ...]]] = None):
+        self.gateway = gateway
+        self.tiers = tiers or {
+            "fast": ModelTier("fast", LLM_FAST_MODEL, LLM_FAST_MAX_INPUT_TOKENS),
+            "strong": ModelTier("strong", LLM_STRONG_MODEL)
+        }
+        self.routes = routes if routes is not None else {**TASK_ROUTES, **_parse_routes(LLM_ROUTES)}
+
+    def plan(self, task: str, prompt_tokens: int) -> List[ModelTier]:
+        """Tiers to try for a task, in order, skipping those too small for the prompt."""
+        tiers = [self.tiers[name] for name in self.routes.get(task, DEFAULT_ROUTE) if name in self.tiers]
+        if not tiers:
+            tiers = [self.tiers[name] for name in DEFAULT_ROUTE]
+        fitting = [tier for tier in tiers if not tier.max_input_tokens or prompt_tokens <= tier.max_input_tokens]
+        # Never route to nothing: the largest tier still gets the request
+        return fitting or tiers[-1:]
+
+    async def complete(self, task: str, request: Dict[str, Any], parse: Callable[[Any], Any],
+                       use_cache: bool = True) -> Tuple[Any, ModelTier]:
+        """Run request (without "model") through the task's tiers; returns (parsed, tier)."""
+        prompt_tokens = estimate_tokens("".join(
+            str(message.get("content") or "") for message in request.get("messages", [])
+        ))
+        plan = self.plan(task, prompt_tokens)
+        for position, tier in enumerate(plan):
+            last = position == len(plan) - 1
+            request_kwargs = {**request, "model": tier.model}
+            started = time.monotonic()
+            try:
+                response = await self.gateway.chat_completion(use_cache=use_cache, **request_kwargs)
+            except CircuitOpenError:
+                raise
+            except Exception as e:
+                router_metrics.record(tier, task, "error", time.monotonic() - started)
+                status = getattr(e, "status_code", None) or getattr(e, "http_status", None)
+                if last or status not in _ESCALATE_ON_STATUS:
+                    raise
+                print(f"{task}: {tier.model} rejected the request ({status}), escalating")
+                continue
+
+            try:
+                parsed = parse(response)
+            except Exception as e:
+                router_metrics.record(tier, task, "invalid", time.monotonic() - started)
+                # Don't keep serving a response we couldn't use
+                self.gateway.discard_cached(request_kwargs)
+                if last:
+                    raise
+                print(f"{task}: {tier.model} output failed validation ({e}), escalating to {plan[position + 1].model}")
+                continue
+
+            router_metrics.record(tier, task, "success", time.monotonic() - started)
+            return parsed, tier
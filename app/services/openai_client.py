@@ -2,15 +2,25 @@
 from __future__ import annotations
 
 import os
-from typing import Optional, Any
+import asyncio
+import threading
+import weakref
+from typing import Optional, Any, Dict, Tuple
+
+try:
+    import httpx  # installed with openai>=1.x
+except ImportError:
+    httpx = None  # type: ignore[assignment]
 
 # Try the modern client first (openai>=1.x)
 _HAVING_V1 = False
 OpenAI = None  # type: ignore[assignment]
+AsyncOpenAI = None  # type: ignore[assignment]
 
 try:
-    from openai import OpenAI as _OpenAI  # modern SDK
+    from openai import OpenAI as _OpenAI, AsyncOpenAI as _AsyncOpenAI  # modern SDK
     OpenAI = _OpenAI                      # expose name for type checkers
+    AsyncOpenAI = _AsyncOpenAI
     _HAVING_V1 = True
 except Exception:
     # Fall back to legacy module (openai==0.x)
@@ -18,40 +28,191 @@ except Exception:
     _openai  # keep for lints
 
 
+# Connection pool and timeouts for the shared clients
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5"))
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+OPENAI_MAX_KEEPALIVE = int(os.getenv("OPENAI_MAX_KEEPALIVE", "20"))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "60"))
+OPENAI_HTTP2 = os.getenv("OPENAI_HTTP2", "true").lower() in ("1", "true", "yes")
+
+try:
+    import h2  # noqa: F401  (httpx needs it for HTTP/2)
+    _HAVE_H2 = True
+except ImportError:
+    _HAVE_H2 = False
+
+_registry_lock = threading.Lock()
+_sync_clients: Dict[Tuple, Any] = {}
+_async_clients: Dict[Tuple, "_LoopLocalAsyncClient"] = {}
+
+
+def _get_api_key() -> Optional[str]:
+    return os.getenv("OPENAI_API_KEY") or None
+
+
+def _client_kwargs(api_key: str) -> Dict[str, Any]:
+    """Constructor kwargs shared by the sync and async modern clients."""
+    # Optional: allow overriding base URL / org if you use a proxy or Azure
+    base_url = os.getenv("OPENAI_BASE_URL")  # e.g., "https://api.openai.com/v1"
+    organization = os.getenv("OPENAI_ORG")
+
+    kwargs = {"api_key": api_key}
+    if base_url:
+        kwargs["base_url"] = base_url
+    if organization:
+        kwargs["organization"] = organization
+    return kwargs
+
+
+def _registry_key(api_key: str) -> Tuple:
+    # A changed key or base URL (e.g. pointing at the load-test stand-in) gets its own client
+    return (api_key, os.getenv("OPENAI_BASE_URL"), os.getenv("OPENAI_ORG"))
+
+
+def _http_client_kwargs() -> Dict[str, Any]:
+    """Pool settings for the httpx client underneath the OpenAI SDK."""
+    return {
+        "timeout": httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT),
+        "limits": httpx.Limits(
+            max_connections=OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENAI_MAX_KEEPALIVE,
+            keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY
+        ),
+        "http2": OPENAI_HTTP2 and _HAVE_H2
+    }
+
+
+class _LoopLocalAsyncClient:
+    """One AsyncOpenAI per event loop, behind a single shared object.
+
+    httpx connections belong to the event loop that opened them, and this app
+    runs several loops (uvicorn's plus one per job worker thread), so each
+    loop gets its own pooled client. Attribute access is forwarded to the
+    client of the running loop, so callers use this like an AsyncOpenAI.
+    """
+
+    def __init__(self, client_kwargs: Dict[str, Any]):
+        self._client_kwargs = client_kwargs
+        self._lock = threading.Lock()
+        self._by_loop: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+        self._loopless: Optional[Any] = None
+
+    def _build(self) -> Any:
+        # Retries are handled by LLMGateway (shared rate limiter + Retry-After aware backoff)
+        return AsyncOpenAI(
+            max_retries=0,
+            http_client=httpx.AsyncClient(**_http_client_kwargs()),
+            **self._client_kwargs
+        )
+
+    def current(self) -> Any:
+        """The client for the running event loop (created on first use)."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        with self._lock:
+            if loop is None:
+                if self._loopless is None:
+                    self._loopless = self._build()
+                return self._loopless
+            client = self._by_loop.get(loop)
+            if client is None:
+                client = self._by_loop[loop] = self._build()
+            return client
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.current(), name)
+
+    async def aclose_current(self) -> None:
+        """Close the running loop's client and its pooled connections."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._by_loop.pop(loop, None)
+        if client is not None:
+            await client.close()
+
+
 def get_client_or_none() -> Optional[Any]:
     """
-    Return an OpenAI client object if API key is set; otherwise None.
+    Return the shared OpenAI client if API key is set; otherwise None.
 
-    - If modern SDK is installed (openai>=1.x), returns OpenAI(...)
+    - If modern SDK is installed (openai>=1.x), returns a process-wide OpenAI(...)
+      with a persistent, thread-safe connection pool
     - If legacy SDK (openai==0.x), returns the legacy 'openai' module after setting api_key
     """
-    api_key = os.getenv("OPENAI_API_KEY")
-    print(f"DEBUG: OPENAI_API_KEY from env: {api_key[:20] if api_key else 'None'}...")
+    api_key = _get_api_key()
     if not api_key:
-        print("DEBUG: No API key found, returning None")
         return None
 
-    # Optional: allow overriding base URL / org if you use a proxy or Azure
-    base_url = os.getenv("OPENAI_BASE_URL")  # e.g., "https://api.openai.com/v1"
-    organization = os.getenv("OPENAI_ORG")
-
     if _HAVING_V1:
-        kwargs = {"api_key": api_key}
-        if base_url:
-            kwargs["base_url"] = base_url
-        if organization:
-            kwargs["organization"] = organization
-        return OpenAI(**kwargs)
+        key = _registry_key(api_key)
+        with _registry_lock:
+            client = _sync_clients.get(key)
+            if client is None:
+                client = _sync_clients[key] = OpenAI(
+                    max_retries=0,
+                    http_client=httpx.Client(**_http_client_kwargs()),
+                    **_client_kwargs(api_key)
+                )
+            return client
 
     # Legacy path
     import openai as _openai  # type: ignore[no-redef]
     _openai.api_key = api_key
+    organization = os.getenv("OPENAI_ORG")
     if organization:
         _openai.organization = organization
     # Legacy SDK doesn't support base_url in the same way; skip unless you've customized a proxy.
     return _openai
 
 
+def get_async_client_or_none() -> Optional[Any]:
+    """
+    Return the shared async OpenAI client if the modern SDK is installed and an API key is set.
+
+    The same object is returned on every call, so services constructed per
+    request reuse warm connections. Returns None on the legacy SDK (which has
+    no awaitable client) or without a key; callers should then fall back to
+    get_client_or_none() and run it off the event loop.
+    """
+    if not _HAVING_V1:
+        return None
+
+    api_key = _get_api_key()
+    if not api_key:
+        return None
+
+    key = _registry_key(api_key)
+    with _registry_lock:
+        client = _async_clients.get(key)
+        if client is None:
+            client = _async_clients[key] = _LoopLocalAsyncClient(_client_kwargs(api_key))
+        return client
+
+
+async def close_async_clients() -> None:
+    """Close the shared async clients' connections for the running event loop.
+
+    Call before the loop shuts down (FastAPI shutdown, job worker exit).
+    """
+    with _registry_lock:
+        clients = list(_async_clients.values())
+    for client in clients:
+        await client.aclose_current()
+
+
+def close_clients() -> None:
+    """Close the shared sync clients and forget all registered clients."""
+    with _registry_lock:
+        sync_clients = list(_sync_clients.values())
+        _sync_clients.clear()
+        _async_clients.clear()
+    for client in sync_clients:
+        client.close()
+
+
 def get_client():
     """Return a singleton OpenAI client with the right org & key."""
     key = os.getenv("OPENAI_API_KEY")
@@ -61,4 +222,4 @@ def get_client():
     # Use the older API format for compatibility
     import openai as _openai
     _openai.api_key = key
-    return _openai
\ No newline at end of file
+    return _openai
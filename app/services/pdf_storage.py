@@ -0,0 +1,160 @@
+import os
+import re
+import hashlib
+import tempfile
+from typing import Iterable, Optional, Tuple
+import anyio
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Generated quiz PDFs live on disk, named by the SHA-256 of their bytes
+QUIZ_PDF_DIR = os.getenv("QUIZ_PDF_DIR", "./quiz_pdfs")
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# Postgres advisory lock id shared by everything that adds or removes PDF files
+_PDF_FILES_LOCK = 0x71756970
+
+
+def pdf_path(sha256: str, root: Optional[str] = None) -> str:
+    if not re.fullmatch(r"[0-9a-f]{64}", sha256 or ""):
+        raise ValueError(f"Invalid PDF hash '{sha256}'")
+    return os.path.join(root or QUIZ_PDF_DIR, f"{sha256}.pdf")
+
+
+def pdf_digest(data: bytes) -> Tuple[str, int]:
+    """(sha256, size) a PDF is stored under"""
+    return hashlib.sha256(data).hexdigest(), len(data)
+
+
+def lock_pdf_files(db: Session) -> None:
+    """Serialize PDF file writes and removals with other transactions until db commits.
+
+    On SQLite the database write lock already does this, as long as the row
+    change is flushed before the file is touched. Postgres does not block an
+    insert on a concurrent delete, so take an advisory lock there.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _PDF_FILES_LOCK})
+
+
+def write_pdf(data: bytes, root: Optional[str] = None) -> Tuple[str, int]:
+    """Write PDF bytes atomically; returns (sha256, size). Identical PDFs share one file.
+
+    The file is rewritten even if it already exists, since a delete may be
+    about to remove it; callers insert the row referring to it first.
+    """
+    sha256, size = pdf_digest(data)
+    path = pdf_path(sha256, root)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return sha256, size
+
+
+def remove_pdfs(sha256s: Iterable[str], root: Optional[str] = None) -> None:
+    """Delete PDF files; callers only pass hashes no remaining row refers to, checked
+    in the transaction that deleted the rows and before it commits."""
+    for sha256 in set(sha256s):
+        try:
+            os.remove(pdf_path(sha256, root))
+        except (FileNotFoundError, ValueError):
+            pass
+
+
+class _FileRangeResponse(FileResponse):
+    """206 Partial Content for one byte range of a file."""
+
+    def __init__(self, path: str, start: int, end: int, size: int, **kwargs):
+        super().__init__(path, status_code=206, **kwargs)
+        self.start, self.end = start, end
+        self.headers["content-range"] = f"bytes {start}-{end}/{size}"
+        self.headers["content-length"] = str(end - start + 1)
+
+    async def __call__(self, scope, receive, send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"].upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        remaining = self.end - self.start + 1
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:  # File shrank underneath us; end the body anyway
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """(start, end) inclusive for a single "bytes=" range; None if unsatisfiable.
+
+    Raises ValueError for anything we don't serve partially (multiple
+    ranges, other units), which callers answer with the whole file.
+    """
+    match = _RANGE.match(header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        raise ValueError(header)
+    first, last = match.groups()
+    if first == "":  # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return None
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return None
+    return start, end
+
+
+def pdf_file_response(request: Request, sha256: str, size: int, filename: str) -> Response:
+    """Serve a stored PDF with ETag revalidation and single-range requests.
+
+    The ETag is the content hash, so it stays the same across restarts and
+    servers. The body is streamed from disk in chunks rather than read into
+    memory.
+    """
+    path = pdf_path(sha256)
+    etag = f'"{sha256}"'
+    headers = {
+        "etag": etag,
+        "accept-ranges": "bytes",
+        "cache-control": "private, no-cache"
+    }
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range.strip() == etag):
+        try:
+            byte_range = _parse_range(range_header, size)
+        except ValueError:
+            byte_range = (0, size - 1)
+        if byte_range is None:
+            return Response(status_code=416, headers={**headers, "content-range": f"bytes */{size}"})
+        if byte_range != (0, size - 1):
+            return _FileRangeResponse(path, *byte_range, size, media_type="application/pdf",
+                                      filename=filename, headers=headers)
+
+    return FileResponse(path, media_type="application/pdf", filename=filename, headers=headers)
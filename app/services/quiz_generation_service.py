@@ -1,14 +1,71 @@
+import os
+import re
 import json
+import time
 import asyncio
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator, Callable, Optional, Tuple, Union
 from pydantic import BaseModel
-from ..services.openai_client import get_client_or_none
+from ..services.llm_gateway import LLMGateway
+from ..services.circuit_breaker import CircuitOpenError
+from ..services.model_router import ModelRouter, ValidationError, router_metrics
+from ..services.code_condenser import condense_code, estimate_tokens
 
 class QuizQuestion(BaseModel):
     question: str
     code_snippet: str
     focus: str
 
+# Maximum number of quiz generation calls in flight for one fan-out request
+QUIZ_GENERATION_CONCURRENCY = int(os.getenv("QUIZ_GENERATION_CONCURRENCY", "5"))
+
+# Batching: several students' code per request, within a prompt and output budget
+QUIZ_BATCHING = os.getenv("QUIZ_BATCHING", "true").lower() in ("1", "true", "yes")
+QUIZ_BATCH_TOKEN_BUDGET = int(os.getenv("QUIZ_BATCH_TOKEN_BUDGET", "3000"))  # code tokens per request
+QUIZ_BATCH_MAX_ITEMS = int(os.getenv("QUIZ_BATCH_MAX_ITEMS", "6"))
+QUIZ_BATCH_OUTPUT_TOKENS_PER_ITEM = 600
+
+
+def pack_batches(code_by_key: Dict[str, str], token_budget: int = QUIZ_BATCH_TOKEN_BUDGET,
+                 max_items: int = QUIZ_BATCH_MAX_ITEMS) -> List[List[str]]:
+    """Group keys into batches whose code fits token_budget (first-fit decreasing).
+
+    A sample larger than the budget gets a batch of its own.
+    """
+    sizes = {key: estimate_tokens(code) for key, code in code_by_key.items()}
+    batches: List[List[str]] = []
+    used: List[int] = []
+    for key in sorted(code_by_key, key=lambda k: sizes[k], reverse=True):
+        for i, batch in enumerate(batches):
+            if len(batch) < max_items and used[i] + sizes[key] <= token_budget:
+                batch.append(key)
+                used[i] += sizes[key]
+                break
+        else:
+            batches.append([key])
+            used.append(sizes[key])
+    return batches
+
+_QUESTION_START = re.compile(r"(?:^|\n)\d\. ")
+
+
+def _partial_quiz_text(arguments: str) -> str:
+    """The quiz_text value from create_quiz arguments JSON that may still be incomplete."""
+    match = re.search(r'"quiz_text"\s*:\s*"', arguments)
+    if not match:
+        return ""
+    raw = arguments[match.end():]
+    end = re.search(r'(?<!\\)(?:\\\\)*"', raw)
+    if end:
+        raw = raw[:end.end() - 1]
+    # Drop a trailing partial escape sequence until the string decodes
+    for cut in range(0, 7):
+        try:
+            return json.loads('"' + raw[:len(raw) - cut] + '"')
+        except ValueError:
+            continue
+    return ""
+
+
 class QuizGenerationService:
     """Dedicated service for generating quiz questions from code analysis."""
     
@@ -21,155 +78,448 @@ class QuizGenerationService:
     }
     
     def __init__(self):
-        self.client = get_client_or_none()
+        self.gateway = LLMGateway()
+        self.client = self.gateway.client
+        self.router = ModelRouter(self.gateway)
     
-    async def generate_quiz_questions(self, code_content: str, assignment_name: str) -> List[QuizQuestion]:
-        """Generate quiz questions using OpenAI with function calling for reliable JSON."""
+    async def generate_quiz_questions(self, code_content: str, assignment_name: str,
+                                      use_cache: bool = True, allow_fallback: bool = True) -> List[QuizQuestion]:
+        """Generate quiz questions using OpenAI with function calling for reliable JSON.
+
+        The fast model is tried first; if its answer can't be parsed into
+        questions the request escalates to the strong model. Identical
+        requests are answered from the LLM response cache unless
+        use_cache is False. While the LLM circuit breaker is open the questions
+        come from local code analysis instead, unless allow_fallback is False
+        (then a RuntimeError is raised).
+        """
         
         if not self.client:
             raise RuntimeError("OpenAI API key not configured - quiz generation unavailable")
         
         try:
-            # Log the exact schema being sent
-            function_schema = {
-                "name": "create_quiz",
-                "description": "Return a block of text containing 5 quiz questions.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "quiz_text": {
-                            "type": "string",
-                            "description": "A block of text containing 5 numbered questions based on the provided code."
-                        }
-                    },
-                    "required": ["quiz_text"]
-                }
-            }
-            
-            print(f"DEBUG function_schema: {json.dumps(function_schema, indent=2)}")
             print(f"DEBUG function_call: {{'name': 'create_quiz'}}")
             print(f"DEBUG client type: {type(self.client)}")
             print(f"DEBUG client has 'chat': {hasattr(self.client, 'chat')}")
             print(f"DEBUG client has 'ChatCompletion': {hasattr(self.client, 'ChatCompletion')}")
             
-            # Use function calling for guaranteed JSON response
-            # Check if we have the modern SDK or legacy SDK
-            # Modern SDK has 'chat' attribute, legacy SDK has 'ChatCompletion'
-            if hasattr(self.client, 'chat') and not hasattr(self.client, 'ChatCompletion'):
-                # Modern SDK (openai>=1.x)
-                response = self.client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[
-                        {
-                            "role": "system", 
-                            "content": "You are an expert programming instructor creating quiz questions to verify that beginner Python students actually wrote and understand their own code. Return ONLY 5 numbered questions (1-5) as plain text with no answer spaces or explanations."
-                        },
-                        {
-                            "role": "user",
-                            "content": self._create_prompt(code_content, assignment_name)
-                        }
-                    ],
-                    tools=[{
-                        "type": "function",
-                        "function": function_schema
-                    }],
-                    tool_choice={"type": "function", "function": {"name": "create_quiz"}},
-                    temperature=0.6,
-                    max_tokens=1200
-                )
-            else:
-                # Legacy SDK (openai==0.x)
-                response = self.client.ChatCompletion.create(
-                    model="gpt-4o-mini",
-                    messages=[
-                        {
-                            "role": "system", 
-                            "content": "You are an expert programming instructor creating quiz questions to verify that beginner Python students actually wrote and understand their own code. Return ONLY 5 numbered questions (1-5) as plain text with no answer spaces or explanations."
-                        },
-                        {
-                            "role": "user",
-                            "content": self._create_prompt(code_content, assignment_name)
-                        }
-                    ],
-                    functions=[function_schema],
-                    function_call={"name": "create_quiz"},
-                    temperature=0.6,
-                    max_tokens=1200
-                )
-            
-            # Guard against silent schema mismatch
-            choice = response.choices[0]
-            
-            # Debug: Log the raw message
-            print(f"DEBUG raw message: {choice.message}")
-            
-            # Handle both modern and legacy API formats
-            if hasattr(self.client, 'chat') and not hasattr(self.client, 'ChatCompletion'):
-                # Modern SDK - check for tool calls
-                print(f"DEBUG tool_calls: {choice.message.tool_calls}")
-                print(f"DEBUG content: {choice.message.content}")
-                
-                if choice.message.content and not choice.message.tool_calls:
-                    raise RuntimeError(
-                        "Model returned plain text instead of calling create_quiz:\n"
-                        f"{choice.message.content[:200]}..."
-                    )
-
-                if not choice.message.tool_calls:
-                    raise RuntimeError("No tool_calls — schema mismatch or wrong model")
-                
-                # Parse tool call arguments (guaranteed JSON)
-                function_args = choice.message.tool_calls[0].function.arguments
-                quiz_data = json.loads(function_args)
-            else:
-                # Legacy SDK - check for function calls
-                print(f"DEBUG function_call: {choice.message.function_call}")
-                print(f"DEBUG content: {choice.message.content}")
-                
-                if choice.message.content and not choice.message.function_call:
-                    raise RuntimeError(
-                        "Model returned plain text instead of calling create_quiz:\n"
-                        f"{choice.message.content[:200]}..."
-                    )
-
-                if not choice.message.function_call:
-                    raise RuntimeError("No function_call — schema mismatch or wrong model")
-                
-                # Parse function call arguments (guaranteed JSON)
-                function_args = choice.message.function_call.arguments
-                quiz_data = json.loads(function_args)
-            
-            # Convert to QuizQuestion objects
-            questions = []
-            quiz_text = quiz_data.get("quiz_text", "")
-            
-            # Use regex to properly parse questions with code snippets
-            import re
+            # Use function calling for guaranteed JSON response; the router picks the model
+            request_kwargs = self.build_quiz_request(code_content, assignment_name, legacy=self.gateway.is_legacy)
             
-            pattern = re.compile(
-                r"(?P<num>\d\.) (?P<question>.*?)\s*Code snippet:\s*(?P<snippet>.*?)(?=\n\d\.|\Z)",
-                re.DOTALL
+            questions, _ = await self.router.complete(
+                "quiz", request_kwargs, self._parse_quiz_response, use_cache=use_cache
             )
+            return questions
             
-            for match in pattern.finditer(quiz_text.strip()):
-                question_text = match.group("question").strip()
-                code_snippet = match.group("snippet").strip()
-                
-                print(f"DEBUG: Parsed question: {question_text[:50]}...")
-                print(f"DEBUG: Parsed snippet: {code_snippet[:50]}...")
-                
-                questions.append(QuizQuestion(
-                    question=question_text,
-                    code_snippet=code_snippet,
-                    focus="Comprehension"
-                ))
-            
-            return questions[:5]  # Ensure exactly 5 questions
-            
+        except CircuitOpenError as e:
+            if not allow_fallback:
+                raise RuntimeError(f"Quiz generation failed: {e}")
+            # OpenAI is down or too slow; answer instantly from local code analysis
+            print(f"{e} - using code-analysis questions")
+            return self._local_questions(code_content, assignment_name)
         except Exception as e:
             print(f"AI quiz generation failed: {e}")
             raise RuntimeError(f"Quiz generation failed: {str(e)}")
     
+    async def stream_quiz_questions(self, code_content: str, assignment_name: str,
+                                    use_cache: bool = True) -> AsyncIterator[Tuple[str, Any]]:
+        """Streaming generate_quiz_questions: yields events as the model writes.
+
+        ("question", QuizQuestion) is yielded for each question once the
+        model has moved on to the next one, then ("questions", [QuizQuestion])
+        with the final set. The final set is what should be kept. If the
+        stream breaks or its output doesn't parse, the regular (escalating)
+        call produces it instead, and it may differ from what was streamed.
+        """
+        if not self.client:
+            raise RuntimeError("OpenAI API key not configured - quiz generation unavailable")
+        
+        request_kwargs = self.build_quiz_request(code_content, assignment_name, legacy=self.gateway.is_legacy)
+        tier = self.router.plan("quiz", estimate_tokens(request_kwargs["messages"][1]["content"]))[0]
+        request_kwargs["model"] = tier.model
+        started = time.monotonic()
+        try:
+            stream = await self.gateway.stream_completion(use_cache=use_cache, **request_kwargs)
+            arguments, sent, started_questions = "", 0, 0
+            async for delta in stream:
+                arguments += delta
+                text = _partial_quiz_text(arguments)
+                # Only parse when a new numbered question has started
+                if len(_QUESTION_START.findall(text)) == started_questions:
+                    continue
+                started_questions = len(_QUESTION_START.findall(text))
+                partial = self._parse_quiz_text(text)
+                # Every question but the one just started is finished
+                while sent < min(started_questions - 1, len(partial), 5):
+                    yield "question", partial[sent]
+                    sent += 1
+            try:
+                questions = self._parse_quiz_response(stream.response)
+            except Exception:
+                router_metrics.record(tier, "quiz", "invalid", time.monotonic() - started)
+                self.gateway.discard_cached(request_kwargs)
+                raise
+            router_metrics.record(tier, "quiz", "success", time.monotonic() - started)
+        except CircuitOpenError as e:
+            print(f"{e} - using code-analysis questions")
+            questions = self._local_questions(code_content, assignment_name)
+        except Exception as e:
+            print(f"Streamed quiz generation failed ({e}), retrying without streaming")
+            questions = await self.generate_quiz_questions(code_content, assignment_name, use_cache=use_cache)
+        
+        yield "questions", questions
+    
+    def build_quiz_request(self, code_content: str, assignment_name: str, legacy: bool = False) -> Dict[str, Any]:
+        """The create_quiz chat request for one code sample, without "model".
+
+        legacy selects the functions/function_call form of the old SDK.
+        """
+        function_schema = {
+            "name": "create_quiz",
+            "description": "Return a block of text containing 5 quiz questions.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "quiz_text": {
+                        "type": "string",
+                        "description": "A block of text containing 5 numbered questions based on the provided code."
+                    }
+                },
+                "required": ["quiz_text"]
+            }
+        }
+        
+        request_kwargs = {
+            "messages": [
+                {
+                    "role": "system", 
+                    "content": "You are an expert programming instructor creating quiz questions to verify that beginner Python students actually wrote and understand their own code. Return ONLY 5 numbered questions (1-5) as plain text with no answer spaces or explanations."
+                },
+                {
+                    "role": "user",
+                    "content": self._create_prompt(code_content, assignment_name)
+                }
+            ],
+            "temperature": 0.6,
+            "max_tokens": 1200
+        }
+        
+        if not legacy:
+            # Modern SDK (openai>=1.x)
+            request_kwargs["tools"] = [{
+                "type": "function",
+                "function": function_schema
+            }]
+            request_kwargs["tool_choice"] = {"type": "function", "function": {"name": "create_quiz"}}
+        else:
+            # Legacy SDK (openai==0.x)
+            request_kwargs["functions"] = [function_schema]
+            request_kwargs["function_call"] = {"name": "create_quiz"}
+        
+        return request_kwargs
+    
+    def _parse_quiz_response(self, response: Any) -> List[QuizQuestion]:
+        """Turn a create_quiz call into QuizQuestion objects; raises if unusable."""
+        quiz_data = self._function_arguments(response, "create_quiz")
+        questions = self._parse_quiz_text(quiz_data.get("quiz_text", ""))
+        if not questions:
+            raise ValidationError("create_quiz text contained no parseable questions")
+        
+        return questions[:5]  # Ensure exactly 5 questions
+    
+    def _function_arguments(self, response: Any, function_name: str) -> Dict[str, Any]:
+        """Decoded arguments of the forced function call; raises ValidationError if missing."""
+        # Guard against silent schema mismatch
+        choice = response.choices[0]
+
+        # Debug: Log the raw message
+        print(f"DEBUG raw message: {choice.message}")
+
+        # Handle both modern and legacy API formats
+        if not self.gateway.is_legacy:
+            # Modern SDK - check for tool calls
+            print(f"DEBUG tool_calls: {choice.message.tool_calls}")
+            print(f"DEBUG content: {choice.message.content}")
+
+            if choice.message.content and not choice.message.tool_calls:
+                raise ValidationError(
+                    f"Model returned plain text instead of calling {function_name}:\n"
+                    f"{choice.message.content[:200]}..."
+                )
+
+            if not choice.message.tool_calls:
+                raise ValidationError("No tool_calls — schema mismatch or wrong model")
+
+            # Parse tool call arguments (guaranteed JSON)
+            function_args = choice.message.tool_calls[0].function.arguments
+        else:
+            # Legacy SDK - check for function calls
+            print(f"DEBUG function_call: {choice.message.function_call}")
+            print(f"DEBUG content: {choice.message.content}")
+
+            if choice.message.content and not choice.message.function_call:
+                raise ValidationError(
+                    f"Model returned plain text instead of calling {function_name}:\n"
+                    f"{choice.message.content[:200]}..."
+                )
+
+            if not choice.message.function_call:
+                raise ValidationError("No function_call — schema mismatch or wrong model")
+
+            # Parse function call arguments (guaranteed JSON)
+            function_args = choice.message.function_call.arguments
+
+        try:
+            return json.loads(function_args)
+        except json.JSONDecodeError as e:
+            raise ValidationError(f"{function_name} arguments are not valid JSON: {e}")
+    
+    def _parse_quiz_text(self, quiz_text: str) -> List[QuizQuestion]:
+        """Split numbered 'question / Code snippet:' text into QuizQuestion objects."""
+        questions = []
+
+        # Use regex to properly parse questions with code snippets
+        pattern = re.compile(
+            r"(?P<num>\d\.) (?P<question>.*?)\s*Code snippet:\s*(?P<snippet>.*?)(?=\n\d\.|\Z)",
+            re.DOTALL
+        )
+
+        for match in pattern.finditer(quiz_text.strip()):
+            question_text = match.group("question").strip()
+            code_snippet = match.group("snippet").strip()
+
+            print(f"DEBUG: Parsed question: {question_text[:50]}...")
+            print(f"DEBUG: Parsed snippet: {code_snippet[:50]}...")
+
+            questions.append(QuizQuestion(
+                question=question_text,
+                code_snippet=code_snippet,
+                focus="Comprehension"
+            ))
+
+        return questions
+    
+    def _local_questions(self, code_content: str, assignment_name: str) -> List[QuizQuestion]:
+        """Deterministic questions built from the code itself, no API call."""
+        from .ai_analysis_service import create_intelligent_questions
+        return [
+            QuizQuestion(
+                question=q["question"],
+                code_snippet=q.get("code_snippet", ""),
+                focus=q.get("focus", "Comprehension")
+            )
+            for q in create_intelligent_questions(code_content, assignment_name)[:5]
+        ]
+
+    async def generate_quiz_questions_per_submission(
+        self,
+        code_by_key: Dict[str, str],
+        assignment_name: str,
+        use_cache: bool = True,
+        max_concurrency: Optional[int] = None,
+        on_result: Optional[Callable[[str, Any], None]] = None
+    ) -> Dict[str, Union[List[QuizQuestion], Exception]]:
+        """Generate a separate question set for each code sample concurrently.
+
+        At most max_concurrency (default QUIZ_GENERATION_CONCURRENCY) calls run
+        at once. Returns a dict with the same keys as code_by_key; a key whose
+        generation failed maps to the exception instead of a question list.
+        on_result(key, questions_or_exception) is called as each key finishes.
+        """
+        if not self.client:
+            raise RuntimeError("OpenAI API key not configured - quiz generation unavailable")
+        
+        semaphore = asyncio.Semaphore(max(1, max_concurrency or QUIZ_GENERATION_CONCURRENCY))
+        
+        async def generate_one(key: str) -> List[QuizQuestion]:
+            async with semaphore:
+                try:
+                    questions = await self.generate_quiz_questions(code_by_key[key], assignment_name, use_cache=use_cache)
+                except Exception as e:
+                    questions = e
+            if on_result:
+                on_result(key, questions)
+            if isinstance(questions, Exception):
+                raise questions
+            return questions
+        
+        keys = list(code_by_key)
+        results = await asyncio.gather(
+            *(generate_one(key) for key in keys),
+            return_exceptions=True
+        )
+        return dict(zip(keys, results))
+    
+    async def generate_quiz_questions_batched(
+        self,
+        code_by_key: Dict[str, str],
+        assignment_name: str,
+        use_cache: bool = True,
+        max_concurrency: Optional[int] = None,
+        token_budget: Optional[int] = None,
+        max_items: Optional[int] = None,
+        on_result: Optional[Callable[[str, Any], None]] = None
+    ) -> Dict[str, Union[List[QuizQuestion], Exception]]:
+        """Like generate_quiz_questions_per_submission, with several samples per request.
+
+        Samples are packed into create_quizzes tool calls that return one
+        quiz per sample. A batch whose reply is unusable is split in half and
+        retried. Samples missing from an otherwise good reply are retried the
+        same way. A single sample falls back to generate_quiz_questions.
+        on_result is called per key as each batch finishes.
+        """
+        if not self.client:
+            raise RuntimeError("OpenAI API key not configured - quiz generation unavailable")
+        
+        semaphore = asyncio.Semaphore(max(1, max_concurrency or QUIZ_GENERATION_CONCURRENCY))
+        batches = pack_batches(
+            code_by_key, token_budget or QUIZ_BATCH_TOKEN_BUDGET, max_items or QUIZ_BATCH_MAX_ITEMS
+        )
+        
+        results: Dict[str, Union[List[QuizQuestion], Exception]] = {}
+        for finished in asyncio.as_completed([
+            self._generate_batch(batch, code_by_key, assignment_name, use_cache, semaphore) for batch in batches
+        ]):
+            batch_results = await finished
+            results.update(batch_results)
+            if on_result:
+                for key, questions in batch_results.items():
+                    on_result(key, questions)
+        return {key: results[key] for key in code_by_key}
+    
+    async def _generate_batch(self, keys: List[str], code_by_key: Dict[str, str], assignment_name: str,
+                              use_cache: bool, semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+        if len(keys) == 1:
+            async with semaphore:
+                try:
+                    return {keys[0]: await self.generate_quiz_questions(
+                        code_by_key[keys[0]], assignment_name, use_cache=use_cache
+                    )}
+                except Exception as e:
+                    return {keys[0]: e}
+        
+        try:
+            async with semaphore:
+                results = await self._request_batch(keys, code_by_key, assignment_name, use_cache)
+        except CircuitOpenError:
+            # Singles answer instantly from local code analysis while the breaker is open
+            results = {}
+            retry = [[key] for key in keys]
+        except Exception as e:
+            print(f"Quiz batch of {len(keys)} failed ({e}), splitting")
+            results = {}
+            retry = [keys[:len(keys) // 2], keys[len(keys) // 2:]]
+        else:
+            failed = [key for key in keys if key not in results]
+            if failed:
+                print(f"Quiz batch missing {len(failed)} of {len(keys)} samples, retrying them")
+            retry = [failed[:len(failed) // 2], failed[len(failed) // 2:]] if len(failed) > 1 else [failed]
+        
+        for retried in await asyncio.gather(
+            *(self._generate_batch(part, code_by_key, assignment_name, use_cache, semaphore) for part in retry if part)
+        ):
+            results.update(retried)
+        return results
+    
+    async def _request_batch(self, keys: List[str], code_by_key: Dict[str, str], assignment_name: str,
+                             use_cache: bool) -> Dict[str, List[QuizQuestion]]:
+        """One create_quizzes call for keys; returns the samples that came back valid."""
+        # Short batch-local ids keep student identifiers out of the prompt
+        ids = {str(i): key for i, key in enumerate(keys, 1)}
+        function_schema = {
+            "name": "create_quizzes",
+            "description": "Return 5 quiz questions for each submission.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "quizzes": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "submission_id": {
+                                    "type": "string",
+                                    "description": "The id shown in the submission's header."
+                                },
+                                "quiz_text": {
+                                    "type": "string",
+                                    "description": "A block of text containing 5 numbered questions based on that submission's code."
+                                }
+                            },
+                            "required": ["submission_id", "quiz_text"]
+                        }
+                    }
+                },
+                "required": ["quizzes"]
+            }
+        }
+        request_kwargs = {
+            "messages": [
+                {
+                    "role": "system",
+                    "content": "You are an expert programming instructor creating quiz questions to verify that beginner Python students actually wrote and understand their own code. Each submission is a different student; write its questions from that submission's code only."
+                },
+                {
+                    "role": "user",
+                    "content": self._create_batch_prompt(
+                        [(batch_id, code_by_key[key]) for batch_id, key in ids.items()], assignment_name
+                    )
+                }
+            ],
+            "temperature": 0.6,
+            "max_tokens": QUIZ_BATCH_OUTPUT_TOKENS_PER_ITEM * len(keys) + 200
+        }
+        if not self.gateway.is_legacy:
+            request_kwargs["tools"] = [{"type": "function", "function": function_schema}]
+            request_kwargs["tool_choice"] = {"type": "function", "function": {"name": "create_quizzes"}}
+        else:
+            request_kwargs["functions"] = [function_schema]
+            request_kwargs["function_call"] = {"name": "create_quizzes"}
+        
+        def parse(response: Any) -> Dict[str, List[QuizQuestion]]:
+            quizzes = self._function_arguments(response, "create_quizzes").get("quizzes")
+            if not isinstance(quizzes, list):
+                raise ValidationError("create_quizzes returned no quizzes array")
+            parsed = {}
+            for quiz in quizzes:
+                if not isinstance(quiz, dict):
+                    continue
+                key = ids.get(str(quiz.get("submission_id", "")).strip())
+                questions = self._parse_quiz_text(str(quiz.get("quiz_text") or ""))
+                if key and questions:
+                    parsed[key] = questions[:5]
+            if not parsed:
+                raise ValidationError("create_quizzes contained no usable quizzes")
+            return parsed
+        
+        results, _ = await self.router.complete("batch_quiz", request_kwargs, parse, use_cache=use_cache)
+        return results
+    
+    def _create_batch_prompt(self, samples: List[Any], assignment_name: str) -> str:
+        """Prompt for several submissions at once; samples are (id, code) pairs."""
+        submissions = "\n\n".join(
+            f"===== Submission {batch_id} =====\n{condense_code(code)}" for batch_id, code in samples
+        )
+        return f"""
+You are an expert programming instructor creating quiz questions to verify that beginner Python students actually wrote and understand their own code.
+
+Below are {len(samples)} separate submissions for the assignment "{assignment_name}", each from a different student. For EACH submission, write 5 thoughtful quiz questions that test that student's understanding of their own implementation, and return them in the quizzes array with the submission's id.
+
+📋 Guidelines:
+
+Each question must refer directly to a specific part of that submission's code and include a short, relevant code snippet (max 6 lines) to illustrate what it asks about.
+
+Format: First the question, then on the next line write:
+Code snippet:
+followed by the snippet itself, on a separate indented line.
+
+Focus on comprehension, reasoning, and application — NOT memorization.
+Do NOT ask generic questions that could apply to any code, and never mix code from different submissions.
+Write the questions as plain numbered text (1–5). No answers, no blanks, no explanations.
+
+{submissions}
+"""
+    
     def _create_prompt(self, code_content: str, assignment_name: str) -> str:
         """Create a simple prompt for quiz generation."""
         return f"""
@@ -190,7 +540,7 @@ Do NOT ask generic questions that could apply to any code — base all questions
 Write the questions as plain numbered text (1–5). No answers, no blanks, no explanations.
 
 Here is the student's code:
-{code_content[:2000]}
+{condense_code(code_content)}
 """
     
 # No fallback questions - fail cleanly if AI is unavailable 
\ No newline at end of file
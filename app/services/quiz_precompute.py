@@ -0,0 +1,51 @@
+import os
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from ..models import PrecomputedQuestions, Submission, Job
+from .job_queue import enqueue_job
+from .single_flight import submission_hash
+from .quiz_generation_service import QuizQuestion
+
+# Opt-in: generate each uploaded submission's questions in the background
+SPECULATIVE_QUIZ_GENERATION = os.getenv("SPECULATIVE_QUIZ_GENERATION", "false").lower() in ("1", "true", "yes")
+# Below the default (0) so webhook analysis and other live work always run first
+SPECULATIVE_JOB_PRIORITY = int(os.getenv("SPECULATIVE_JOB_PRIORITY", "-10"))
+
+
+def get_precomputed(db: Session, assignment_name: str,
+                    content_hashes: Iterable[str]) -> Dict[str, List[QuizQuestion]]:
+    """Precomputed question sets for the given content hashes (missing ones are left out)."""
+    hashes = list(set(content_hashes))
+    if not hashes:
+        return {}
+    rows = db.query(PrecomputedQuestions).filter(
+        PrecomputedQuestions.assignment_name == assignment_name,
+        PrecomputedQuestions.content_hash.in_(hashes)
+    ).all()
+    return {row.content_hash: [QuizQuestion(**question) for question in row.questions] for row in rows}
+
+
+def store_precomputed(db: Session, assignment_name: str, code_hash: str, questions: List[QuizQuestion],
+                      submission_id: Optional[int] = None) -> None:
+    """Save a question set for later class PDFs; a concurrent duplicate is ignored."""
+    db.add(PrecomputedQuestions(
+        content_hash=code_hash,
+        assignment_name=assignment_name,
+        questions=[question.model_dump() for question in questions],
+        source_submission_id=submission_id
+    ))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+
+
+def enqueue_pregeneration(db: Session, submission: Submission) -> Optional[Job]:
+    """Queue low-priority question generation for an upload, unless already done."""
+    code_hash = submission_hash(submission)
+    if get_precomputed(db, submission.assignment_name, [code_hash]):
+        return None
+    return enqueue_job(
+        db, "pregenerate_quiz", {"submission_id": submission.id}, priority=SPECULATIVE_JOB_PRIORITY
+    )
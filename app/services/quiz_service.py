@@ -1,6 +1,7 @@
 from typing import Dict, Any, List
 from sqlalchemy.orm import Session
 from ..models import QuizPDF
+from .pdf_storage import lock_pdf_files, pdf_digest, write_pdf
 from datetime import datetime
 from fpdf import FPDF
     
@@ -98,23 +99,31 @@ def create_quiz_pdf(quiz_data: List[Dict[str, Any]], assignment_name: str) -> Di
     }
 
 def store_quiz_pdf_in_db(pdf_info: Dict[str, Any], db: Session) -> QuizPDF:
-    """Store generated PDF in the database"""
+    """Write the generated PDF to the PDF directory and record it in the database"""
     
     # Extract student IDs from quiz data
     student_ids = [student['student_id'] for student in pdf_info['quiz_data']]
+    pdf_data = bytes(pdf_info['pdf_data'])
+    sha256, file_size = pdf_digest(pdf_data)
     
     # Create QuizPDF record
     quiz_pdf = QuizPDF(
         assignment_name=pdf_info['assignment_name'],
         pdf_filename=pdf_info['pdf_filename'],
-        pdf_data=pdf_info['pdf_data'],
+        sha256=sha256,
+        file_size=file_size,
         student_count=pdf_info['student_count'],
         student_ids=student_ids,
         quiz_data=pdf_info['quiz_data'],
         created_at=datetime.utcnow()
     )
     
+    # Row first, then the file: a delete of another PDF with the same bytes either
+    # finished before our flush or waits for our commit and sees this row
+    lock_pdf_files(db)
     db.add(quiz_pdf)
+    db.flush()
+    write_pdf(pdf_data)
     db.commit()
     db.refresh(quiz_pdf)
         
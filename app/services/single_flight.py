@@ -0,0 +1,172 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+import sqlite3
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+# Cross-worker coordination file and timings
+SINGLE_FLIGHT_PATH = os.getenv("SINGLE_FLIGHT_PATH", "./llm_singleflight.db")
+SINGLE_FLIGHT_LEASE = float(os.getenv("SINGLE_FLIGHT_LEASE", "600"))  # seconds a leader may hold a key
+SINGLE_FLIGHT_RESULT_TTL = float(os.getenv("SINGLE_FLIGHT_RESULT_TTL", "30"))  # late duplicates reuse the result
+SINGLE_FLIGHT_POLL_INTERVAL = 0.25
+
+
+def content_hash(content: Optional[str]) -> str:
+    """SHA-256 of a submission's code."""
+    return hashlib.sha256((content or "").encode("utf-8")).hexdigest()
+
+
+def submission_hash(submission) -> str:
+    """content_hash() of a submission's code, from its stored hash so the code isn't loaded."""
+    return submission.content_hash or content_hash(None)
+
+
+def make_flight_key(namespace: str, assignment_name: str, content_hashes: Iterable[str], **options: Any) -> str:
+    """Key identifying one piece of work: the assignment plus the set of submission hashes.
+
+    Order and duplicates of the hashes don't matter. Options (e.g. the
+    student ids a PDF is addressed to, or the generation mode) are part of
+    the key so that different outputs never share a result.
+    """
+    payload = {
+        "namespace": namespace,
+        "assignment": assignment_name,
+        "hashes": sorted(set(content_hashes)),
+        "options": options
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """Coalesces identical concurrent work into one execution.
+
+    Within a process, callers with the same key await one shared task (which
+    keeps running if the caller that started it disconnects). Across uvicorn
+    workers, a lease row in a small SQLite file (claimed under ``BEGIN
+    IMMEDIATE``, like the rate limiter) elects one leader; the others poll
+    until the leader stores its JSON result and then return that result.
+    A leader that fails releases the key, so a waiting worker takes over.
+    """
+
+    def __init__(self, path: str = SINGLE_FLIGHT_PATH, lease_seconds: float = SINGLE_FLIGHT_LEASE,
+                 result_ttl: float = SINGLE_FLIGHT_RESULT_TTL):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.result_ttl = result_ttl
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS single_flight (
+                key TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                lease_until REAL NOT NULL,
+                result TEXT,
+                completed_at REAL
+            )
+        """)
+
+    async def run(self, key: str, work: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Run work() once per key; returns (result, shared).
+
+        shared is False for the caller whose work() actually ran and True for
+        every caller that received another caller's result. The result must
+        be JSON-serializable so other workers can read it.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            task = self._inflight.get(key)
+            shared = task is not None and task.get_loop() is loop and not task.done()
+            if not shared:
+                task = loop.create_task(self._lead_or_follow(key, work))
+                self._inflight[key] = task
+                task.add_done_callback(lambda finished: self._forget(key, finished))
+        result, ran_here = await asyncio.shield(task)
+        return result, shared or not ran_here
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        with self._lock:
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+
+    async def _lead_or_follow(self, key: str, work: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        while True:
+            claimed, result = await asyncio.to_thread(self._claim, key)
+            if result is not None:
+                return result, False
+            if claimed:
+                break
+            await asyncio.sleep(SINGLE_FLIGHT_POLL_INTERVAL)
+
+        try:
+            result = await work()
+        except BaseException:
+            await asyncio.to_thread(self._release, key)
+            raise
+        await asyncio.to_thread(self._complete, key, result)
+        return result, True
+
+    def _claim(self, key: str) -> Tuple[bool, Any]:
+        """Returns (True, None) if we lead, (False, result) if done, (False, None) to keep waiting."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                self._conn.execute(
+                    "DELETE FROM single_flight WHERE (completed_at IS NOT NULL AND completed_at < ?) "
+                    "OR (completed_at IS NULL AND lease_until < ?)",
+                    (now - self.result_ttl, now)
+                )
+                row = self._conn.execute(
+                    "SELECT result, completed_at FROM single_flight WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute(
+                        "INSERT INTO single_flight (key, owner, lease_until) VALUES (?, ?, ?)",
+                        (key, self.owner, now + self.lease_seconds)
+                    )
+                    outcome = (True, None)
+                elif row[1] is not None:
+                    outcome = (False, json.loads(row[0]))
+                else:
+                    outcome = (False, None)
+                self._conn.execute("COMMIT")
+                return outcome
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _complete(self, key: str, result: Any) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE single_flight SET result = ?, completed_at = ? WHERE key = ? AND owner = ?",
+                (json.dumps(result, default=str), time.time(), key, self.owner)
+            )
+
+    def _release(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM single_flight WHERE key = ? AND owner = ?", (key, self.owner))
+
+    def in_flight(self) -> int:
+        """Number of keys currently being worked on in this process."""
+        with self._lock:
+            return len(self._inflight)
+
+
+_single_flight: Optional[SingleFlight] = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    """Return the process-wide single-flight coordinator."""
+    global _single_flight
+    with _single_flight_lock:
+        if _single_flight is None:
+            _single_flight = SingleFlight()
+        return _single_flight
@@ -0,0 +1,146 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+# Idempotency store configuration from environment
+WEBHOOK_IDEMPOTENCY_PATH = os.getenv("WEBHOOK_IDEMPOTENCY_PATH", "./webhook_deliveries.db")
+# GitHub lets a delivery be redelivered for 3 days; keep keys a little longer than that
+WEBHOOK_IDEMPOTENCY_TTL = float(os.getenv("WEBHOOK_IDEMPOTENCY_TTL", str(4 * 24 * 3600)))
+# Seconds an unfinished claim blocks duplicates; after that a crashed worker's key can be taken over
+WEBHOOK_IDEMPOTENCY_LEASE = float(os.getenv("WEBHOOK_IDEMPOTENCY_LEASE", "300"))
+WEBHOOK_IDEMPOTENCY_CLEANUP_INTERVAL = 300  # seconds between expired-key sweeps
+
+
+def delivery_key(delivery_id: str) -> str:
+    """Key for one X-GitHub-Delivery; redeliveries of the same event reuse the id."""
+    return f"delivery:{delivery_id}"
+
+
+def commit_key(repository: str, sha: str) -> str:
+    """Key for one commit, so the same commit arriving in a different delivery is not analyzed twice."""
+    return f"commit:{repository}:{sha}"
+
+
+class WebhookIdempotencyStore:
+    """Remembers which webhook deliveries and commits have been processed.
+
+    Lives in its own small SQLite file (like the LLM cache and single-flight
+    lease table), so a duplicate is recognized with one primary-key lookup and
+    never reaches the application database or the LLM. A key is claimed
+    before processing and completed with a small JSON result afterwards;
+    a failed attempt releases its keys so GitHub's redelivery is processed.
+    Keys expire after ttl_seconds.
+    """
+
+    def __init__(self, path: str = WEBHOOK_IDEMPOTENCY_PATH, ttl_seconds: float = WEBHOOK_IDEMPOTENCY_TTL,
+                 lease_seconds: float = WEBHOOK_IDEMPOTENCY_LEASE):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._last_cleanup = 0.0
+        self._duplicates = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS webhook_keys (
+                key TEXT PRIMARY KEY,
+                claimed_at REAL NOT NULL,
+                completed_at REAL,
+                result TEXT,
+                expires_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_webhook_keys_expires_at ON webhook_keys (expires_at)")
+
+    def claim(self, key: str) -> Tuple[bool, Optional[Any]]:
+        """Returns (True, None) if the caller should process key.
+
+        A duplicate gets (False, result) once the first attempt completed,
+        or (False, None) while it is still being processed.
+        """
+        with self._lock:
+            claimed, results = self._claim_keys([key])
+        return (True, None) if claimed else (False, results.get(key))
+
+    def claim_many(self, keys: Iterable[str]) -> Set[str]:
+        """Claim several keys in one transaction; returns the ones the caller should process."""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return set()
+        with self._lock:
+            claimed, _ = self._claim_keys(keys)
+        return claimed
+
+    def complete(self, keys: Iterable[str], result: Any = None) -> None:
+        """Mark claimed keys processed; later duplicates receive result."""
+        now = time.time()
+        payload = json.dumps(result, default=str)
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE webhook_keys SET completed_at = ?, result = ? WHERE key = ?",
+                [(now, payload, key) for key in keys]
+            )
+
+    def release(self, keys: Iterable[str]) -> None:
+        """Forget claimed but unfinished keys so a retry is processed."""
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM webhook_keys WHERE key = ? AND completed_at IS NULL", [(key,) for key in keys]
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            keys, pending = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(completed_at IS NULL), 0) FROM webhook_keys"
+            ).fetchone()
+            return {
+                "keys": keys,
+                "pending": pending,
+                "duplicates": self._duplicates,
+                "ttl_seconds": self.ttl_seconds
+            }
+
+    def _claim_keys(self, keys) -> Tuple[Set[str], Dict[str, Any]]:
+        now = time.time()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            if now - self._last_cleanup >= WEBHOOK_IDEMPOTENCY_CLEANUP_INTERVAL:
+                self._conn.execute("DELETE FROM webhook_keys WHERE expires_at < ?", (now,))
+                self._last_cleanup = now
+            claimed, results = set(), {}
+            for key in keys:
+                row = self._conn.execute(
+                    "SELECT claimed_at, completed_at, result, expires_at FROM webhook_keys WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None or row[3] < now or (row[1] is None and row[0] + self.lease_seconds < now):
+                    # New, expired, or abandoned by a worker that died mid-processing
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO webhook_keys (key, claimed_at, expires_at) VALUES (?, ?, ?)",
+                        (key, now, now + self.ttl_seconds)
+                    )
+                    claimed.add(key)
+                else:
+                    self._duplicates += 1
+                    results[key] = json.loads(row[2]) if row[1] is not None else None
+            self._conn.execute("COMMIT")
+            return claimed, results
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+
+_store: Optional[WebhookIdempotencyStore] = None
+_store_lock = threading.Lock()
+
+
+def get_webhook_idempotency_store() -> WebhookIdempotencyStore:
+    """Return the process-wide webhook idempotency store."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = WebhookIdempotencyStore()
+        return _store
@@ -7,6 +7,7 @@ Demonstrates how the AI analyzes submissions with complete historical context
 import os
 import sys
 import json
+import asyncio
 from datetime import datetime, timedelta
 
 # Add the app directory to the path
@@ -117,7 +118,7 @@ def test_ai_analysis_with_history():
         print("\n🔍 Running AI analysis with historical context...")
         
         # Perform AI analysis
-        analysis = ai_service.analyze_submission_with_ai(current_submission, db)
+        analysis = asyncio.run(ai_service.analyze_submission_with_ai(current_submission, db))
         
         print(f"✅ Analysis completed: {analysis.analysis_type}")
         print(f"✅ Confidence score: {analysis.confidence_score}")
@@ -165,7 +166,7 @@ def test_ai_analysis_with_history():
         
         # Generate AI quiz
         print("\n📝 Generating AI-powered quiz...")
-        quiz = ai_service.generate_ai_quiz(current_submission, analysis, db)
+        quiz = asyncio.run(ai_service.generate_ai_quiz(current_submission, analysis, db))
         
         print(f"✅ Quiz generated: {quiz.quiz_type}")
         print(f"✅ Total questions: {quiz.total_questions}")
@@ -209,7 +210,7 @@ def test_fallback_analysis():
         print("🔍 Running fallback analysis...")
         
         # Perform analysis (should use fallback)
-        analysis = ai_service.analyze_submission_with_ai(current_submission, db)
+        analysis = asyncio.run(ai_service.analyze_submission_with_ai(current_submission, db))
         
         print(f"✅ Fallback analysis completed: {analysis.analysis_type}")
         print(f"✅ Analysis method: {analysis.results.get('analysis_method', 'unknown')}")
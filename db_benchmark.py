@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Concurrent-request latency with the sync vs async database session
+
+Seeds a throwaway SQLite database, then sends many quick requests (admin
+student listing and quiz PDF downloads) while a few slow report-style
+queries run at the same time, in two modes:
+
+  sync    the way every route used the database before: the synchronous
+          Session inside `async def` routes, so each query runs on the
+          event loop and a slow one stalls every other request
+  async   the AsyncSession routes (aiosqlite), where queries wait without
+          blocking the event loop
+
+Prints p50 / p95 / max latency of the quick requests for each mode.
+Keep --concurrency + --slow below the sync engine's pool (5 + 10 overflow)
+for sync mode: past that, sessions wait for a connection with a blocking
+call on the event loop, and nothing can return one, so it deadlocks.
+
+Examples:
+    python db_benchmark.py
+    python db_benchmark.py --students 500 --requests 200 --concurrency 10 --slow 3 --slow-rows 1000000
+"""
+
+import os
+import sys
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+SLOW_SQL = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < :n) SELECT count(*) FROM c"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Sync vs async database session latency benchmark")
+    parser.add_argument("--mode", choices=["sync", "async", "both"], default="both")
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=100, help="quick requests per mode")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--slow", type=int, default=2, help="slow queries kept running alongside")
+    parser.add_argument("--slow-rows", type=int, default=300_000, help="size of each slow query")
+    parser.add_argument("--database", default="./db_benchmark.db")
+    return parser.parse_args()
+
+
+def configure_environment(args):
+    """Must run before any app module is imported (they read config at import time)."""
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(args.database + suffix):
+            os.remove(args.database + suffix)
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.database}"
+    os.environ["QUIZ_PDF_DIR"] = tempfile.mkdtemp(prefix="db_benchmark_pdfs_")
+    os.environ["JOB_WORKERS_IN_PROCESS"] = "false"
+
+
+def seed(args):
+    from app.models import Base, engine, Student, Submission
+    from app.models.database import SessionLocal
+    from app.services.quiz_service import create_quiz_pdf, store_quiz_pdf_in_db
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        students = [Student(student_id=f"BENCH{i:04d}", name=f"Bench Student {i:04d}", is_approved=True, block=4)
+                    for i in range(args.students)]
+        db.add_all(students)
+        db.commit()
+        for i, student in enumerate(students):
+            for assignment in ("Calculator", "Guessing Game"):
+                code = f"def solve_{i}(values):\n    return sum(v for v in values if v % {i % 7 + 2} == 0)\n"
+                db.add(Submission(student_id=student.id, assignment_name=assignment, file_name=f"solve_{i}.py",
+                                  file_content=code))
+        db.commit()
+        quiz_data = [{"student_id": s.student_id, "name": s.name,
+                      "questions": [{"question_text": "What does solve() return?", "question_number": 1}]}
+                     for s in students[:20]]
+        return store_quiz_pdf_in_db(create_quiz_pdf(quiz_data, "Calculator"), db).id
+    finally:
+        db.close()
+
+
+def build_app(args):
+    from fastapi import Depends, FastAPI, Request
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm import Session
+    from app.models import get_db, get_async_db, QuizPDF
+    from app.api.admin import router as admin_router, _list_students
+    from app.api.pagination import PageParams
+    from app.services.pdf_storage import pdf_file_response
+
+    app = FastAPI()
+    app.include_router(admin_router, prefix="/admin")
+
+    # The pre-AsyncSession versions of the migrated routes, for comparison
+    @app.get("/sync/admin/students")
+    async def list_students_sync(limit: int = 50, db: Session = Depends(get_db)):
+        return _list_students(db, None, PageParams(limit, None, None, False))
+
+    @app.get("/sync/admin/quiz-pdfs/{pdf_id}/download")
+    async def download_quiz_pdf_sync(pdf_id: int, request: Request, db: Session = Depends(get_db)):
+        quiz_pdf = db.query(QuizPDF.sha256, QuizPDF.file_size, QuizPDF.pdf_filename).filter(QuizPDF.id == pdf_id).first()
+        return pdf_file_response(request, quiz_pdf.sha256, quiz_pdf.file_size, quiz_pdf.pdf_filename)
+
+    @app.get("/sync/slow")
+    async def slow_sync(db: Session = Depends(get_db)):
+        return {"rows": db.execute(text(SLOW_SQL), {"n": args.slow_rows}).scalar()}
+
+    @app.get("/async/slow")
+    async def slow_async(db: AsyncSession = Depends(get_async_db)):
+        return {"rows": (await db.execute(text(SLOW_SQL), {"n": args.slow_rows})).scalar()}
+
+    return app
+
+
+def summarize(label, latencies, failures, elapsed, slow_done):
+    from app.services.llm_metrics import percentile
+
+    print(f"\n📊 {label}")
+    print(f"   quick requests: {len(latencies)} ok, {failures} failed, wall time {elapsed:.2f}s "
+          f"({slow_done} slow queries finished alongside)")
+    if latencies:
+        print(f"   latency p50: {percentile(latencies, 50) * 1000:.1f}ms  "
+              f"p95: {percentile(latencies, 95) * 1000:.1f}ms  max: {max(latencies) * 1000:.1f}ms")
+
+
+async def run_mode(mode, args, app, pdf_id):
+    import httpx
+
+    prefix = "/sync" if mode == "sync" else ""
+    quick_paths = [f"{prefix}/admin/students?limit=50", f"{prefix}/admin/quiz-pdfs/{pdf_id}/download"]
+    headers = {"X-Admin-Password": "quizscope!"}
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies, failures, slow_done = [], 0, 0
+    finished = asyncio.Event()
+
+    async def quick(client, n):
+        nonlocal failures
+        async with semaphore:
+            started = time.monotonic()
+            response = await client.get(quick_paths[n % len(quick_paths)], headers=headers)
+            if response.status_code == 200:
+                latencies.append(time.monotonic() - started)
+            else:
+                failures += 1
+
+    async def slow(client):
+        nonlocal slow_done
+        while not finished.is_set():
+            await client.get(f"/{mode}/slow")
+            slow_done += 1
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=600) as client:
+        await client.get(quick_paths[0], headers=headers)  # Warm up connections and caches
+        slow_tasks = [asyncio.create_task(slow(client)) for _ in range(args.slow)]
+        await asyncio.sleep(0.05)  # Let the slow queries get going
+        started = time.monotonic()
+        await asyncio.gather(*(quick(client, n) for n in range(args.requests)))
+        elapsed = time.monotonic() - started
+        finished.set()
+        await asyncio.gather(*slow_tasks)
+
+    summarize(f"{mode}: {args.requests} quick requests, {args.slow} slow queries running",
+              latencies, failures, elapsed, slow_done)
+
+
+def main():
+    args = parse_args()
+    configure_environment(args)
+    pdf_id = seed(args)
+    app = build_app(args)
+    print(f"🚀 {args.students} students, slow query of {args.slow_rows:,} rows x {args.slow}")
+
+    async def run():
+        from app.models.database import close_async_engine
+
+        for mode in (["sync", "async"] if args.mode == "both" else [args.mode]):
+            await run_mode(mode, args, app, pdf_id)
+        await close_async_engine()
+
+    try:
+        asyncio.run(run())
+    finally:
+        shutil.rmtree(os.environ["QUIZ_PDF_DIR"], ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
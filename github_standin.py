@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Local GitHub REST API stand-in for testing the cached GitHub client
+
+Serves /repos/{owner}/{repo}, /repos/{owner}/{repo}/commits/{sha} and
+/repos/{owner}/{repo}/contents/{path}?ref= from a fixtures file. Like
+GitHub it returns ETag and Last-Modified headers, answers matching
+conditional requests with 304, and sends X-RateLimit-* headers where
+only non-304 responses use up the limit. Point the app at it with:
+
+    GITHUB_API_URL=http://127.0.0.1:8801 GIT_MIRROR_ENABLED=false
+
+Fixtures format:
+    {"class/calculator": {"repo": {...}, "commits": {"<sha>": {...}}, "contents": {"<sha>:<path>": "..."}}}
+"""
+
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+from email.utils import formatdate
+from typing import Any, Dict, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+
+class GitHubStandinState:
+    """Fixture data plus the request counters and rate limit the stand-in reports."""
+
+    def __init__(self, fixtures: Dict[str, Any], rate_limit: int = 5000):
+        self.fixtures = fixtures
+        self.rate_limit = rate_limit
+        self.remaining = rate_limit
+        self.reset = int(time.time()) + 3600
+        self.last_modified = formatdate(time.time(), usegmt=True)
+        self.stats = {"requests": 0, "not_modified": 0}
+        self._lock = threading.Lock()
+
+    def respond(self, request: Request, body: str, media_type: str) -> Response:
+        etag = '"' + hashlib.sha256(body.encode("utf-8")).hexdigest()[:32] + '"'
+        with self._lock:
+            self.stats["requests"] += 1
+            not_modified = request.headers.get("if-none-match") == etag
+            if not_modified:
+                self.stats["not_modified"] += 1
+            else:
+                self.remaining = max(0, self.remaining - 1)
+            headers = {
+                "ETag": etag,
+                "Last-Modified": self.last_modified,
+                "X-RateLimit-Limit": str(self.rate_limit),
+                "X-RateLimit-Remaining": str(self.remaining),
+                "X-RateLimit-Used": str(self.rate_limit - self.remaining),
+                "X-RateLimit-Reset": str(self.reset),
+                "X-RateLimit-Resource": "core"
+            }
+        if not_modified:
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type=media_type, headers=headers)
+
+
+def create_github_standin_app(state: GitHubStandinState) -> FastAPI:
+    app = FastAPI(title="GitHub API stand-in")
+
+    def not_found():
+        return JSONResponse(status_code=404, content={"message": "Not Found"})
+
+    @app.get("/repos/{owner}/{repo}")
+    async def get_repository(owner: str, repo: str, request: Request):
+        fixture = state.fixtures.get(f"{owner}/{repo}")
+        if not fixture:
+            return not_found()
+        return state.respond(request, json.dumps(fixture.get("repo", {"full_name": f"{owner}/{repo}"})),
+                             "application/json")
+
+    @app.get("/repos/{owner}/{repo}/commits/{sha}")
+    async def get_commit(owner: str, repo: str, sha: str, request: Request):
+        commit = state.fixtures.get(f"{owner}/{repo}", {}).get("commits", {}).get(sha)
+        if commit is None:
+            return not_found()
+        return state.respond(request, json.dumps({"sha": sha, **commit}), "application/json")
+
+    @app.get("/repos/{owner}/{repo}/contents/{path:path}")
+    async def get_contents(owner: str, repo: str, path: str, ref: str, request: Request):
+        content = state.fixtures.get(f"{owner}/{repo}", {}).get("contents", {}).get(f"{ref}:{path}")
+        if content is None:
+            return not_found()
+        return state.respond(request, content, "application/vnd.github.raw")
+
+    @app.get("/stats")
+    async def get_stats():
+        return {**state.stats, "rate_limit_remaining": state.remaining}
+
+    return app
+
+
+def start_github_standin_in_thread(state: GitHubStandinState, host: str = "127.0.0.1",
+                                   port: int = 0) -> Tuple[Any, str]:
+    """Serve the stand-in from a background thread; returns (server, base_url).
+
+    Call server.should_exit = True to stop it.
+    """
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(create_github_standin_app(state), host=host, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True, name="github-standin")
+    thread.start()
+    deadline = time.time() + 10
+    while not server.started:
+        if time.time() > deadline or not thread.is_alive():
+            raise RuntimeError("GitHub stand-in server failed to start")
+        time.sleep(0.01)
+    bound_port = server.servers[0].sockets[0].getsockname()[1]
+    return server, f"http://{host}:{bound_port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GitHub REST API stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8801)
+    parser.add_argument("--fixtures", required=True, help="JSON file of repositories, commits and contents")
+    parser.add_argument("--rate-limit", type=int, default=5000)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    fixtures = json.loads(Path(args.fixtures).read_text())
+    state = GitHubStandinState(fixtures, rate_limit=args.rate_limit)
+    print(f"GitHub stand-in serving {len(fixtures)} repositories on http://{args.host}:{args.port}")
+    uvicorn.run(create_github_standin_app(state), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
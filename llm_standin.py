@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+Local OpenAI-compatible stand-in server for offline load testing
+
+Serves /v1/chat/completions with recorded or synthetic responses (streamed
+when the request asks for it), with configurable latency, server errors and
+429s, plus enough of the Files and Batches API (/v1/files, /v1/batches) to
+run offline batch jobs. Point the app at it with:
+
+    OPENAI_BASE_URL=http://127.0.0.1:8800/v1 OPENAI_API_KEY=standin
+
+Examples:
+    python llm_standin.py --latency lognormal:1.5,0.4 --rate-limit-rate 0.05
+    python llm_standin.py --recordings recordings.jsonl --error-rate 0.02
+    python llm_standin.py --record --upstream https://api.openai.com/v1 --recordings recordings.jsonl
+
+In --record mode requests are forwarded to the upstream API (using
+OPENAI_UPSTREAM_API_KEY, or the caller's Authorization header) and every
+response is appended to the recordings file for later replay.
+"""
+
+import os
+import sys
+import json
+import time
+import math
+import re
+import uuid
+import random
+import asyncio
+import argparse
+import threading
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from app.services.llm_cache import make_cache_key
+from app.services.code_condenser import estimate_tokens
+
+# Streamed answers: fraction of the sampled latency before the first chunk
+STREAM_FIRST_TOKEN_SHARE = 0.2
+
+# Request fields that don't change the answer and are left out of the replay key
+_UNKEYED_FIELDS = {"stream", "stream_options", "user", "n", "seed"}
+
+
+class LatencyModel:
+    """Response delay distribution parsed from a spec string.
+
+    fixed:SECONDS | uniform:LOW,HIGH | normal:MEAN,STDDEV | lognormal:MEDIAN,SIGMA
+    """
+
+    def __init__(self, spec: str = "fixed:0"):
+        self.spec = spec
+        kind, _, params = spec.partition(":")
+        values = [float(value) for value in params.split(",") if value.strip()]
+        if kind == "fixed" and len(values) == 1:
+            self._sample = lambda: values[0]
+        elif kind == "uniform" and len(values) == 2:
+            self._sample = lambda: random.uniform(values[0], values[1])
+        elif kind == "normal" and len(values) == 2:
+            self._sample = lambda: random.gauss(values[0], values[1])
+        elif kind == "lognormal" and len(values) == 2:
+            self._sample = lambda: random.lognormvariate(math.log(values[0]), values[1])
+        else:
+            raise ValueError(f"Invalid latency spec '{spec}'")
+
+    def sample(self) -> float:
+        return max(0.0, self._sample())
+
+
+class StandinConfig:
+    """Behaviour of the stand-in server."""
+
+    def __init__(self, latency: str = "fixed:0", error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 retry_after: float = 1.0, recordings: Optional[str] = None, record: bool = False,
+                 upstream: Optional[str] = None, strict: bool = False, batch_seconds: float = 0.0):
+        self.latency = LatencyModel(latency)
+        self.error_rate = error_rate            # fraction of calls answered with a 500
+        self.rate_limit_rate = rate_limit_rate  # fraction of calls answered with a 429
+        self.retry_after = retry_after          # Retry-After header on 429s
+        self.recordings = recordings
+        self.record = record
+        self.upstream = upstream
+        self.strict = strict                    # 404 instead of a synthetic answer when not recorded
+        self.batch_seconds = batch_seconds      # how long a Batch API job stays in_progress
+
+
+class RecordingStore:
+    """Recorded request/response pairs in a JSONL file, keyed like the LLM cache."""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self._lock = threading.Lock()
+        self._responses: Dict[str, Dict[str, Any]] = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._responses[entry["key"]] = entry["response"]
+
+    def __len__(self) -> int:
+        return len(self._responses)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._responses.get(key)
+
+    def add(self, key: str, request: Dict[str, Any], response: Dict[str, Any]) -> None:
+        with self._lock:
+            self._responses[key] = response
+            if self.path:
+                with open(self.path, "a") as f:
+                    f.write(json.dumps({"key": key, "request": request, "response": response}) + "\n")
+
+
+def replay_key(body: Dict[str, Any]) -> str:
+    return make_cache_key({k: v for k, v in body.items() if k not in _UNKEYED_FIELDS})
+
+
+def _synthetic_quiz_text() -> str:
+    return "\n".join(
+        f"{n}. What does the highlighted part of your code do, and why did you write it this way?\n"
+        f"Code snippet: result_{n} = compute(value_{n})"
+        for n in range(1, 6)
+    )
+
+
+def _synthetic_content(body: Dict[str, Any]) -> str:
+    """Plain-text answer shaped like what the calling prompt asks for."""
+    prompt = " ".join(str(message.get("content") or "") for message in body.get("messages", []))
+    if "historical_analysis" in prompt:
+        return json.dumps({
+            "historical_analysis": {"learning_trajectory": "gradual", "consistency_score": 0.8},
+            "tool_dependency": {"ai_usage_probability": 0.1, "confidence": 0.7},
+            "learning_progression": {"understanding_level": "beginner", "strengths": [], "learning_gaps": []},
+            "authentic_learning_assessment": {"authentic_learning_score": 0.8},
+            "intervention_recommendations": {"intervention_needed": False, "priority": "low"},
+            "confidence_score": 0.75
+        })
+    if "question_text" in prompt:
+        return json.dumps([
+            {
+                "question_type": "code_explanation",
+                "question_text": f"Explain what step {n} of your program does.",
+                "code_snippet": f"step_{n}()",
+                "options": [],
+                "correct_answer": "Student explanation",
+                "difficulty": "medium",
+                "learning_objectives": ["comprehension"],
+                "explanation": "Checks the student understands their own code."
+            }
+            for n in range(1, 6)
+        ])
+    return json.dumps([
+        {"question": f"Why did you structure part {n} of your solution this way?",
+         "code_snippet": "Your implementation", "focus": "Comprehension"}
+        for n in range(1, 6)
+    ])
+
+
+def synthesize_completion(body: Dict[str, Any]) -> Dict[str, Any]:
+    """A chat.completion answering body without any recording."""
+    message: Dict[str, Any] = {"role": "assistant", "content": None}
+    tools = body.get("tools") or []
+    functions = body.get("functions") or []
+    if tools or functions:
+        name = (tools[0]["function"] if tools else functions[0])["name"]
+        if name == "create_quizzes":
+            # One quiz per "===== Submission <id> =====" header in the prompt
+            prompt = "".join(str(m.get("content") or "") for m in body.get("messages", []))
+            ids = re.findall(r"===== Submission (\S+) =====", prompt)
+            arguments = json.dumps({"quizzes": [
+                {"submission_id": batch_id, "quiz_text": _synthetic_quiz_text()} for batch_id in ids
+            ]})
+        else:
+            arguments = json.dumps({"quiz_text": _synthetic_quiz_text()})
+        if tools:
+            message["tool_calls"] = [{
+                "id": f"call_{uuid.uuid4().hex[:12]}", "type": "function",
+                "function": {"name": name, "arguments": arguments}
+            }]
+            finish_reason = "tool_calls"
+        else:
+            message["function_call"] = {"name": name, "arguments": arguments}
+            finish_reason = "function_call"
+    else:
+        message["content"] = _synthetic_content(body)
+        finish_reason = "stop"
+
+    prompt_tokens = estimate_tokens(json.dumps(body.get("messages", [])))
+    completion_tokens = estimate_tokens(json.dumps(message))
+    return {
+        "id": f"chatcmpl-standin-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "standin"),
+        "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+    }
+
+
+async def stream_chunks(response: Dict[str, Any], duration: float = 0.0, piece: int = 24) -> AsyncIterator[str]:
+    """Server-sent chat.completion.chunk events replaying a completion over duration seconds."""
+    choice = response["choices"][0]
+    message = choice["message"]
+    tool_calls = message.get("tool_calls") or []
+    text = tool_calls[0]["function"]["arguments"] if tool_calls else (message.get("content") or "")
+    pieces = [text[i:i + piece] for i in range(0, len(text), piece)] or [""]
+    base = {"id": response.get("id"), "object": "chat.completion.chunk",
+            "created": response.get("created", int(time.time())), "model": response.get("model")}
+
+    def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> str:
+        event = {**base, "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+        return f"data: {json.dumps(event)}\n\n"
+
+    if tool_calls:
+        yield chunk({"role": "assistant", "content": None, "tool_calls": [{
+            "index": 0, "id": tool_calls[0]["id"], "type": "function",
+            "function": {"name": tool_calls[0]["function"]["name"], "arguments": ""}
+        }]})
+    else:
+        yield chunk({"role": "assistant", "content": ""})
+    for text_piece in pieces:
+        await asyncio.sleep(duration / len(pieces))
+        if tool_calls:
+            yield chunk({"tool_calls": [{"index": 0, "function": {"arguments": text_piece}}]})
+        else:
+            yield chunk({"content": text_piece})
+    yield chunk({}, choice.get("finish_reason") or "stop")
+    yield "data: [DONE]\n\n"
+
+
+def _error(status: int, message: str, error_type: str, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+    return JSONResponse(
+        status_code=status,
+        content={"error": {"message": message, "type": error_type, "param": None, "code": None}},
+        headers=headers
+    )
+
+
+def create_standin_app(config: StandinConfig) -> FastAPI:
+    """FastAPI app implementing the parts of the OpenAI API this project uses."""
+    app = FastAPI(title="LLM stand-in")
+    store = RecordingStore(config.recordings)
+    stats = {"requests": 0, "replayed": 0, "synthetic": 0, "recorded": 0, "errors": 0, "rate_limited": 0,
+             "batches": 0, "batch_requests": 0, "streamed": 0}
+    peers = set()  # Distinct client connections, to check keep-alive reuse
+    app.state.config = config
+    app.state.store = store
+    app.state.stats = stats
+
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["requests"] += 1
+        if request.client:
+            peers.add((request.client.host, request.client.port))
+
+        roll = random.random()
+        if roll < config.rate_limit_rate:
+            stats["rate_limited"] += 1
+            return _error(429, "Rate limit reached (stand-in)", "requests",
+                          headers={"retry-after": str(config.retry_after)})
+        if roll < config.rate_limit_rate + config.error_rate:
+            stats["errors"] += 1
+            await asyncio.sleep(config.latency.sample())
+            return _error(500, "The server had an error (stand-in)", "server_error")
+
+        key = replay_key(body)
+        if config.record:
+            response = await _forward(config, request, body)
+            if isinstance(response, JSONResponse):
+                return response
+            store.add(key, body, response)
+            stats["recorded"] += 1
+            return response
+
+        stream = bool(body.get("stream"))
+        # A streamed answer starts after part of the latency and trickles out over the rest
+        latency = config.latency.sample()
+        await asyncio.sleep(latency * (STREAM_FIRST_TOKEN_SHARE if stream else 1.0))
+        response = store.get(key)
+        if response is not None:
+            stats["replayed"] += 1
+            response = {**response, "id": f"chatcmpl-standin-{uuid.uuid4().hex[:12]}", "created": int(time.time())}
+        elif config.strict:
+            return _error(404, "No recording for this request", "invalid_request_error")
+        else:
+            stats["synthetic"] += 1
+            response = synthesize_completion(body)
+        if stream:
+            stats["streamed"] += 1
+            return StreamingResponse(
+                stream_chunks(response, latency * (1 - STREAM_FIRST_TOKEN_SHARE)), media_type="text/event-stream"
+            )
+        return response
+
+    app.add_api_route("/v1/chat/completions", chat_completions, methods=["POST"])
+    app.add_api_route("/chat/completions", chat_completions, methods=["POST"])
+
+    # Batch API: uploaded files and batches live in memory; a batch is answered line by
+    # line (replayed or synthetic) in the background and completes after batch_seconds
+    files: Dict[str, Dict[str, Any]] = {}
+    batches: Dict[str, Dict[str, Any]] = {}
+
+    def _store_file(filename: str, purpose: str, content: bytes) -> Dict[str, Any]:
+        file_id = f"file-standin-{uuid.uuid4().hex[:12]}"
+        files[file_id] = {"id": file_id, "object": "file", "bytes": len(content), "created_at": int(time.time()),
+                          "filename": filename, "purpose": purpose, "content": content}
+        return {k: v for k, v in files[file_id].items() if k != "content"}
+
+    @app.post("/v1/files")
+    async def upload_file(request: Request):
+        form = await request.form()
+        upload = form["file"]
+        return _store_file(upload.filename or "upload.jsonl", str(form.get("purpose", "batch")), await upload.read())
+
+    @app.get("/v1/files/{file_id}/content")
+    async def file_content(file_id: str):
+        if file_id not in files:
+            return _error(404, f"No such file: {file_id}", "invalid_request_error")
+        return Response(content=files[file_id]["content"], media_type="application/jsonl")
+
+    async def _run_batch(batch: Dict[str, Any]) -> None:
+        await asyncio.sleep(config.batch_seconds)
+        output = []
+        for raw in files[batch["input_file_id"]]["content"].decode().splitlines():
+            if not raw.strip():
+                continue
+            line = json.loads(raw)
+            stats["batch_requests"] += 1
+            response = store.get(replay_key(line["body"])) or synthesize_completion(line["body"])
+            output.append(json.dumps({
+                "id": f"batch_req_{uuid.uuid4().hex[:12]}", "custom_id": line["custom_id"],
+                "response": {"status_code": 200, "request_id": uuid.uuid4().hex, "body": response}, "error": None
+            }))
+        output_file = _store_file(f"{batch['id']}_output.jsonl", "batch_output", ("\n".join(output) + "\n").encode())
+        batch.update(status="completed", output_file_id=output_file["id"], completed_at=int(time.time()),
+                     request_counts={"total": len(output), "completed": len(output), "failed": 0})
+
+    @app.post("/v1/batches")
+    async def create_batch(request: Request):
+        body = await request.json()
+        if body.get("input_file_id") not in files:
+            return _error(400, "Unknown input_file_id", "invalid_request_error")
+        batch_id = f"batch_standin_{uuid.uuid4().hex[:12]}"
+        batches[batch_id] = {
+            "id": batch_id, "object": "batch", "endpoint": body.get("endpoint"), "errors": None,
+            "input_file_id": body["input_file_id"], "completion_window": body.get("completion_window", "24h"),
+            "status": "in_progress", "output_file_id": None, "error_file_id": None, "created_at": int(time.time()),
+            "request_counts": {"total": 0, "completed": 0, "failed": 0}, "metadata": body.get("metadata")
+        }
+        stats["batches"] += 1
+        asyncio.get_running_loop().create_task(_run_batch(batches[batch_id]))
+        return batches[batch_id]
+
+    @app.get("/v1/batches/{batch_id}")
+    async def retrieve_batch(batch_id: str):
+        if batch_id not in batches:
+            return _error(404, f"No such batch: {batch_id}", "invalid_request_error")
+        return batches[batch_id]
+
+    @app.get("/v1/models")
+    async def list_models():
+        return {"object": "list", "data": [{"id": "standin", "object": "model", "owned_by": "standin"}]}
+
+    @app.get("/stats")
+    async def get_stats():
+        return {**stats, "connections": len(peers), "recordings": len(store), "latency": config.latency.spec}
+
+    return app
+
+
+async def _forward(config: StandinConfig, request: Request, body: Dict[str, Any]):
+    """Send the request to the real API (record mode)."""
+    import httpx
+
+    api_key = os.getenv("OPENAI_UPSTREAM_API_KEY")
+    authorization = f"Bearer {api_key}" if api_key else request.headers.get("authorization", "")
+    async with httpx.AsyncClient(timeout=120) as client:
+        upstream = await client.post(
+            f"{config.upstream.rstrip('/')}/chat/completions",
+            json=body,
+            headers={"Authorization": authorization}
+        )
+    if upstream.status_code != 200:
+        return JSONResponse(status_code=upstream.status_code, content=upstream.json())
+    return upstream.json()
+
+
+def start_standin_in_thread(config: StandinConfig, host: str = "127.0.0.1", port: int = 0) -> Tuple[Any, str]:
+    """Serve the stand-in from a background thread; returns (server, base_url).
+
+    Call server.should_exit = True to stop it.
+    """
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(create_standin_app(config), host=host, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True, name="llm-standin")
+    thread.start()
+    deadline = time.time() + 10
+    while not server.started:
+        if time.time() > deadline or not thread.is_alive():
+            raise RuntimeError("LLM stand-in server failed to start")
+        time.sleep(0.01)
+    bound_port = server.servers[0].sockets[0].getsockname()[1]
+    return server, f"http://{host}:{bound_port}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stand-in server for load testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--latency", default="lognormal:1.0,0.5",
+                        help="fixed:S | uniform:LOW,HIGH | normal:MEAN,SD | lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of calls answered with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds on 429s")
+    parser.add_argument("--recordings", help="JSONL file of recorded responses")
+    parser.add_argument("--record", action="store_true", help="forward to --upstream and record responses")
+    parser.add_argument("--upstream", default="https://api.openai.com/v1")
+    parser.add_argument("--strict", action="store_true", help="404 when no recording matches")
+    parser.add_argument("--batch-seconds", type=float, default=0.0, help="time a Batch API job takes to complete")
+    args = parser.parse_args()
+
+    config = StandinConfig(
+        latency=args.latency, error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after, recordings=args.recordings, record=args.record,
+        upstream=args.upstream, strict=args.strict, batch_seconds=args.batch_seconds
+    )
+    import uvicorn
+
+    print(f"🚀 LLM stand-in on http://{args.host}:{args.port}/v1 "
+          f"({'recording' if args.record else 'replaying'}, latency {args.latency})")
+    print(f"   export OPENAI_BASE_URL=http://{args.host}:{args.port}/v1 OPENAI_API_KEY=standin")
+    uvicorn.run(create_standin_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
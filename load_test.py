@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Offline end-to-end load test for the quiz and webhook analysis pipelines
+
+Starts the LLM stand-in server (llm_standin.py) unless --base-url is given,
+seeds a throwaway SQLite database with students and submissions, then
+measures throughput and latency of:
+
+  quiz    concurrent POST /admin/generate-quiz requests
+  jobs    analyze_submission jobs (what the GitHub webhook enqueues) drained
+          by the background worker pool
+
+Examples:
+    python load_test.py --mode quiz --requests 20 --concurrency 5 --latency lognormal:1.0,0.4
+    python load_test.py --mode jobs --submissions 50 --workers 4 --rate-limit-rate 0.05
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+# Change to project directory (the app serves ./static)
+os.chdir(project_root)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline load test against the LLM stand-in")
+    parser.add_argument("--mode", choices=["quiz", "jobs", "both"], default="both")
+    parser.add_argument("--students", type=int, default=20)
+    parser.add_argument("--submissions", type=int, default=20, help="analysis jobs to run in jobs mode")
+    parser.add_argument("--requests", type=int, default=10, help="generate-quiz requests in quiz mode")
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--per-student", action="store_true", help="use per-student quiz generation")
+    parser.add_argument("--unbatched", action="store_true", help="per-student mode: one LLM request per student")
+    parser.add_argument("--workers", type=int, default=4, help="job worker threads in jobs mode")
+    parser.add_argument("--latency", default="lognormal:1.0,0.4")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--recordings", help="replay responses from this JSONL file")
+    parser.add_argument("--base-url", help="use an already running stand-in instead of starting one")
+    parser.add_argument("--use-cache", action="store_true", help="leave the LLM response cache on")
+    parser.add_argument("--database", default="./load_test.db")
+    return parser.parse_args()
+
+
+def configure_environment(args):
+    """Must run before any app module is imported (they read config at import time)."""
+    if os.path.exists(args.database):
+        os.remove(args.database)
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.database}"
+    os.environ["OPENAI_API_KEY"] = "standin"
+    os.environ["JOB_WORKERS_IN_PROCESS"] = "false"
+    os.environ["JOB_WORKERS"] = str(args.workers)
+    os.environ["JOB_POLL_INTERVAL"] = "0.1"
+    os.environ["SINGLE_FLIGHT_PATH"] = f"{args.database}.singleflight"
+    os.environ["LLM_RATE_LIMIT_PATH"] = f"{args.database}.ratelimit"
+    if not args.use_cache:
+        os.environ["LLM_CACHE_ENABLED"] = "false"
+
+
+def seed(args):
+    from app.models import Base, engine, Student, Submission
+    from app.models.database import SessionLocal
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        students = []
+        for i in range(args.students):
+            student = Student(student_id=f"LOAD{i:04d}", name=f"Load Student {i}", is_approved=True, block=4)
+            db.add(student)
+            students.append(student)
+        db.commit()
+        for i in range(max(args.students, args.submissions)):
+            student = students[i % len(students)]
+            code = (
+                f"def solve_{i}(values):\n"
+                f"    total = 0\n"
+                f"    for value in values:\n"
+                f"        if value % {i % 7 + 2} == 0:\n"
+                f"            total += value\n"
+                f"    return total\n\n"
+                f"print(solve_{i}(range(100)))\n"
+            )
+            db.add(Submission(student_id=student.id, assignment_name="Load Test", file_name=f"solve_{i}.py",
+                              file_content=code, file_size=len(code)))
+        db.commit()
+        return [student.student_id for student in students]
+    finally:
+        db.close()
+
+
+def summarize(label, latencies, failures, elapsed):
+    from app.services.llm_metrics import percentile
+
+    done = len(latencies)
+    print(f"\n📊 {label}")
+    print(f"   completed: {done}, failed: {failures}, wall time: {elapsed:.2f}s")
+    if done:
+        print(f"   throughput: {done / elapsed:.2f}/s")
+        print(f"   latency p50: {percentile(latencies, 50):.2f}s  p95: {percentile(latencies, 95):.2f}s  "
+              f"max: {max(latencies):.2f}s")
+
+
+async def run_quiz_load(args, student_ids):
+    import httpx
+    from app.main import app
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies, failures = [], 0
+    group = max(1, len(student_ids) // max(1, args.requests))
+
+    async def one(client, n):
+        nonlocal failures
+        # Distinct student groups so requests aren't coalesced into one
+        selected = [student_ids[(n * group + k) % len(student_ids)] for k in range(group)]
+        async with semaphore:
+            started = time.monotonic()
+            response = await client.post(
+                "/admin/generate-quiz",
+                json={"assignment_name": "Load Test", "student_ids": selected, "per_student": args.per_student,
+                      "batched": not args.unbatched},
+                headers={"X-Admin-Password": "quizscope!"}
+            )
+            if response.status_code == 200:
+                latencies.append(time.monotonic() - started)
+            else:
+                failures += 1
+                print(f"   request {n} failed: {response.status_code} {response.text[:120]}")
+
+    started = time.monotonic()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load", timeout=600) as client:
+        await asyncio.gather(*(one(client, n) for n in range(args.requests)))
+    summarize("POST /admin/generate-quiz", latencies, failures, time.monotonic() - started)
+
+
+def run_job_load(args):
+    from app.models import Submission, Job
+    from app.models.database import SessionLocal
+    from app.services.job_queue import enqueue_job, start_job_workers, stop_job_workers
+
+    db = SessionLocal()
+    try:
+        submission_ids = [row.id for row in db.query(Submission.id).limit(args.submissions).all()]
+        job_ids = [enqueue_job(db, "analyze_submission", {"submission_id": sid}).id for sid in submission_ids]
+    finally:
+        db.close()
+
+    started = time.monotonic()
+    start_job_workers()
+    try:
+        while True:
+            db = SessionLocal()
+            try:
+                jobs = db.query(Job).filter(Job.id.in_(job_ids)).all()
+                if all(job.status in ("completed", "failed") for job in jobs):
+                    break
+            finally:
+                db.close()
+            time.sleep(0.2)
+    finally:
+        stop_job_workers()
+    elapsed = time.monotonic() - started
+
+    latencies = [
+        (job.completed_at - job.created_at).total_seconds() for job in jobs if job.status == "completed"
+    ]
+    summarize("analyze_submission jobs (webhook path)", latencies,
+              sum(1 for job in jobs if job.status == "failed"), elapsed)
+
+
+def main():
+    args = parse_args()
+    configure_environment(args)
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        from llm_standin import StandinConfig, start_standin_in_thread
+        server, base_url = start_standin_in_thread(StandinConfig(
+            latency=args.latency, error_rate=args.error_rate,
+            rate_limit_rate=args.rate_limit_rate, recordings=args.recordings
+        ))
+    print(f"🚀 LLM stand-in at {base_url}")
+    os.environ["OPENAI_BASE_URL"] = base_url  # Read by openai_client on every client build
+
+    student_ids = seed(args)
+    try:
+        if args.mode in ("quiz", "both"):
+            asyncio.run(run_quiz_load(args, student_ids))
+        if args.mode in ("jobs", "both"):
+            run_job_load(args)
+
+        from app.services.llm_metrics import llm_metrics
+        print("\n📊 LLM gateway")
+        for model, totals in llm_metrics.snapshot()["by_model"].items():
+            print(f"   {model}: {totals['success']} ok, {totals['error']} errors, {totals['retries']} retries, "
+                  f"p50 {totals['p50_latency']}s, p95 {totals['p95_latency']}s")
+    finally:
+        if server:
+            server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+One-off upgrade of a database created before code and quiz PDFs moved out of it
+
+Older databases keep each submission's code in submissions.file_content
+and each quiz PDF in quiz_pdfs.pdf_data. The app now reads code from
+code_blobs by submissions.content_hash and PDFs from QUIZ_PDF_DIR by
+quiz_pdfs.sha256, so without this those rows look empty. The script:
+
+  - creates missing tables and adds missing (nullable) columns to existing ones
+  - stores every submission's file_content as a code blob and sets content_hash
+  - writes every quiz PDF's pdf_data to QUIZ_PDF_DIR and sets sha256 / file_size
+
+It is safe to run more than once; rows that already have a hash are
+skipped. The old columns are left in place (unused) so nothing is lost if
+the run is interrupted.
+
+Usage:
+    python migrate_storage.py             # uses DATABASE_URL
+    python migrate_storage.py --dry-run   # only report what would change
+"""
+
+import os
+import sys
+import argparse
+from sqlalchemy import inspect, text
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.models import Base, engine
+from app.models.database import SessionLocal
+from app.models.code_blob import store_code
+from app.services.pdf_storage import write_pdf
+
+BATCH_SIZE = 500
+
+
+def add_missing_columns(dry_run: bool) -> None:
+    """create_all() never alters existing tables, so add new columns by hand"""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        added = [column for column in table.columns if column.name not in existing]
+        for column in added:
+            column_type = column.type.compile(dialect=engine.dialect)
+            print(f"➕ {table.name}.{column.name} ({column_type})")
+            if not dry_run:
+                with engine.begin() as conn:
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}'))
+        if not dry_run:
+            for index in table.indexes:
+                if any(column in added for column in index.columns):
+                    index.create(bind=engine, checkfirst=True)
+    if not dry_run:
+        Base.metadata.create_all(bind=engine)  # Tables that did not exist yet
+
+
+def backfill_code(dry_run: bool) -> int:
+    """Move submissions.file_content into code_blobs; returns the number of submissions moved"""
+    columns = {column["name"] for column in inspect(engine).get_columns("submissions")}
+    if "file_content" not in columns:
+        print("✅ submissions.file_content not present, no code to move")
+        return 0
+    if dry_run:
+        with engine.connect() as conn:
+            pending = conn.execute(text(
+                "SELECT count(*) FROM submissions WHERE file_content IS NOT NULL"
+                + (" AND content_hash IS NULL" if "content_hash" in columns else "")
+            )).scalar()
+        print(f"📦 {pending} submissions would be moved to code_blobs")
+        return pending
+
+    moved, last_id = 0, 0
+    db = SessionLocal()
+    try:
+        while True:
+            rows = db.execute(text(
+                "SELECT id, file_content FROM submissions "
+                "WHERE id > :last_id AND file_content IS NOT NULL AND content_hash IS NULL "
+                "ORDER BY id LIMIT :limit"
+            ), {"last_id": last_id, "limit": BATCH_SIZE}).all()
+            if not rows:
+                break
+            for submission_id, content in rows:
+                sha, size = store_code(db, content)
+                db.execute(text(
+                    "UPDATE submissions SET content_hash = :sha, file_size = COALESCE(file_size, :size) WHERE id = :id"
+                ), {"sha": sha, "size": size, "id": submission_id})
+            db.commit()
+            moved += len(rows)
+            last_id = rows[-1][0]
+            print(f"📦 {moved} submissions moved to code_blobs")
+    finally:
+        db.close()
+    return moved
+
+
+def backfill_pdfs(dry_run: bool) -> int:
+    """Move quiz_pdfs.pdf_data to files in QUIZ_PDF_DIR; returns the number of PDFs moved"""
+    columns = {column["name"] for column in inspect(engine).get_columns("quiz_pdfs")}
+    if "pdf_data" not in columns:
+        print("✅ quiz_pdfs.pdf_data not present, no PDFs to move")
+        return 0
+    if dry_run:
+        with engine.connect() as conn:
+            pending = conn.execute(text(
+                "SELECT count(*) FROM quiz_pdfs WHERE pdf_data IS NOT NULL"
+                + (" AND sha256 IS NULL" if "sha256" in columns else "")
+            )).scalar()
+        print(f"📄 {pending} quiz PDFs would be written to disk")
+        return pending
+
+    moved, last_id = 0, 0
+    with engine.connect() as conn:
+        while True:
+            # PDFs are large, so a few at a time
+            rows = conn.execute(text(
+                "SELECT id, pdf_data FROM quiz_pdfs "
+                "WHERE id > :last_id AND pdf_data IS NOT NULL AND sha256 IS NULL ORDER BY id LIMIT 20"
+            ), {"last_id": last_id}).all()
+            if not rows:
+                break
+            for pdf_id, data in rows:
+                sha256, size = write_pdf(bytes(data))
+                conn.execute(text("UPDATE quiz_pdfs SET sha256 = :sha, file_size = :size WHERE id = :id"),
+                             {"sha": sha256, "size": size, "id": pdf_id})
+            conn.commit()
+            moved += len(rows)
+            last_id = rows[-1][0]
+            print(f"📄 {moved} quiz PDFs written to disk")
+    return moved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upgrade an older database to the blob-backed storage")
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    args = parser.parse_args()
+
+    print(f"🔧 Upgrading {engine.url.render_as_string(hide_password=True)}")
+    add_missing_columns(args.dry_run)
+    backfill_code(args.dry_run)
+    backfill_pdfs(args.dry_run)
+    print("✅ Done" if not args.dry_run else "✅ Dry run finished, nothing written")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Standalone background job worker for AI Code Assessment System
+Run this as a separate process (e.g. a PythonAnywhere always-on task) when the
+web app is served over WSGI and cannot start worker threads itself.
+Set JOB_WORKERS_IN_PROCESS=false for the web app in that case.
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+# Change to project directory
+os.chdir(project_root)
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from app.models import Base, engine
+from app.services.job_queue import start_job_workers, stop_job_workers
+
+def main():
+    """Run job workers until interrupted"""
+    Base.metadata.create_all(bind=engine)
+    print("🚀 Starting background job workers...")
+    start_job_workers()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping job workers...")
+        stop_job_workers()
+
+if __name__ == "__main__":
+    main()
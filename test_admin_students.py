@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test script for the admin student listing (query count stays flat as the roster grows)
+"""
+
+import os
+import sys
+import asyncio
+import tempfile
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.models import Base, Student, Submission
+from app.api.admin import _list_students, get_student
+from app.api.pagination import PageParams
+
+ALL = PageParams(limit=None, cursor=None, fields=None, include_total=False)
+
+
+def _roster(tmp, student_count):
+    engine = create_engine(f"sqlite:///{os.path.join(tmp, f'roster{student_count}.db')}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    for n in range(student_count):
+        student = Student(student_id=f"R{n:03d}", name=f"Student {n:03d}", is_approved=True, block=4 if n % 2 else 6)
+        db.add(student)
+        db.flush()
+        for assignment in ("Calculator", "Guessing Game")[:n % 3]:
+            db.add(Submission(student_id=student.id, assignment_name=assignment, file_name="main.py",
+                              file_content=f"print({n})\n" * 1000))
+    db.commit()
+    db.close()
+    return engine
+
+
+def _count_statements(engine, call):
+    statements = []
+    listener = lambda conn, cursor, sql, *args: statements.append(sql)
+    event.listen(engine, "before_cursor_execute", listener)
+    db = sessionmaker(bind=engine)()
+    try:
+        result = call(db)
+        return (asyncio.run(result) if asyncio.iscoroutine(result) else result), statements
+    finally:
+        db.close()
+        event.remove(engine, "before_cursor_execute", listener)
+
+
+def test_listing_query_count_is_constant():
+    """Listing 5 or 60 students takes the same two queries and never reads code"""
+    with tempfile.TemporaryDirectory() as tmp:
+        counts = []
+        for student_count in (5, 60):
+            engine = _roster(tmp, student_count)
+            result, statements = _count_statements(engine, lambda db: _list_students(db, None, ALL))
+            counts.append(len(statements))
+            assert len(result["students"]) == student_count
+            assert not any("code_blobs" in sql for sql in statements)
+
+        students = {s["student_id"]: s for s in result["students"]}
+        assert students["R002"]["submission_count"] == 2
+        assert students["R002"]["latest_assignment"] == "Guessing Game"
+        assert [sub["assignment_name"] for sub in students["R002"]["submissions"]] == ["Calculator", "Guessing Game"]
+        assert students["R000"]["submission_count"] == 0 and students["R000"]["latest_assignment"] is None
+        assert counts[0] == counts[1] == 2
+
+        block, _ = _count_statements(engine, lambda db: _list_students(db, 4, ALL))
+        assert len(block["students"]) == 30 and all(s["block"] == 4 for s in block["students"])
+
+        one, statements = _count_statements(engine, lambda db: get_student("R005", db=db))
+        assert one["student"]["submission_count"] == 2 and one["student"]["submissions"][0]["file_size"] == 9000
+        assert len(statements) == 2
+    print(f"✅ {counts[0]} queries for 5 students and {counts[1]} for 60")
+
+
+if __name__ == "__main__":
+    test_listing_query_count_is_constant()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test script for the async database session used by the upload and admin routes
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.models import Base, get_async_db, Assignment, CodeBlob, Student, Submission
+from app.models.database import _async_database_url
+from app.api.admin import router as admin_router
+from app.api.upload import router as upload_router
+
+
+def test_async_urls():
+    """The async engine talks to the same database as DATABASE_URL"""
+    assert _async_database_url("sqlite:///./ai_assessment.db") == "sqlite+aiosqlite:///./ai_assessment.db"
+    assert _async_database_url("postgresql://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+    assert _async_database_url("postgresql+psycopg2://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+    print("✅ Async URLs derived from DATABASE_URL")
+
+
+def test_upload_and_listing_on_async_session():
+    """Uploads replace the previous submission and store the code blob; the roster sees them"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "async.db")
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        db.add(Student(student_id="ASYNC01", name="Async Student", is_approved=True, block=4))
+        db.add(Assignment(name="Calculator", is_active=True))
+        db.commit()
+
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        AsyncSession = async_sessionmaker(async_engine, expire_on_commit=False)
+
+        async def override_get_async_db():
+            async with AsyncSession() as session:
+                yield session
+
+        app = FastAPI()
+        app.include_router(upload_router)
+        app.include_router(admin_router, prefix="/admin")
+        app.dependency_overrides[get_async_db] = override_get_async_db
+        client = TestClient(app)
+
+        for code in ("print(1)\n", "print(2)\n"):
+            response = client.post("/api/upload/code", data={"student_id": "ASYNC01", "assignment_name": "Calculator",
+                                                              "code_paste": code})
+            assert response.status_code == 200, response.text
+        missing = client.post("/api/upload/code", data={"student_id": "NOPE", "assignment_name": "Calculator",
+                                                          "code_paste": "x"})
+        assert missing.status_code == 404
+
+        submissions = db.query(Submission).all()
+        assert len(submissions) == 1 and submissions[0].file_content == "print(2)\n"
+        assert db.query(CodeBlob).count() == 2
+
+        roster = client.get("/admin/students", headers={"X-Admin-Password": "quizscope!"}).json()["students"]
+        assert roster[0]["submission_count"] == 1 and roster[0]["latest_assignment"] == "Calculator"
+        db.close()
+    print("✅ Upload and roster served from the async session")
+
+
+if __name__ == "__main__":
+    test_async_urls()
+    test_upload_and_listing_on_async_session()
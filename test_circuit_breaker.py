@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test script for the LLM circuit breaker and the local quiz fallback (no API key needed)
+"""
+
+import sys
+import time
+import asyncio
+from types import SimpleNamespace
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED, OPEN, HALF_OPEN
+from app.services.llm_gateway import LLMGateway
+from app.services.quiz_generation_service import QuizGenerationService
+from app.services.model_router import ModelRouter
+
+
+class FakeTimeout(Exception):
+    pass
+
+FakeTimeout.__name__ = "APITimeoutError"
+
+
+def make_gateway(create, breaker):
+    gateway = LLMGateway.__new__(LLMGateway)
+    gateway.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    gateway._is_async = True
+    gateway.cache = None
+    gateway.rate_limiter = None
+    gateway.circuit_breaker = breaker
+    return gateway
+
+
+def test_opens_after_consecutive_failures():
+    """N consecutive failures open the breaker; a success in between resets the count"""
+    breaker = CircuitBreaker("test", failure_threshold=3, p95_latency=0, cooldown=60)
+    breaker.record_failure("timeout")
+    breaker.record_failure("timeout")
+    breaker.record_success(0.5)
+    breaker.record_failure("timeout")
+    breaker.record_failure("timeout")
+    assert breaker.state == CLOSED
+    breaker.record_failure("timeout")
+    assert breaker.state == OPEN and not breaker.allow_request()
+    print("✅ Breaker opens after consecutive failures")
+
+
+def test_opens_on_slow_p95():
+    """Consistently slow successful calls open the breaker"""
+    breaker = CircuitBreaker("test", failure_threshold=5, p95_latency=10, cooldown=60)
+    for _ in range(5):
+        breaker.record_success(30.0)
+    snapshot = breaker.snapshot()
+    assert snapshot["state"] == OPEN and "p95" in snapshot["open_reason"]
+    print("✅ Breaker opens on high p95 latency")
+
+
+def test_half_open_probe():
+    """After the cooldown exactly one probe goes through; its result decides the state"""
+    breaker = CircuitBreaker("test", failure_threshold=1, p95_latency=0, cooldown=0.05)
+    breaker.record_failure("timeout")
+    time.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()  # Only one probe at a time
+    breaker.record_failure("timeout")
+    assert breaker.state == OPEN
+
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    breaker.record_success(0.2)
+    assert breaker.state == CLOSED and breaker.allow_request()
+    print("✅ Half-open probe closes or re-opens the breaker")
+
+
+def test_gateway_fails_fast_and_quiz_falls_back():
+    """Once open, the gateway stops calling OpenAI and quizzes come from local analysis"""
+    calls = []
+
+    async def create(**kwargs):
+        calls.append(kwargs)
+        raise FakeTimeout("timed out")
+
+    breaker = CircuitBreaker("test", failure_threshold=1, p95_latency=0, cooldown=60)
+    gateway = make_gateway(create, breaker)
+
+    try:
+        asyncio.run(gateway.chat_completion(model="test-model", messages=[]))
+        assert False, "expected the timeout to propagate"
+    except FakeTimeout:
+        pass
+    assert breaker.state == OPEN and len(calls) == 1  # No retries once the breaker opened
+
+    try:
+        asyncio.run(gateway.chat_completion(model="test-model", messages=[]))
+        assert False, "expected CircuitOpenError"
+    except CircuitOpenError:
+        pass
+    assert len(calls) == 1
+
+    service = QuizGenerationService.__new__(QuizGenerationService)
+    service.gateway = gateway
+    service.client = gateway.client
+    service.router = ModelRouter(gateway)
+    code = "def add(a, b):\n    return a + b\n\nprint(add(1, 2))\n"
+    started = time.monotonic()
+    questions = asyncio.run(service.generate_quiz_questions(code, "Calculator"))
+    assert questions and all(q.question for q in questions)
+    assert time.monotonic() - started < 1.0 and len(calls) == 1
+    print(f"✅ Open breaker fails fast; {len(questions)} local questions generated")
+
+
+if __name__ == "__main__":
+    test_opens_after_consecutive_failures()
+    test_opens_on_slow_p95()
+    test_half_open_probe()
+    test_gateway_fails_fast_and_quiz_falls_back()
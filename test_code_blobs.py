@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test script for the content-addressed code blob store behind Submission.file_content
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.models import Base, Student, Submission, CodeBlob, prefetch_code
+from app.models.code_blob import iter_code
+from app.services.single_flight import content_hash, submission_hash
+
+
+def _session(tmp):
+    engine = create_engine(f"sqlite:///{os.path.join(tmp, 'blobs.db')}")
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(bind=engine)()
+
+
+def test_identical_code_is_stored_once():
+    """Rows keep only hash and size; the same code from many students is one compressed blob"""
+    code = "def add(a, b):\n    return a + b\n\n" * 200
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, db = _session(tmp)
+        student = Student(student_id="BLOB01", name="Blob Student", is_approved=True, block=1)
+        db.add(student)
+        db.commit()
+        for name in ("a.py", "b.py", "c.py"):
+            db.add(Submission(student_id=student.id, assignment_name="Calculator", file_name=name, file_content=code))
+        db.add(Submission(student_id=student.id, assignment_name="Calculator", file_name="d.py", file_content="x = 1\n"))
+        db.commit()
+
+        blobs = db.query(CodeBlob).all()
+        assert len(blobs) == 2
+        big = next(b for b in blobs if b.size == len(code))
+        assert big.compression == "zlib" and len(big.data) < big.size // 10
+        assert all(sub.content_hash == content_hash(sub.file_content) for sub in db.query(Submission))
+        assert db.query(Submission).first().file_size == len(code.encode("utf-8"))
+
+        # Streaming reads decompress in chunks and round-trip exactly
+        chunks = list(iter_code(db, content_hash(code), chunk_size=1024))
+        assert len(chunks) > 1 and b"".join(chunks).decode("utf-8") == code
+        db.close()
+    print(f"✅ 4 submissions stored as 2 blobs; {len(code)} bytes compressed to {len(big.data)}")
+
+
+def test_listing_does_not_load_code():
+    """Metadata queries never touch code_blobs; prefetch_code loads many in one query"""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, db = _session(tmp)
+        for n in range(5):
+            db.add(Submission(student_id=1, assignment_name="Calculator", file_content=f"print({n})\n"))
+        db.add(Submission(student_id=1, assignment_name="Calculator", commit_sha="a" * 40))
+        db.commit()
+        db.close()
+
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda conn, cursor, sql, *args: statements.append(sql))
+        db = sessionmaker(bind=engine)()
+        submissions = db.query(Submission).all()
+        hashes = [submission_hash(sub) for sub in submissions]
+        assert hashes[-1] == content_hash(None) and not any("code_blobs" in sql for sql in statements)
+
+        prefetch_code(db, submissions)
+        assert [sub.file_content for sub in submissions[:5]] == [f"print({n})\n" for n in range(5)]
+        assert submissions[-1].file_content is None
+        assert sum("code_blobs" in sql for sql in statements) == 1
+        db.close()
+    print("✅ Listing reads hashes only; code for 5 submissions fetched in one query")
+
+
+if __name__ == "__main__":
+    test_identical_code_is_stored_once()
+    test_listing_does_not_load_code()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test script for the token-budgeted code condenser used in LLM prompts
+"""
+
+import sys
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from app.services.code_condenser import condense_code, condense_code_samples, estimate_tokens
+
+
+def _big_program(functions=40):
+    parts = ["import random\n\nSCORES = {}\n"]
+    for i in range(functions):
+        parts.append(f'''
+def step_{i}(value):
+    """Step {i} of the program"""
+    total = 0
+    for n in range(value):
+        if n % {i + 2} == 0:
+            total += random.randint(0, n)
+        else:
+            total -= n
+    SCORES["step_{i}"] = total
+    return total
+''')
+    parts.append("\ndef tiny():\n    return 1\n")
+    parts.append('\nif __name__ == "__main__":\n    for i in range(3):\n        print(step_0(i))\n')
+    return "".join(parts)
+
+
+def test_small_code_unchanged():
+    """Code within budget is passed through untouched"""
+    code = "def add(a, b):\n    return a + b\n"
+    assert condense_code(code, 100) == code
+    print("✅ Small code unchanged")
+
+
+def test_large_code_fits_budget_and_keeps_structure():
+    """Every signature survives even when most bodies are elided"""
+    code = _big_program()
+    condensed = condense_code(code, 600)
+    assert estimate_tokens(condensed) <= 600
+    for i in range(40):
+        assert f"def step_{i}(value):" in condensed
+    assert "def tiny():" in condensed
+    assert 'if __name__ == "__main__":' in condensed
+    assert "lines elided" in condensed
+    print("✅ Large code condensed within budget")
+
+
+def test_invalid_python_is_truncated():
+    """Non-Python text falls back to a head-and-tail excerpt"""
+    text = "\n".join(f"line {i} of some pasted notes" for i in range(1000))
+    condensed = condense_code(text, 200)
+    assert estimate_tokens(condensed) <= 200
+    assert condensed.startswith("line 0") and "lines omitted" in condensed
+    print("✅ Invalid Python truncated")
+
+
+def test_samples_share_budget():
+    """Several submissions together stay within one budget"""
+    samples = [_big_program(), "x = 1\n", _big_program(10)]
+    combined = condense_code_samples(samples, 900)
+    assert estimate_tokens(combined) <= 900
+    assert "x = 1" in combined
+    print("✅ Samples share the budget")
+
+
+def test_missing_samples_count_as_empty():
+    """Push submissions have no content until the mirror fills it in"""
+    combined = condense_code_samples([None, "x = 1\n", None], 900)
+    assert "x = 1" in combined and "None" not in combined
+    assert condense_code_samples([None]) == ""
+    print("✅ Missing samples are treated as empty")
+
+
+if __name__ == "__main__":
+    test_small_code_unchanged()
+    test_large_code_fits_budget_and_keeps_structure()
+    test_invalid_python_is_truncated()
+    test_samples_share_budget()
+    test_missing_samples_count_as_empty()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test script for the local git mirror diff engine (uses local repositories, no network)
+"""
+
+import os
+import sys
+import asyncio
+import subprocess
+import tempfile
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from app.models import Submission
+from app.services import job_handlers
+from app.services.git_mirror import CommitDiff, FileDiff, GitMirror, GitMirrorError, apply_commit_diff
+
+
+def git(repo, *args):
+    env = {**os.environ, "GIT_AUTHOR_NAME": "Student", "GIT_AUTHOR_EMAIL": "s@example.com",
+           "GIT_COMMITTER_NAME": "Student", "GIT_COMMITTER_EMAIL": "s@example.com"}
+    return subprocess.run(["git", "-C", repo, *args], check=True, capture_output=True, text=True, env=env).stdout.strip()
+
+
+def commit(repo, files, message, remove=()):
+    for name, content in files.items():
+        mode = "wb" if isinstance(content, bytes) else "w"
+        with open(os.path.join(repo, name), mode) as f:
+            f.write(content)
+    for name in remove:
+        git(repo, "rm", "-q", name)
+    git(repo, "add", "-A")
+    git(repo, "commit", "-q", "-m", message)
+    return git(repo, "rev-parse", "HEAD")
+
+
+class CountingMirror(GitMirror):
+    fetches = 0
+
+    def fetch(self, repo):
+        self.fetches += 1
+        super().fetch(repo)
+
+
+def test_diffs_from_local_repository():
+    """Line stats, patches and contents match git; known commits need no fetch"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "src", "class", "calculator")
+        os.makedirs(source)
+        git(source, "init", "-q", "-b", "main")
+        first = commit(source, {"calc.py": "def add(a, b):\n    return a + b\n", "README.md": "Calculator\n"}, "Start")
+        second = commit(source, {"calc.py": "def add(a, b):\n    return a + b\n\ndef sub(a, b):\n    return a - b\n",
+                                 "logo.png": bytes(range(256))}, "Add sub", remove=["README.md"])
+
+        mirror = CountingMirror(os.path.join(tmp, "mirrors"), os.path.join(tmp, "src", "{repo}"), token="")
+        root = mirror.commit_diff("class/calculator", first)
+        assert {f.path: (f.status, f.lines_added, f.lines_deleted) for f in root.files} == {
+            "calc.py": ("A", 2, 0), "README.md": ("A", 1, 0)
+        }
+
+        diff = mirror.commit_diff("class/calculator", second)
+        files = {f.path: f for f in diff.files}
+        assert (files["calc.py"].status, files["calc.py"].lines_added, files["calc.py"].lines_deleted) == ("M", 3, 0)
+        assert "+def sub(a, b):" in files["calc.py"].patch and "def sub" in files["calc.py"].content
+        assert files["README.md"].status == "D" and files["README.md"].lines_deleted == 1 and files["README.md"].content is None
+        assert files["logo.png"].binary and files["logo.png"].content is None
+        assert mirror.fetches == 1  # The second commit was already in the mirror
+
+        third = commit(source, {"calc.py": "def add(a, b):\n    return a + b\n"}, "Drop sub")
+        assert mirror.commit_diff("class/calculator", third).lines_deleted == 3
+        assert mirror.fetches == 2  # Incremental fetch for the new push
+
+        submission = Submission(commit_sha=second, github_repo="class/calculator")
+        apply_commit_diff(submission, diff)
+        assert submission.file_name == "calc.py" and "def sub" in submission.file_content
+        assert (submission.lines_added, submission.lines_deleted) == (3, 1)
+        assert submission.diff_content.count("diff --git") == 3
+
+        for bad_repo, bad_sha in (("../etc", first), ("class/calculator", "not-a-sha"), ("class/calculator", "f" * 40)):
+            try:
+                mirror.commit_diff(bad_repo, bad_sha)
+                raise AssertionError(f"{bad_repo} {bad_sha} should fail")
+            except GitMirrorError:
+                pass
+    print("✅ Commit diffs computed from the local mirror with incremental fetches")
+
+
+def test_mirror_failure_falls_back_to_api():
+    """A commit the mirror can't read comes from the GitHub API; if that fails too there is no diff"""
+    class Failing:
+        def __init__(self, error):
+            self.error = error
+            self.calls = 0
+
+        def commit_diff(self, repo, sha):
+            self.calls += 1
+            raise self.error
+
+    class Answering:
+        def commit_diff(self, repo, sha):
+            return CommitDiff(sha, [FileDiff("calc.py", "A", 1, 0, False, "+x = 1\n", "x = 1\n")])
+
+    saved = (job_handlers.GIT_MIRROR_ENABLED, job_handlers.get_git_mirror, job_handlers.get_github_client)
+    mirror = Failing(GitMirrorError("could not fetch class/private"))
+    try:
+        job_handlers.GIT_MIRROR_ENABLED = True
+        job_handlers.get_git_mirror = lambda: mirror
+        job_handlers.get_github_client = lambda: Answering()
+        diff = asyncio.run(job_handlers._fetch_commit_diff("class/private", "a" * 40))
+        assert mirror.calls == 1 and diff.lines_added == 1
+
+        job_handlers.get_github_client = lambda: Failing(ConnectionError("network down"))
+        assert asyncio.run(job_handlers._fetch_commit_diff("class/private", "a" * 40)) is None
+    finally:
+        job_handlers.GIT_MIRROR_ENABLED, job_handlers.get_git_mirror, job_handlers.get_github_client = saved
+    print("✅ Mirror failures fall back to the GitHub API, then to no diff")
+
+
+if __name__ == "__main__":
+    test_diffs_from_local_repository()
+    test_mirror_failure_falls_back_to_api()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test script for the ETag-caching GitHub API client (uses the local GitHub stand-in, no network)
+"""
+
+import os
+import sys
+import tempfile
+import httpx
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from app.services.github_api import GitHubAPIClient, GitHubResponseCache, GitHubAPIError
+from github_standin import GitHubStandinState, start_github_standin_in_thread
+
+SHA = "a" * 40
+FIXTURES = {
+    "class/calculator": {
+        "repo": {"full_name": "class/calculator", "default_branch": "main"},
+        "commits": {
+            SHA: {"files": [
+                {"filename": "calc.py", "status": "modified", "additions": 3, "deletions": 1,
+                 "patch": "@@ -1 +1,3 @@\n-x = 1\n+x = 2\n+y = 3\n+print(x + y)"},
+                {"filename": "logo.png", "status": "added", "additions": 0, "deletions": 0}
+            ]}
+        },
+        "contents": {f"{SHA}:calc.py": "x = 2\ny = 3\nprint(x + y)\n"}
+    }
+}
+
+
+def test_conditional_requests_save_rate_limit():
+    """Repeated lookups are revalidated with 304s that leave the rate limit untouched"""
+    state = GitHubStandinState(FIXTURES, rate_limit=100)
+    server, base_url = start_github_standin_in_thread(state)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            client = GitHubAPIClient(base_url, token="test", cache=GitHubResponseCache(os.path.join(tmp, "gh.db")))
+
+            for _ in range(3):
+                assert client.get_repository("class/calculator")["default_branch"] == "main"
+                diff = client.commit_diff("class/calculator", SHA)
+            files = {f.path: f for f in diff.files}
+            assert files["calc.py"].content.startswith("x = 2") and diff.lines_added == 3
+            assert files["logo.png"].binary and files["logo.png"].content is None
+
+            metrics = client.metrics()
+            assert metrics["requests"] == 9 and metrics["not_modified"] == 6
+            assert metrics["rate_limit"]["remaining"] == 97 and metrics["rate_limit"]["used"] == 3
+            assert state.stats["not_modified"] == 6
+
+            # A fresh client (new process) revalidates from the on-disk cache
+            again = GitHubAPIClient(base_url, token="test", cache=GitHubResponseCache(os.path.join(tmp, "gh.db")))
+            assert again.get_repository("class/calculator")["full_name"] == "class/calculator"
+            assert again.metrics()["not_modified"] == 1
+
+            try:
+                client.get_commit("class/calculator", "b" * 40)
+                raise AssertionError("missing commit should raise")
+            except GitHubAPIError as e:
+                assert e.status_code == 404
+            print(f"✅ {metrics['not_modified']} of {metrics['requests']} requests answered with 304; "
+                  f"{metrics['rate_limit']['remaining']} calls left")
+    finally:
+        server.should_exit = True
+
+
+def test_contents_paths_are_quoted():
+    """File names with spaces, '#' or '?' are fetched as paths, not cut off as fragments or queries"""
+    name = "week 2/notes #1?.py"
+    fixtures = {"class/notes": {"commits": {SHA: {"files": [
+        {"filename": name, "status": "added", "additions": 1, "deletions": 0, "patch": "@@ -0,0 +1 @@\n+x = 1"}
+    ]}}, "contents": {f"{SHA}:{name}": "x = 1\n"}}}
+    server, base_url = start_github_standin_in_thread(GitHubStandinState(fixtures))
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            client = GitHubAPIClient(base_url, token="test", cache=GitHubResponseCache(os.path.join(tmp, "gh.db")))
+            diff = client.commit_diff("class/notes", SHA)
+            assert diff.files[0].path == name and diff.files[0].content == "x = 1\n"
+    finally:
+        server.should_exit = True
+    print("✅ Contents fetched for a file name that needs quoting")
+
+
+def test_cache_is_bounded():
+    """The on-disk cache evicts least recently used responses beyond its limits"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = GitHubResponseCache(os.path.join(tmp, "gh.db"), max_entries=3, max_bytes=1000)
+        for n in range(5):
+            cache.set(f"/r/{n}", f'"{n}"', None, "x" * 100)
+        cache.touch("/r/2")
+        cache.set("/r/5", '"5"', None, "x" * 100)
+        assert cache.stats()["entries"] == 3
+        assert cache.get("/r/2") and cache.get("/r/5") and not cache.get("/r/3")
+        cache.set("/r/big", '"b"', None, "x" * 900)
+        assert cache.stats()["total_bytes"] <= 1000
+    print("✅ Cache bounded by entries and bytes")
+
+
+if __name__ == "__main__":
+    test_conditional_requests_save_rate_limit()
+    test_contents_paths_are_quoted()
+    test_cache_is_bounded()
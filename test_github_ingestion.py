@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test script for bulk ingestion of GitHub push events (no GitHub access needed)
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.models import Base, Student, Submission
+from app.services.github_service import GitHubService
+
+
+def push_payload(count, first=0, authors=3):
+    return {
+        "ref": "refs/heads/main",
+        "repository": {"name": "Calculator", "full_name": "class/calculator"},
+        "commits": [
+            {
+                "id": f"{first + n:040x}",
+                "message": f"Commit {first + n}",
+                "timestamp": "2026-03-02T10:15:00Z",
+                "author": {"username": f"coder{n % authors}", "name": f"Coder {n % authors}"},
+                "added": ["calc.py"] if n == 0 else [],
+                "modified": [] if n == 0 else ["calc.py"]
+            }
+            for n in range(count)
+        ]
+    }
+
+
+def test_push_cost_is_flat():
+    """A 2-commit and a 40-commit push take the same number of statements and one commit"""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'push.db')}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+        db = Session()
+        db.add(Student(student_id="STU001", name="Known Coder", github_username="coder0", is_approved=True, block=4))
+        db.commit()
+
+        statements, commits = [], []
+        event.listen(engine, "before_cursor_execute", lambda conn, cursor, sql, *args: statements.append(sql))
+        event.listen(engine, "commit", lambda conn: commits.append(1))
+
+        counts = []
+        for size, first in ((2, 0), (40, 100)):
+            statements.clear()
+            commits.clear()
+            result = GitHubService().process_push_event(push_payload(size, first), db)
+            assert result["success"], result.get("error")
+            assert [r["commit_sha"] for r in result["results"]] == [c["id"] for c in push_payload(size, first)["commits"]]
+            counts.append(len(statements))
+            assert len(commits) == 1
+        assert counts[0] == counts[1], counts
+
+        known = db.query(Student).filter(Student.github_username == "coder0").one()
+        assert known.student_id == "STU001" and known.is_approved
+        assert db.query(Student).filter(Student.is_approved == False).count() == 2  # noqa: E712
+        for r in result["results"]:
+            submission = db.query(Submission).filter(Submission.id == r["submission_id"]).one()
+            assert submission.commit_sha == r["commit_sha"] and submission.student_id == r["student_id"]
+        assert db.query(Submission).count() == 42
+        db.close()
+        print(f"✅ Pushes of 2 and 40 commits took {counts} statements, one transaction each")
+
+
+if __name__ == "__main__":
+    test_push_cost_is_flat()
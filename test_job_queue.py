@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Test script for the SQLite-backed background job queue
+"""
+
+import os
+import sys
+import asyncio
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.models import Base, Job, Student
+from app.services.job_queue import (
+    enqueue_job, claim_next_job, run_job, register_job_handler, report_progress, cancel_job
+)
+
+
+def _session(tmp):
+    engine = create_engine(f"sqlite:///{os.path.join(tmp, 'jobs.db')}")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+calls = []
+
+@register_job_handler("test_echo")
+async def _echo(payload, db):
+    calls.append(payload["value"])
+    return {"echo": payload["value"]}
+
+@register_job_handler("test_flaky")
+def _flaky(payload, db):
+    raise RuntimeError("boom")
+
+@register_job_handler("test_steps")
+def _steps(payload, db):
+    for step in range(1, payload["steps"] + 1):
+        if step == payload.get("cancel_at"):
+            cancel_job(db, db.query(Job).filter(Job.job_type == "test_steps").first())
+        report_progress(db, step, payload["steps"], "Stepping", partial={"last": step})
+    return {"steps": payload["steps"]}
+
+@register_job_handler("test_async_steps")
+async def _async_steps(payload, db):
+    for step in range(1, payload["steps"] + 1):
+        if step == payload.get("cancel_at"):
+            cancel_job(db, db.query(Job).filter(Job.job_type == "test_async_steps").first())
+        report_progress(db, step, payload["steps"], "Stepping", partial={"last": step})
+        await asyncio.sleep(0)
+    return {"steps": payload["steps"]}
+
+
+def test_job_runs_to_completion():
+    """A claimed job runs its async handler and stores the result"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _session(tmp)
+        job = enqueue_job(db, "test_echo", {"value": 42})
+
+        claimed = claim_next_job(db, "w1")
+        assert claimed.id == job.id and claimed.status == "running" and claimed.attempts == 1
+        assert claim_next_job(db, "w2") is None  # Leased jobs are invisible
+
+        loop = asyncio.new_event_loop()
+        run_job(db, claimed, loop)
+        loop.close()
+
+        db.refresh(job)
+        assert job.status == "completed" and job.result == {"echo": 42}
+        db.close()
+        print("✅ Job completed")
+
+
+def test_job_retries_then_fails():
+    """Failing jobs are retried with backoff until max_attempts"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _session(tmp)
+        job = enqueue_job(db, "test_flaky", {}, max_attempts=2)
+        loop = asyncio.new_event_loop()
+
+        run_job(db, claim_next_job(db, "w1"), loop)
+        db.refresh(job)
+        assert job.status == "queued" and job.available_at > datetime.utcnow()
+        assert "boom" in job.last_error
+
+        job.available_at = datetime.utcnow()  # Skip the backoff
+        db.commit()
+        run_job(db, claim_next_job(db, "w1"), loop)
+        db.refresh(job)
+        assert job.status == "failed" and job.attempts == 2
+        loop.close()
+        db.close()
+        print("✅ Job retried then failed")
+
+
+def test_expired_lease_is_reclaimed():
+    """A job whose worker died becomes claimable after the visibility timeout"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _session(tmp)
+        job = enqueue_job(db, "test_echo", {"value": 1})
+        claim_next_job(db, "dead-worker")
+
+        job.locked_until = datetime.utcnow() - timedelta(seconds=1)
+        db.commit()
+
+        reclaimed = claim_next_job(db, "w2")
+        assert reclaimed.id == job.id and reclaimed.locked_by == "w2" and reclaimed.attempts == 2
+
+        # On the final attempt an expired lease fails the job instead
+        reclaimed.max_attempts = 2
+        reclaimed.locked_until = datetime.utcnow() - timedelta(seconds=1)
+        db.commit()
+        assert claim_next_job(db, "w3") is None
+        db.refresh(job)
+        assert job.status == "failed" and job.completed_at is not None
+        db.close()
+        print("✅ Expired lease reclaimed")
+
+
+def test_progress_and_partial_result():
+    """Handlers report progress and partial results on the job row"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _session(tmp)
+        job = enqueue_job(db, "test_steps", {"steps": 3})
+        loop = asyncio.new_event_loop()
+        run_job(db, claim_next_job(db, "w1"), loop)
+        loop.close()
+
+        db.refresh(job)
+        assert job.status == "completed" and job.result == {"steps": 3}
+        assert job.progress == {"done": 3, "total": 3, "message": "Stepping"}
+        assert job.partial_result == {"last": 3}
+        report_progress(db, 1, 1, "Outside a job")  # No-op outside a handler
+        db.refresh(job)
+        assert job.progress["done"] == 3
+        db.close()
+        print("✅ Progress and partial result recorded")
+
+
+def test_cancel_jobs():
+    """Queued jobs are cancelled outright; running handlers stop at their next progress report"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _session(tmp)
+        queued = enqueue_job(db, "test_echo", {"value": 7})
+        assert cancel_job(db, queued) and queued.status == "cancelled"
+        assert claim_next_job(db, "w1") is None
+        assert not cancel_job(db, queued)  # Already finished
+
+        loop = asyncio.new_event_loop()
+        for job_type in ("test_steps", "test_async_steps"):
+            job = enqueue_job(db, job_type, {"steps": 10, "cancel_at": 4})
+            run_job(db, claim_next_job(db, "w1"), loop)
+            db.refresh(job)
+            assert job.status == "cancelled" and job.result is None, job.status
+            assert job.partial_result == {"last": 4} and job.progress["done"] == 4
+        loop.close()
+        db.close()
+        print("✅ Queued and running jobs cancelled")
+
+
+def test_student_import_job():
+    """CSV imports run as jobs; a bad row leaves the student list untouched"""
+    from app.services import job_handlers  # noqa: F401 (registers the handlers)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _session(tmp)
+        loop = asyncio.new_event_loop()
+        good = enqueue_job(db, "import_students", {"csv": "name,student_id,block\nAda,S1,4\nBob,S2,6\n"}, max_attempts=1)
+        run_job(db, claim_next_job(db, "w1"), loop)
+        db.refresh(good)
+        assert good.status == "completed" and good.result["students_created"] == 2
+
+        bad = enqueue_job(db, "import_students", {"csv": "name,student_id,block\nCy,S3,4\nDee,S4,5\n"}, max_attempts=1)
+        run_job(db, claim_next_job(db, "w1"), loop)
+        db.refresh(bad)
+        assert bad.status == "failed" and "Block" in bad.last_error
+        assert db.query(Student).count() == 2
+
+        # Cancelled while checking rows: nothing from the file is committed
+        csv_text = "name,student_id,block\n" + "".join(f"Student {n},C{n:03d},4\n" for n in range(250))
+        cancelled = enqueue_job(db, "import_students", {"csv": csv_text}, max_attempts=1)
+        claimed = claim_next_job(db, "w1")
+        claimed.cancel_requested = True
+        db.commit()
+        run_job(db, claimed, loop)
+        db.refresh(cancelled)
+        assert cancelled.status == "cancelled" and cancelled.progress["done"] == 100
+        assert db.query(Student).count() == 2
+        loop.close()
+        db.close()
+        print("✅ Student CSV import ran as a job")
+
+
+if __name__ == "__main__":
+    test_job_runs_to_completion()
+    test_job_retries_then_fails()
+    test_expired_lease_is_reclaimed()
+    test_progress_and_partial_result()
+    test_cancel_jobs()
+    test_student_import_job()
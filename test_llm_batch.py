@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test script for the offline LLM batch pipeline (uses the local LLM stand-in, no API key needed)
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import tempfile
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.models import Base, Student, Submission, Analysis, Quiz, QuizQuestion, QuizPDF, Job
+from app.services import llm_batch
+from app.services.llm_batch import prepare_batch, advance_batch, get_batch_backend
+from llm_standin import StandinConfig, start_standin_in_thread
+
+
+def _seed(tmp):
+    engine = create_engine(f"sqlite:///{os.path.join(tmp, 'batch.db')}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    for n in range(3):
+        student = Student(student_id=f"BAT00{n}", name=f"Batch Student {n}", is_approved=True, block=4)
+        db.add(student)
+        db.commit()
+        code = f"def area_{n}(w, h):\n    return w * h + {n}\n\nprint(area_{n}(2, 3))\n"
+        db.add(Submission(student_id=student.id, assignment_name="Geometry", file_name="area.py",
+                          file_content=code, file_size=len(code)))
+    db.commit()
+    return db
+
+
+def _run(backend_name, batch_seconds=0.0):
+    server, base_url = start_standin_in_thread(StandinConfig(batch_seconds=batch_seconds))
+    saved = {name: os.environ.get(name) for name in ("OPENAI_BASE_URL", "OPENAI_API_KEY")}
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ["OPENAI_API_KEY"] = "standin"
+    saved_dir = llm_batch.LLM_BATCH_DIR
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            llm_batch.LLM_BATCH_DIR = tmp
+            db = _seed(tmp)
+            batch = prepare_batch(db, "Geometry", backend=backend_name)
+            assert batch.request_count == 6  # 3 quizzes + 3 analyses
+            with open(batch.input_path) as f:
+                lines = [json.loads(line) for line in f]
+            assert {line["custom_id"].split("-")[0] for line in lines} == {"quiz", "analysis"}
+            assert all(line["url"] == "/v1/chat/completions" and line["body"]["model"] for line in lines)
+            assert db.query(Job).filter(Job.job_type == "llm_batch").count() == 1
+
+            backend = get_batch_backend(backend_name)
+            polls = 0
+            while not asyncio.run(advance_batch(db, batch, backend)):
+                polls += 1
+                time.sleep(0.1)
+
+            assert batch.status == "completed", batch.error
+            assert batch.result["failed"] == {}
+            assert batch.result["students_count"] == 3 and batch.result["analyses_count"] == 3
+            assert db.query(Quiz).filter(Quiz.quiz_type == "batch_generated").count() == 3
+            assert db.query(QuizQuestion).count() == 15
+            assert db.query(Analysis).count() == 3
+            assert db.query(QuizPDF).filter(QuizPDF.id == batch.result["pdf_id"]).first().student_count == 3
+
+            # Everything is done now; a second run has only precomputed quizzes and no requests
+            again = prepare_batch(db, "Geometry", backend=backend_name)
+            assert again.request_count == 0
+            assert asyncio.run(advance_batch(db, again, backend)) and again.result["students_count"] == 3
+            db.close()
+            return polls
+    finally:
+        llm_batch.LLM_BATCH_DIR = saved_dir
+        server.should_exit = True
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def test_openai_batch_backend():
+    """Batch API round trip against the stand-in: upload, poll, download, ingest, PDF"""
+    polls = _run("openai", batch_seconds=0.3)
+    assert polls >= 1
+    print(f"✅ Batch API run ingested after {polls} polls")
+
+
+def test_local_batch_backend():
+    """The local backend runs the same file through the gateway"""
+    _run("local")
+    print("✅ Local batch run ingested")
+
+
+def test_result_lines_read_like_cached_responses():
+    """Result lines need no SDK types: modern tool calls and legacy function calls both read back"""
+    arguments = json.dumps({"quiz_text": "1. Why?"})
+    modern = {"choices": [{"message": {"tool_calls": [{"type": "function", "function": {"arguments": arguments}}]}}]}
+    legacy = {"choices": [{"message": {"content": None, "function_call": {"name": "create_quiz",
+                                                                          "arguments": arguments}}}]}
+    line = lambda body: {"response": {"status_code": 200, "body": body}, "error": None}
+    assert llm_batch._response_from_line(line(modern)).choices[0].message.tool_calls[0].function.arguments == arguments
+    assert llm_batch._response_from_line(line(legacy)).choices[0].message.function_call.arguments == arguments
+    try:
+        llm_batch._response_from_line({"response": None, "error": {"message": "expired"}})
+        assert False, "expected the line's error"
+    except RuntimeError as e:
+        assert "expired" in str(e)
+    try:
+        llm_batch.BatchBackend()
+        assert False, "BatchBackend is abstract"
+    except TypeError:
+        pass
+    print("✅ Batch result lines parsed without SDK response types")
+
+
+if __name__ == "__main__":
+    test_openai_batch_backend()
+    test_local_batch_backend()
+    test_result_lines_read_like_cached_responses()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test script for the LLM response cache (no API key needed)
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from app.services.llm_cache import LLMResponseCache, make_cache_key
+
+
+def _response(text):
+    return {"choices": [{"message": {"content": text, "tool_calls": None}}]}
+
+
+def test_cache_roundtrip():
+    """Cached responses read like SDK objects and count hits/misses"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMResponseCache(path=os.path.join(tmp, "cache.db"))
+        request = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "hi"}], "temperature": 0.6}
+        key = make_cache_key(request)
+
+        assert cache.get(key) is None
+        cache.set(key, _response("hello"))
+        cached = cache.get(key)
+
+        assert cached.choices[0].message.content == "hello"
+        assert cached.choices[0].message.tool_calls is None
+        stats = cache.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+        print("✅ Cache round trip works")
+
+
+def test_cache_key_changes_with_request():
+    """Any change to model, messages, temperature or tools gives a new key"""
+    base = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "hi"}], "temperature": 0.6}
+    assert make_cache_key(base) == make_cache_key(dict(reversed(list(base.items()))))
+    assert make_cache_key(base) != make_cache_key({**base, "temperature": 0.3})
+    assert make_cache_key(base) != make_cache_key({**base, "tools": [{"type": "function"}]})
+    print("✅ Cache keys are content addressed")
+
+
+def test_cache_lru_and_ttl_eviction():
+    """Least recently used entries go first; expired entries are not served"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMResponseCache(path=os.path.join(tmp, "cache.db"), max_entries=2)
+        cache.set("a", _response("a"))
+        cache.set("b", _response("b"))
+        cache.get("a")  # "b" is now least recently used
+        cache.set("c", _response("c"))
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None and cache.get("c") is not None
+        assert cache.stats()["evictions"] == 1
+
+        expired = LLMResponseCache(path=os.path.join(tmp, "ttl.db"), ttl_seconds=-1)
+        expired.set("x", _response("x"))
+        assert expired.get("x") is None
+        print("✅ LRU and TTL eviction work")
+
+
+if __name__ == "__main__":
+    test_cache_roundtrip()
+    test_cache_key_changes_with_request()
+    test_cache_lru_and_ttl_eviction()
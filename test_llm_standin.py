@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test script for the OpenAI-compatible stand-in server (no API key or network needed)
+"""
+
+import os
+import sys
+import json
+import asyncio
+import tempfile
+from pathlib import Path
+
+import httpx
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from llm_standin import StandinConfig, LatencyModel, start_standin_in_thread, replay_key
+from app.services.quiz_generation_service import QuizGenerationService
+
+
+def test_latency_specs():
+    """Latency specs parse and sample within their bounds"""
+    assert LatencyModel("fixed:0.5").sample() == 0.5
+    assert all(0.1 <= LatencyModel("uniform:0.1,0.2").sample() <= 0.2 for _ in range(20))
+    assert LatencyModel("lognormal:1.0,0.3").sample() > 0
+    try:
+        LatencyModel("gamma:1")
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    print("✅ Latency specs parsed")
+
+
+def test_quiz_service_through_base_url():
+    """QuizGenerationService talks to the stand-in via OPENAI_BASE_URL"""
+    server, base_url = start_standin_in_thread(StandinConfig(latency="fixed:0.01"))
+    saved = {name: os.environ.get(name) for name in ("OPENAI_BASE_URL", "OPENAI_API_KEY")}
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ["OPENAI_API_KEY"] = "standin"
+    try:
+        service = QuizGenerationService()
+        questions = asyncio.run(service.generate_quiz_questions(
+            "def add(a, b):\n    return a + b\n", "Calculator", use_cache=False
+        ))
+        assert len(questions) == 5 and questions[0].code_snippet
+        stats = httpx.get(base_url.replace("/v1", "/stats")).json()
+        assert stats["synthetic"] >= 1
+    finally:
+        server.should_exit = True
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+    print(f"✅ Quiz service generated {len(questions)} questions via the stand-in")
+
+
+def test_injected_rate_limits_and_replay():
+    """429s carry Retry-After; recorded responses are replayed for matching requests"""
+    body = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "hello"}]}
+    recorded = {
+        "id": "chatcmpl-recorded", "object": "chat.completion", "created": 0, "model": "gpt-4o-mini",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": "recorded answer"},
+                     "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 1, "completion_tokens": 2, "total_tokens": 3}
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        recordings = os.path.join(tmp, "recordings.jsonl")
+        with open(recordings, "w") as f:
+            f.write(json.dumps({"key": replay_key(body), "request": body, "response": recorded}) + "\n")
+
+        limited, limited_url = start_standin_in_thread(StandinConfig(rate_limit_rate=1.0, retry_after=2))
+        replaying, replay_url = start_standin_in_thread(StandinConfig(recordings=recordings, strict=True))
+        try:
+            response = httpx.post(f"{limited_url}/chat/completions", json=body)
+            assert response.status_code == 429 and response.headers["retry-after"] == "2"
+
+            response = httpx.post(f"{replay_url}/chat/completions", json=body)
+            assert response.json()["choices"][0]["message"]["content"] == "recorded answer"
+            missing = httpx.post(f"{replay_url}/chat/completions", json={**body, "model": "other"})
+            assert missing.status_code == 404
+        finally:
+            limited.should_exit = True
+            replaying.should_exit = True
+    print("✅ Rate limits injected and recordings replayed")
+
+
+if __name__ == "__main__":
+    test_latency_specs()
+    test_quiz_service_through_base_url()
+    test_injected_rate_limits_and_replay()
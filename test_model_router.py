@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test script for the tiered model router (no API key needed)
+"""
+
+import sys
+import json
+import asyncio
+from types import SimpleNamespace
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from app.services.model_router import ModelRouter, ModelTier, ValidationError, router_metrics
+from app.services.ai_analysis_service import _parse_history_questions, _parse_standardized_questions
+
+
+class FakeGateway:
+    """Answers with a canned reply per model and remembers discarded cache entries"""
+
+    def __init__(self, replies):
+        self.replies = replies
+        self.calls = []
+        self.discarded = []
+
+    async def chat_completion(self, use_cache=True, **kwargs):
+        self.calls.append(kwargs["model"])
+        message = SimpleNamespace(content=self.replies[kwargs["model"]])
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    def discard_cached(self, request):
+        self.discarded.append(request["model"])
+
+
+def parse_questions(response):
+    try:
+        questions = json.loads(response.choices[0].message.content)
+    except json.JSONDecodeError as e:
+        raise ValidationError(str(e))
+    if not questions:
+        raise ValidationError("no questions")
+    return questions
+
+
+def make_router(gateway, max_fast_tokens=1000):
+    return ModelRouter(gateway, tiers={
+        "fast": ModelTier("fast", "small-model", max_fast_tokens),
+        "strong": ModelTier("strong", "big-model")
+    }, routes={"quiz": ("fast", "strong"), "analysis": ("strong",)})
+
+
+def request(text="Write a quiz"):
+    return {"messages": [{"role": "user", "content": text}], "max_tokens": 100}
+
+
+def test_fast_tier_answers_first():
+    """Valid output from the fast model is used without touching the strong one"""
+    gateway = FakeGateway({"small-model": '["q1"]', "big-model": '["q2"]'})
+    questions, tier = asyncio.run(make_router(gateway).complete("quiz", request(), parse_questions))
+    assert questions == ["q1"] and tier.name == "fast" and gateway.calls == ["small-model"]
+    print("✅ Fast tier answered")
+
+
+def test_escalates_on_invalid_output():
+    """Unparseable fast output is discarded from the cache and retried on the strong model"""
+    gateway = FakeGateway({"small-model": "Sure! Here are some questions", "big-model": '["q2"]'})
+    questions, tier = asyncio.run(make_router(gateway).complete("quiz", request(), parse_questions))
+    assert questions == ["q2"] and tier.name == "strong"
+    assert gateway.calls == ["small-model", "big-model"] and gateway.discarded == ["small-model"]
+
+    tiers = router_metrics.snapshot()
+    assert tiers["fast"]["invalid"] >= 1 and tiers["strong"]["success"] >= 1
+    print("✅ Escalated to the strong tier after validation failure")
+
+
+def test_last_tier_failure_raises():
+    """When every tier fails validation the caller sees the error"""
+    gateway = FakeGateway({"small-model": "[]", "big-model": "[]"})
+    try:
+        asyncio.run(make_router(gateway).complete("quiz", request(), parse_questions))
+        assert False, "expected ValidationError"
+    except ValidationError:
+        pass
+    assert gateway.calls == ["small-model", "big-model"]
+    print("✅ Final tier failure reaches the caller")
+
+
+def test_questions_about_errors_are_not_escalated():
+    """A valid quiz on error handling stays on the fast model; only the structure is checked"""
+    history = json.dumps([{"question_text": "What error does your code raise on invalid input?"}])
+    standardized = json.dumps([{"question": "Why handle the ValueError error here?", "code_snippet": "",
+                                "focus": "Internal error handling"}])
+    for reply, parser in ((history, _parse_history_questions), (standardized, _parse_standardized_questions)):
+        gateway = FakeGateway({"small-model": reply, "big-model": "[]"})
+        questions, tier = asyncio.run(make_router(gateway).complete("quiz", request(), parser))
+        assert tier.name == "fast" and gateway.calls == ["small-model"] and len(questions) == 1
+
+    gateway = FakeGateway({"small-model": '[{"text": "no question key"}]', "big-model": history})
+    questions, tier = asyncio.run(make_router(gateway).complete("quiz", request(), _parse_history_questions))
+    assert tier.name == "strong" and questions[0]["question_text"].startswith("What error")
+    print("✅ Questions mentioning errors are accepted on the fast tier")
+
+
+def test_routes_by_task_and_size():
+    """Large prompts skip the fast tier; per-task routes are respected"""
+    router = make_router(FakeGateway({}), max_fast_tokens=1000)
+    assert [tier.name for tier in router.plan("quiz", 200)] == ["fast", "strong"]
+    assert [tier.name for tier in router.plan("quiz", 5000)] == ["strong"]
+    assert [tier.name for tier in router.plan("analysis", 200)] == ["strong"]
+    assert [tier.name for tier in router.plan("unknown-task", 200)] == ["fast", "strong"]
+    print("✅ Routing by task type and input size works")
+
+
+if __name__ == "__main__":
+    test_fast_tier_answers_first()
+    test_escalates_on_invalid_output()
+    test_last_tier_failure_raises()
+    test_questions_about_errors_are_not_escalated()
+    test_routes_by_task_and_size()
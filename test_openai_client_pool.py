@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared, pooled OpenAI client registry (uses the local LLM stand-in)
+"""
+
+import io
+import os
+import sys
+import asyncio
+import contextlib
+from pathlib import Path
+
+import httpx
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from llm_standin import StandinConfig, start_standin_in_thread
+from app.services.openai_client import get_async_client_or_none, get_client_or_none, close_async_clients
+from app.services.quiz_generation_service import QuizGenerationService
+
+
+@contextlib.contextmanager
+def standin_environment():
+    server, base_url = start_standin_in_thread(StandinConfig())
+    saved = {name: os.environ.get(name) for name in ("OPENAI_BASE_URL", "OPENAI_API_KEY")}
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ["OPENAI_API_KEY"] = "sk-standin-secret-key"
+    try:
+        yield base_url
+    finally:
+        server.should_exit = True
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def test_clients_are_shared_and_key_not_printed():
+    """Every service gets the same client objects and the API key never reaches stdout"""
+    with standin_environment():
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            first = QuizGenerationService()
+            second = QuizGenerationService()
+            sync_client = get_client_or_none()
+        assert first.client is second.client is get_async_client_or_none()
+        assert sync_client is get_client_or_none()
+        assert "sk-standin" not in output.getvalue()
+    print("✅ Clients shared across services; API key not printed")
+
+
+def test_repeat_calls_reuse_connection():
+    """Calls from services built per request reuse one warm keep-alive connection"""
+    code = "def add(a, b):\n    return a + b\n"
+
+    async def generate_many():
+        for _ in range(4):
+            # A new service per call, like one per webhook or quiz request
+            await QuizGenerationService().generate_quiz_questions(code, "Calculator", use_cache=False)
+        await close_async_clients()
+
+    with standin_environment() as base_url:
+        asyncio.run(generate_many())
+        stats = httpx.get(base_url.replace("/v1", "/stats")).json()
+    assert stats["requests"] == 4 and stats["connections"] == 1, stats
+    print(f"✅ {stats['requests']} calls over {stats['connections']} connection")
+
+
+def test_each_event_loop_gets_its_own_pool():
+    """Job worker loops don't share connections with the web server's loop"""
+    with standin_environment():
+        shared = get_async_client_or_none()
+
+        async def current():
+            return shared.current()
+
+        assert asyncio.run(current()) is not asyncio.run(current())
+    print("✅ Separate pools per event loop")
+
+
+if __name__ == "__main__":
+    test_clients_are_shared_and_key_not_printed()
+    test_repeat_calls_reuse_connection()
+    test_each_event_loop_gets_its_own_pool()
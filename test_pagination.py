@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test script for keyset pagination and ?fields= projection on the list endpoints
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.models import Base, get_db, get_async_db, Analysis, Assignment, Submission
+from app.api.admin import router as admin_router
+from app.api.analyses import router as analyses_router
+from app.api.submissions import router as submissions_router
+
+
+def _client(tmp):
+    engine = create_engine(f"sqlite:///{os.path.join(tmp, 'pages.db')}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    AsyncSession = async_sessionmaker(create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'pages.db')}"))
+
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def override_get_async_db():
+        async with AsyncSession() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(submissions_router)
+    app.include_router(analyses_router)
+    app.include_router(admin_router, prefix="/admin")
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    return engine, Session, TestClient(app)
+
+
+def test_keyset_pages_are_stable():
+    """Cursor pages cover every row once, even with rows added between requests"""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, Session, client = _client(tmp)
+        db = Session()
+        start = datetime(2025, 1, 1)
+        # Pairs share a created_at, so the id tie-breaker matters
+        for n in range(25):
+            db.add(Submission(student_id=1, assignment_name="Calculator", commit_sha=f"{n:040x}",
+                              created_at=start + timedelta(minutes=n // 2)))
+        db.commit()
+
+        seen, cursor, pages = [], None, 0
+        while True:
+            params = {"limit": 10, "include_total": pages == 0}
+            if cursor:
+                params["cursor"] = cursor
+            body = client.get("/submissions/", params=params).json()
+            if pages == 0:
+                assert body["total"] == 25
+                # A newer upload arrives while the client is paging; it sorts before the cursor
+                db.add(Submission(student_id=1, assignment_name="Calculator", created_at=start + timedelta(days=1)))
+                db.commit()
+            else:
+                assert "total" not in body
+            seen += [sub["id"] for sub in body["submissions"]]
+            pages += 1
+            cursor = body["next_cursor"]
+            if not cursor:
+                break
+        assert pages == 3 and sorted(seen) == list(range(1, 26)) and len(set(seen)) == 25
+        assert seen == sorted(seen, key=lambda i: ((i - 1) // 2, i), reverse=True)
+
+        assert client.get("/submissions/", params={"cursor": "not-a-cursor"}).status_code == 400
+        assert client.get("/submissions/", params={"limit": 0}).status_code == 422
+        db.close()
+    print(f"✅ 25 submissions paged in {pages} pages with no gaps or repeats")
+
+
+def test_rows_without_created_at_are_paged():
+    """Rows with a NULL created_at (older databases) come after the dated ones instead of vanishing"""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, Session, client = _client(tmp)
+        db = Session()
+        for n in range(7):
+            db.add(Submission(student_id=1, assignment_name="Calculator", created_at=datetime(2025, 1, 1 + n)))
+        db.commit()
+        with engine.begin() as conn:
+            conn.exec_driver_sql("UPDATE submissions SET created_at = NULL WHERE id IN (2, 4, 6)")
+
+        seen, cursor = [], None
+        while True:
+            body = client.get("/submissions/", params={"limit": 2, **({"cursor": cursor} if cursor else {})}).json()
+            seen += [sub["id"] for sub in body["submissions"]]
+            cursor = body["next_cursor"]
+            if not cursor:
+                break
+        assert seen == [7, 5, 3, 1, 6, 4, 2]
+        db.close()
+    print("✅ Undated rows paged after the dated ones")
+
+
+def test_fields_select_only_those_columns():
+    """?fields= narrows both the response and the SELECT"""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, Session, client = _client(tmp)
+        db = Session()
+        db.add(Analysis(student_id=1, submission_id=1, analysis_type="ai_analysis", status="completed",
+                        results={"summary": "x" * 10000}))
+        db.add(Assignment(name="Calculator", description="Add numbers"))
+        db.commit()
+        db.add(Submission(student_id=1, assignment_id=1, assignment_name="Calculator", file_content="print(1)\n"))
+        db.commit()
+        db.close()
+
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda conn, cursor, sql, *args: statements.append(sql))
+        body = client.get("/analyses/", params={"fields": "id,status"}).json()
+        assert body["analyses"] == [{"id": 1, "status": "completed"}]
+        assert "results" not in statements[-1] and "analyses.status" in statements[-1]
+        assert "results" in client.get("/analyses/").json()["analyses"][0]
+
+        bad = client.get("/analyses/", params={"fields": "id,secret"})
+        assert bad.status_code == 400 and "secret" in bad.json()["detail"]
+
+        headers = {"X-Admin-Password": "quizscope!"}
+        assignments = client.get("/admin/assignments", headers=headers).json()["assignments"]
+        assert assignments[0]["name"] == "Calculator" and assignments[0]["submission_count"] == 1
+        names = client.get("/admin/assignments", headers=headers, params={"fields": "name"}).json()
+        assert names == {"assignments": [{"name": "Calculator"}], "next_cursor": None}
+    print("✅ fields= projects columns and rejects unknown names")
+
+
+if __name__ == "__main__":
+    test_keyset_pages_are_stable()
+    test_rows_without_created_at_are_paged()
+    test_fields_select_only_those_columns()
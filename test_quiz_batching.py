@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Test script for batched per-student quiz generation (no API key needed)
+"""
+
+import os
+import sys
+import json
+import asyncio
+import httpx
+from types import SimpleNamespace
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from app.services.quiz_generation_service import QuizGenerationService, QuizQuestion, pack_batches
+from app.services.model_router import ModelTier
+from llm_standin import StandinConfig, start_standin_in_thread
+
+QUIZ_TEXT = "\n".join(f"{n}. What does line {n} of your code do?\nCode snippet:\n    x = {n}" for n in range(1, 6))
+
+
+def sample(n, lines=5):
+    return "\n".join(f"value_{n}_{i} = {i} * {n}" for i in range(lines)) + "\n"
+
+
+def test_packing_respects_budget():
+    """Batches stay within the token budget and item cap; an oversized sample goes alone"""
+    code = {f"s{n}": sample(n) for n in range(7)}
+    code["huge"] = sample(99, lines=400)
+    batches = pack_batches(code, token_budget=200, max_items=3)
+    assert sorted(key for batch in batches for key in batch) == sorted(code)
+    assert ["huge"] in batches
+    assert all(len(batch) <= 3 for batch in batches)
+    assert len(batches) < len(code)
+    print(f"✅ Packed {len(code)} samples into {len(batches)} batches")
+
+
+class FakeRouter:
+    """Answers create_quizzes calls, leaving out the submissions listed in drop"""
+
+    def __init__(self, drop=(), fail_sizes=()):
+        self.drop = set(drop)
+        self.fail_sizes = set(fail_sizes)
+        self.batch_sizes = []
+
+    async def complete(self, task, request, parse, use_cache=True):
+        prompt = request["messages"][1]["content"]
+        ids = [line.split()[2] for line in prompt.splitlines() if line.startswith("===== Submission")]
+        self.batch_sizes.append(len(ids))
+        if len(ids) in self.fail_sizes:
+            raise RuntimeError("upstream error")
+        quizzes = [
+            {"submission_id": batch_id, "quiz_text": QUIZ_TEXT}
+            for batch_id in ids if prompt.split(f"===== Submission {batch_id} =====")[1].split()[0] not in self.drop
+        ]
+        arguments = json.dumps({"quizzes": quizzes})
+        call = SimpleNamespace(function=SimpleNamespace(name="create_quizzes", arguments=arguments))
+        response = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=None, tool_calls=[call]))])
+        return parse(response), ModelTier("fast", "fake-model")
+
+
+def make_service(router):
+    service = QuizGenerationService.__new__(QuizGenerationService)
+    service.client = object()
+    service.gateway = SimpleNamespace(is_legacy=False)
+    service.router = router
+    service.single_calls = []
+
+    async def single(code_content, assignment_name, use_cache=True, allow_fallback=True):
+        service.single_calls.append(code_content)
+        return [QuizQuestion(question="Single question", code_snippet="", focus="Comprehension")] * 5
+
+    service.generate_quiz_questions = single
+    return service
+
+
+def test_missing_items_are_retried():
+    """Submissions dropped from a batch reply are retried on their own, the rest are kept"""
+    code = {f"s{n}": sample(n) for n in range(4)}
+    router = FakeRouter(drop={"value_2_0"})
+    service = make_service(router)
+    results = asyncio.run(service.generate_quiz_questions_batched(code, "Calc", max_items=4))
+    assert all(len(questions) == 5 for questions in results.values())
+    assert router.batch_sizes == [4]
+    assert service.single_calls == [code["s2"]]
+    print("✅ Missing submission retried individually")
+
+
+def test_failed_batch_is_split():
+    """A batch that errors is split in half until the pieces succeed"""
+    code = {f"s{n}": sample(n) for n in range(4)}
+    router = FakeRouter(fail_sizes={4})
+    service = make_service(router)
+    results = asyncio.run(service.generate_quiz_questions_batched(code, "Calc", max_items=4))
+    assert all(len(questions) == 5 for questions in results.values())
+    assert router.batch_sizes == [4, 2, 2] and not service.single_calls
+    print("✅ Failed batch split and retried")
+
+
+def test_batches_against_standin():
+    """Six students over the stand-in take fewer requests than students"""
+    server, base_url = start_standin_in_thread(StandinConfig())
+    saved = {name: os.environ.get(name) for name in ("OPENAI_BASE_URL", "OPENAI_API_KEY")}
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ["OPENAI_API_KEY"] = "standin"
+    try:
+        code = {f"student{n}": sample(n) for n in range(6)}
+        service = QuizGenerationService()
+        results = asyncio.run(service.generate_quiz_questions_batched(code, "Calc", use_cache=False, max_items=3))
+        assert all(not isinstance(questions, Exception) and len(questions) == 5 for questions in results.values())
+        requests = httpx.get(base_url.replace("/v1", "/stats")).json()["requests"]
+        assert requests == 2, requests
+    finally:
+        server.should_exit = True
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+    print(f"✅ {len(code)} students quizzed in {requests} requests")
+
+
+if __name__ == "__main__":
+    test_packing_respects_budget()
+    test_missing_items_are_retried()
+    test_failed_batch_is_split()
+    test_batches_against_standin()
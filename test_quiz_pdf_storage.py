@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test script for on-disk quiz PDF storage and ranged / conditional downloads
+"""
+
+import os
+import sys
+import time
+import tempfile
+import threading
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.models import Base, QuizPDF
+from app.services import pdf_storage
+from app.services.quiz_service import create_quiz_pdf, store_quiz_pdf_in_db
+from app.api import admin
+
+QUIZ_DATA = [{
+    "student_id": "PDF001",
+    "name": "Pdf Student",
+    "questions": [{"question_text": "What does add() return?", "code_snippet": "def add(a, b):\n    return a + b",
+                   "question_number": 1}]
+}]
+
+
+def test_pdfs_are_stored_on_disk():
+    """Rows hold the hash and size; identical bytes share one file"""
+    original_dir = pdf_storage.QUIZ_PDF_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_storage.QUIZ_PDF_DIR = tmp
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'pdfs.db')}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+
+        pdf_info = create_quiz_pdf(QUIZ_DATA, "Calculator")
+        first = store_quiz_pdf_in_db(pdf_info, db)
+        second = store_quiz_pdf_in_db(pdf_info, db)
+        path = pdf_storage.pdf_path(first.sha256)
+        assert first.sha256 == second.sha256 and first.file_size == len(pdf_info["pdf_data"])
+        assert Path(path).read_bytes() == bytes(pdf_info["pdf_data"])
+        assert [name for name in os.listdir(tmp) if name.endswith(".pdf")] == [f"{first.sha256}.pdf"]
+        assert db.query(QuizPDF).count() == 2
+        db.close()
+        pdf_storage.QUIZ_PDF_DIR = original_dir
+    print(f"✅ Two PDF rows share one {first.file_size}-byte file")
+
+
+def test_delete_racing_identical_store_keeps_file():
+    """A store of the same bytes during a delete ends with the new row's file on disk"""
+    original_dir, original_remove = pdf_storage.QUIZ_PDF_DIR, admin.remove_pdfs
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_storage.QUIZ_PDF_DIR = tmp
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'race.db')}", connect_args={"timeout": 30})
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+        pdf_info = create_quiz_pdf(QUIZ_DATA, "Calculator")
+        db = Session()
+        old = store_quiz_pdf_in_db(pdf_info, db)
+        old_id, path = old.id, pdf_storage.pdf_path(old.sha256)
+        stored = []
+
+        def store():
+            other = Session()
+            stored.append(store_quiz_pdf_in_db(pdf_info, other).id)
+            other.close()
+
+        def remove_during_store(sha256s, root=None):
+            # Regenerating the same quiz starts while the delete is removing its file
+            thread = threading.Thread(target=store)
+            thread.start()
+            time.sleep(0.3)
+            original_remove(sha256s, root)
+            remove_during_store.thread = thread
+
+        admin.remove_pdfs = remove_during_store
+        try:
+            assert admin._delete_quiz_pdfs(db.query(QuizPDF).filter(QuizPDF.id == old_id), db) == 1
+        finally:
+            admin.remove_pdfs = original_remove
+        remove_during_store.thread.join()
+
+        assert db.query(QuizPDF.id).all() == [(stored[0],)]
+        assert Path(path).read_bytes() == bytes(pdf_info["pdf_data"])
+
+        # With no row left the file goes too
+        admin._delete_quiz_pdfs(db.query(QuizPDF), db)
+        assert not os.path.exists(path)
+        db.close()
+        pdf_storage.QUIZ_PDF_DIR = original_dir
+    print("✅ Deleting a PDF never strands a concurrently stored copy")
+
+
+def test_ranged_and_conditional_downloads():
+    """ETag revalidation answers 304; Range requests get 206 with just those bytes"""
+    data = bytes(range(256)) * 40
+    with tempfile.TemporaryDirectory() as tmp:
+        sha256, size = pdf_storage.write_pdf(data, root=tmp)
+        original_dir, pdf_storage.QUIZ_PDF_DIR = pdf_storage.QUIZ_PDF_DIR, tmp
+
+        app = FastAPI()
+
+        @app.get("/pdf")
+        async def download(request: Request):
+            return pdf_storage.pdf_file_response(request, sha256, size, "quiz.pdf")
+
+        client = TestClient(app)
+        full = client.get("/pdf")
+        assert full.status_code == 200 and full.content == data
+        assert full.headers["etag"] == f'"{sha256}"' and full.headers["accept-ranges"] == "bytes"
+        assert 'filename="quiz.pdf"' in full.headers["content-disposition"]
+
+        assert client.get("/pdf", headers={"If-None-Match": full.headers["etag"]}).status_code == 304
+
+        part = client.get("/pdf", headers={"Range": "bytes=100-1123"})
+        assert part.status_code == 206 and part.content == data[100:1124]
+        assert part.headers["content-range"] == f"bytes 100-1123/{size}"
+        assert client.get("/pdf", headers={"Range": "bytes=-10"}).content == data[-10:]
+        assert client.get("/pdf", headers={"Range": f"bytes={size - 5}-"}).content == data[-5:]
+
+        assert client.get("/pdf", headers={"Range": f"bytes={size}-"}).status_code == 416
+        assert client.get("/pdf", headers={"Range": "bytes=0-1,5-9"}).status_code == 200
+        stale = client.get("/pdf", headers={"Range": "bytes=0-9", "If-Range": '"old"'})
+        assert stale.status_code == 200 and stale.content == data
+        pdf_storage.QUIZ_PDF_DIR = original_dir
+    print("✅ Downloads support If-None-Match, Range and If-Range")
+
+
+if __name__ == "__main__":
+    test_pdfs_are_stored_on_disk()
+    test_delete_racing_identical_store_keeps_file()
+    test_ranged_and_conditional_downloads()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test script for speculative quiz pre-generation (uses the local LLM stand-in, no API key needed)
+"""
+
+import os
+import sys
+import asyncio
+import tempfile
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.models import Base, Student, Submission, PrecomputedQuestions
+from app.services.job_queue import enqueue_job, claim_next_job
+from app.services.job_handlers import pregenerate_quiz
+from app.services.quiz_precompute import enqueue_pregeneration, get_precomputed, SPECULATIVE_JOB_PRIORITY
+from app.services import pdf_storage
+from app.services.single_flight import content_hash
+from app.api.admin import QuizGenerationRequest, _find_submissions, _generate_per_student_quiz
+from llm_standin import StandinConfig, start_standin_in_thread
+
+
+def _session(tmp):
+    engine = create_engine(f"sqlite:///{os.path.join(tmp, 'precompute.db')}")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+def _submission(db, code):
+    student = Student(student_id="PRE001", name="Pre Student", is_approved=True, block=4)
+    db.add(student)
+    db.commit()
+    submission = Submission(student_id=student.id, assignment_name="Calculator", file_name="calc.py",
+                            file_content=code, file_size=len(code))
+    db.add(submission)
+    db.commit()
+    return submission
+
+
+def test_speculative_jobs_run_last():
+    """Low-priority pre-generation jobs never jump ahead of live work"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _session(tmp)
+        speculative = enqueue_job(db, "pregenerate_quiz", {"submission_id": 1}, priority=SPECULATIVE_JOB_PRIORITY)
+        live = enqueue_job(db, "analyze_submission", {"submission_id": 1})
+        assert claim_next_job(db, "w1").id == live.id
+        assert claim_next_job(db, "w1").id == speculative.id
+        db.close()
+    print("✅ Speculative jobs are claimed after live jobs")
+
+
+def test_pregenerated_questions_are_reused():
+    """The handler stores questions by content hash; the same code is never generated twice"""
+    code = "def add(a, b):\n    return a + b\n\nprint(add(2, 3))\n"
+    server, base_url = start_standin_in_thread(StandinConfig())
+    saved = {name: os.environ.get(name) for name in ("OPENAI_BASE_URL", "OPENAI_API_KEY")}
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ["OPENAI_API_KEY"] = "standin"
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = _session(tmp)
+            submission = _submission(db, code)
+            job = enqueue_pregeneration(db, submission)
+            assert job is not None and job.priority == SPECULATIVE_JOB_PRIORITY
+
+            result = asyncio.run(pregenerate_quiz(job.payload, db))
+            assert result["questions_count"] == 5
+            assert db.query(PrecomputedQuestions).count() == 1
+
+            precomputed = get_precomputed(db, "Calculator", [content_hash(code)])
+            assert len(precomputed[content_hash(code)]) == 5
+            assert enqueue_pregeneration(db, submission) is None  # Nothing left to do
+            assert asyncio.run(pregenerate_quiz(job.payload, db))["skipped"] == "already precomputed"
+
+            # A quiz served entirely from precomputed questions never reads the code
+            db.close()
+            db = sessionmaker(bind=db.get_bind())()
+            statements = []
+            event.listen(db.get_bind(), "before_cursor_execute", lambda conn, cursor, sql, *args: statements.append(sql))
+            request = QuizGenerationRequest(assignment_name="Calculator", student_ids=["PRE001"], per_student=True)
+            original_dir, pdf_storage.QUIZ_PDF_DIR = pdf_storage.QUIZ_PDF_DIR, tmp
+            try:
+                _, submissions_by_student = _find_submissions(request, db)
+                result = asyncio.run(_generate_per_student_quiz(request, submissions_by_student, db))
+            finally:
+                pdf_storage.QUIZ_PDF_DIR = original_dir
+            assert result["precomputed_students"] == 1 and not result["failed_students"]
+            assert not any("code_blobs" in sql for sql in statements)
+            db.close()
+    finally:
+        server.should_exit = True
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+    print("✅ Pre-generated questions stored and reused")
+
+
+if __name__ == "__main__":
+    test_speculative_jobs_run_last()
+    test_pregenerated_questions_are_reused()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test script for streamed quiz generation and SSE progress (uses the local LLM stand-in, no API key needed)
+"""
+
+import os
+import sys
+import json
+import uuid
+import asyncio
+import httpx
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///./ai_assessment.db')
+
+from app.services.quiz_generation_service import QuizGenerationService, _partial_quiz_text
+from llm_standin import StandinConfig, start_standin_in_thread
+
+
+def test_partial_quiz_text():
+    """quiz_text is readable from every prefix of the arguments JSON"""
+    text = '1. What does "total" hold?\nCode snippet:\n    total += x\n2. Why a loop?\nCode snippet: for x in xs'
+    arguments = json.dumps({"quiz_text": text})
+    assert _partial_quiz_text(arguments) == text
+    assert _partial_quiz_text('{"quiz_') == ""
+    for end in range(len(arguments)):
+        assert text.startswith(_partial_quiz_text(arguments[:end]))
+    print("✅ Partial quiz_text decoded from incomplete JSON")
+
+
+def with_standin(test):
+    def run():
+        server, base_url = start_standin_in_thread(StandinConfig(latency="fixed:0.5"))
+        saved = {name: os.environ.get(name) for name in ("OPENAI_BASE_URL", "OPENAI_API_KEY")}
+        os.environ["OPENAI_BASE_URL"] = base_url
+        os.environ["OPENAI_API_KEY"] = "standin"
+        try:
+            test(base_url)
+        finally:
+            server.should_exit = True
+            for name, value in saved.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+    run.__name__ = test.__name__
+    run.__doc__ = test.__doc__
+    return run
+
+
+@with_standin
+def test_questions_arrive_before_the_end(base_url):
+    """Questions are yielded while the stream is running; a repeat is served from the cache"""
+    code = f"def grade_{uuid.uuid4().hex[:8]}(score):\n    return 'A' if score > 90 else 'B'\n"
+
+    async def collect():
+        events = []
+        async for kind, value in QuizGenerationService().stream_quiz_questions(code, "Grades"):
+            events.append((kind, value))
+        return events
+
+    events = asyncio.run(collect())
+    kinds = [kind for kind, _ in events]
+    assert kinds[-1] == "questions" and len(events[-1][1]) == 5
+    assert kinds.count("question") >= 3
+    streamed = [value.question for kind, value in events if kind == "question"]
+    assert streamed == [q.question for q in events[-1][1]][:len(streamed)]
+
+    stats = httpx.get(base_url.replace("/v1", "/stats")).json()
+    again = asyncio.run(collect())
+    assert [q.question for q in again[-1][1]] == [q.question for q in events[-1][1]]
+    assert httpx.get(base_url.replace("/v1", "/stats")).json()["requests"] == stats["requests"]
+    print(f"✅ {kinds.count('question')} questions streamed before the final set; repeat served from cache")
+
+
+@with_standin
+def test_sse_events(base_url):
+    """The admin event stream reports per-student progress and ends with the PDF"""
+    from app.main import app  # noqa: F401 (creates the tables)
+    from app.api.admin import QuizGenerationRequest, _quiz_event_stream
+    from app.services.quiz_generation_service import QuizQuestion
+
+    request = QuizGenerationRequest(assignment_name="Grades", student_ids=["SSE1", "SSE2", "SSE3"],
+                                    per_student=True, bypass_cache=True)
+    precomputed = {"SSE3": [QuizQuestion(question="Precomputed?", code_snippet="x = 1", focus="Comprehension")] * 5}
+    code_by_key = {key: f"value = {n}\nprint(value * {n})\n" for n, key in enumerate(["SSE1", "SSE2"])}
+    names = {"SSE1": "One", "SSE2": "Two", "SSE3": "Three"}
+
+    async def collect():
+        return [chunk async for chunk in _quiz_event_stream(request, code_by_key, precomputed, names)]
+
+    events = []
+    for chunk in asyncio.run(collect()):
+        lines = dict(line.split(": ", 1) for line in chunk.strip().split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+
+    assert events[0][0] == "start" and events[-1][0] == "done"
+    statuses = [(data["student_id"], data["status"]) for event, data in events if event == "progress"]
+    assert ("SSE3", "precomputed") in statuses
+    assert ("SSE1", "question") in statuses and ("SSE2", "done") in statuses
+    done = events[-1][1]
+    assert done["students_count"] == 3 and done["questions_count"] == 15 and done["pdf_id"]
+    print(f"✅ {len(events)} SSE events, PDF {done['pdf_id']}")
+
+
+if __name__ == "__main__":
+    test_partial_quiz_text()
+    test_questions_arrive_before_the_end()
+    test_sse_events()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test script for single-flight coalescing of identical quiz generations (no API key needed)
+"""
+
+import os
+import sys
+import asyncio
+import tempfile
+import threading
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from app.services.single_flight import SingleFlight, make_flight_key, content_hash
+
+
+def test_flight_key_ignores_order():
+    """The key depends on the set of submission hashes, not their order"""
+    first = make_flight_key("quiz", "Calculator", [content_hash("a"), content_hash("b")], per_student=False)
+    second = make_flight_key("quiz", "Calculator", [content_hash("b"), content_hash("a")], per_student=False)
+    other = make_flight_key("quiz", "Calculator", [content_hash("a")], per_student=False)
+    assert first == second and first != other
+    print("✅ Flight key ignores submission order")
+
+
+def test_concurrent_calls_share_one_run():
+    """Concurrent identical calls in one process run the work once and get the same result"""
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.1)
+        return {"pdf_id": len(runs)}
+
+    async def main(flight):
+        return await asyncio.gather(*(flight.run("key", work) for _ in range(5)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        flight = SingleFlight(path=os.path.join(tmp, "sf.db"))
+        results = asyncio.run(main(flight))
+    assert len(runs) == 1
+    assert all(result == {"pdf_id": 1} for result, _ in results)
+    assert sum(1 for _, shared in results if not shared) == 1
+    print("✅ Concurrent calls coalesced into one run")
+
+
+def test_workers_share_one_run():
+    """Two coordinators on the same file (two workers) elect one leader"""
+    runs = []
+    results = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.5)
+        return {"pdf_id": 42}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sf.db")
+
+        def worker():
+            results.append(asyncio.run(SingleFlight(path=path).run("key", work)))
+
+        threads = [threading.Thread(target=worker) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert len(runs) == 1
+    assert sorted(shared for _, shared in results) == [False, True]
+    assert all(result == {"pdf_id": 42} for result, _ in results)
+    print("✅ Workers coalesced through the SQLite lease")
+
+
+def test_failure_releases_key():
+    """A failed leader releases the key so the next call runs again"""
+    attempts = []
+
+    async def work():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("LLM unavailable")
+        return {"pdf_id": 7}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        flight = SingleFlight(path=os.path.join(tmp, "sf.db"))
+        try:
+            asyncio.run(flight.run("key", work))
+            assert False, "expected the failure to propagate"
+        except RuntimeError:
+            pass
+        result, shared = asyncio.run(flight.run("key", work))
+    assert result == {"pdf_id": 7} and not shared and len(attempts) == 2
+    print("✅ Failed generation releases the key")
+
+
+if __name__ == "__main__":
+    test_flight_key_ignores_order()
+    test_concurrent_calls_share_one_run()
+    test_workers_share_one_run()
+    test_failure_releases_key()
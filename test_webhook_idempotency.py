@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test script for idempotent GitHub webhook ingestion (no GitHub or API key needed)
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import tempfile
+import httpx
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.models import Base, Job, get_db
+from app.services import webhook_idempotency
+from app.services.webhook_idempotency import WebhookIdempotencyStore, delivery_key, commit_key
+
+
+def test_claims_and_expiry():
+    """A key is processed once; failures release it; stale claims and expired keys are reclaimed"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = WebhookIdempotencyStore(os.path.join(tmp, "keys.db"), ttl_seconds=60, lease_seconds=30)
+        key = delivery_key("abc")
+        assert store.claim(key) == (True, None)
+        assert store.claim(key) == (False, None)  # Still being processed
+        store.complete([key], {"results": [1]})
+        assert store.claim(key) == (False, {"results": [1]})
+
+        other = delivery_key("def")
+        assert store.claim(other)[0]
+        store.release([other])
+        assert store.claim(other)[0]  # Failed attempt, retry is processed
+
+        assert store.claim_many([commit_key("r", "1"), commit_key("r", "2")]) == {commit_key("r", "1"), commit_key("r", "2")}
+        assert store.claim_many([commit_key("r", "2"), commit_key("r", "3")]) == {commit_key("r", "3")}
+
+        # A claim left by a crashed worker, and a completed key past its TTL
+        store._conn.execute("UPDATE webhook_keys SET claimed_at = claimed_at - 31 WHERE key = ?", (other,))
+        store._conn.execute("UPDATE webhook_keys SET expires_at = ? WHERE key = ?", (time.time() - 1, key))
+        assert store.claim(other)[0] and store.claim(key)[0]
+        assert store.stats()["duplicates"] == 3
+    print("✅ Delivery and commit keys claimed once, released on failure, expired on TTL")
+
+
+def test_redelivery_is_acknowledged_without_processing():
+    """A redelivered push returns the first response; a commit seen in another delivery is skipped"""
+    from app.main import app
+    from app.services.github_service import GitHubService
+
+    processed = []
+
+    def fake_process(self, payload, db):
+        results = []
+        for commit in payload['commits']:
+            processed.append(commit['id'])
+            results.append({'student_id': 1, 'submission_id': len(processed), 'commit_sha': commit['id'], 'status': 'processed'})
+        return {'success': True, 'processed_commits': len(results), 'results': results}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'app.db')}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+
+        def override_db():
+            db = Session()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        saved_store, saved_process = webhook_idempotency._store, GitHubService.process_push_event
+        saved_secret = os.environ.pop("GITHUB_WEBHOOK_SECRET", None)
+        webhook_idempotency._store = WebhookIdempotencyStore(os.path.join(tmp, "keys.db"))
+        GitHubService.process_push_event = fake_process
+        app.dependency_overrides[get_db] = override_db
+        try:
+            def push(delivery, shas):
+                body = {"repository": {"full_name": "class/calc"}, "commits": [{"id": sha} for sha in shas]}
+                headers = {"X-GitHub-Event": "push", "X-GitHub-Delivery": delivery}
+
+                async def send():
+                    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                        return await client.post("/webhook/github", content=json.dumps(body), headers=headers)
+                return asyncio.run(send())
+
+            first = push("d-1", ["a1", "b2"])
+            assert first.status_code == 202 and len(first.json()["results"]) == 2
+            again = push("d-1", ["a1", "b2"])
+            assert again.status_code == 200 and again.json()["status"] == "duplicate"
+            assert again.json()["results"] == first.json()["results"]
+
+            webhook_idempotency._store.claim(delivery_key("d-busy"))  # First attempt still running
+            busy = push("d-busy", ["e5"])
+            assert busy.status_code == 409 and busy.headers["retry-after"] and busy.json()["status"] == "in_progress"
+
+            other_branch = push("d-2", ["b2", "c3"])
+            statuses = {r["commit_sha"]: r["status"] for r in other_branch.json()["results"]}
+            assert statuses == {"c3": "processed", "b2": "duplicate"}
+
+            assert processed == ["a1", "b2", "c3"]
+            db = Session()
+            assert db.query(Job).filter(Job.job_type == "analyze_submission").count() == 3
+            db.close()
+        finally:
+            app.dependency_overrides.pop(get_db, None)
+            webhook_idempotency._store = saved_store
+            GitHubService.process_push_event = saved_process
+            if saved_secret is not None:
+                os.environ["GITHUB_WEBHOOK_SECRET"] = saved_secret
+    print("✅ Redelivery acknowledged from the store, or retried while in progress; each commit analyzed once")
+
+
+if __name__ == "__main__":
+    test_claims_and_expiry()
+    test_redelivery_is_acknowledged_without_processing()